@@ -82,12 +82,41 @@ export async function sendChatMessage(
   return await response.json();
 }
 
-// Function to get chat history for an agent
-export async function getChatHistory(masterFilePath: string) {
+// Function to send only the new chat message, the server keeps the chat history
+export async function sendSessionChatMessage(
+  masterFilePath: string,
+  message: string
+) {
+  const response = await fetch(`${BASE_URL}/agents/chat`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      prompt: message,
+      master_file_path: masterFilePath,
+      session: true,
+    }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  return await response.json();
+}
+
+// Function to get chat history for an agent, a page of it if before or limit is set
+export async function getChatHistory(
+  masterFilePath: string,
+  before?: number,
+  limit?: number
+) {
+  const params = new URLSearchParams({ master_file_path: masterFilePath });
+  if (before !== undefined) params.set("before", String(before));
+  if (limit !== undefined) params.set("limit", String(limit));
+
   const response = await fetch(
-    `${BASE_URL}/agents/chat-history?master_file_path=${encodeURIComponent(
-      masterFilePath
-    )}`
+    `${BASE_URL}/agents/chat-history?${params.toString()}`
   );
   if (!response.ok) {
     throw new Error(`HTTP error! status: ${response.status}`);
@@ -0,0 +1,236 @@
+"""
+Async API Server Module
+
+This module implements the ASGI (FastAPI) version of the REST API server. It
+exposes the same endpoints as api.py, but every handler is async and the
+blocking work (LLM provider calls and file I/O) runs in a worker thread, so
+long running generations never block the event loop or starve chat requests.
+
+Run with:
+    uvicorn api_async:app --host 0.0.0.0 --port 8080
+
+Environment Variables:
+    ASYNC_WORKER_THREADS (int): Maximum number of blocking handlers that can
+        run at the same time. Defaults to 256.
+"""
+
+import os
+from contextlib import asynccontextmanager
+
+import anyio
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+
+from handlers import api_handlers
+
+# Load environment variables
+load_dotenv()
+
+# Number of threads available to blocking handlers, anyio defaults to 40
+ASYNC_WORKER_THREADS = int(os.getenv("ASYNC_WORKER_THREADS", "256"))
+
+# Create global AI model instance
+ai_model = api_handlers.create_default_ai_model()
+
+@asynccontextmanager
+async def lifespan(app):
+    """Raises the worker thread limit so hundreds of generations can be in flight."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = ASYNC_WORKER_THREADS
+    print(f"Async API Server using {ASYNC_WORKER_THREADS} worker threads")
+
+    # Start the background job queue, resuming unfinished jobs
+    await run_in_threadpool(api_handlers.start_job_queue, ai_model)
+    yield
+
+app = FastAPI(title="ARAI AI Agents API", lifespan=lifespan)
+
+# Configure CORS for frontend origin
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["*"],
+)
+
+async def read_json(request: Request) -> dict:
+    """
+    Reads the JSON request body, returning an empty dict if there is none.
+
+    Args:
+        request (Request): The incoming request
+
+    Returns:
+        dict: The parsed request body
+    """
+    try:
+        data = await request.json()
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+async def run_handler(handler, *args) -> JSONResponse:
+    """
+    Runs a blocking handler in the worker thread pool.
+
+    Args:
+        handler (callable): Handler from handlers.api_handlers
+        *args: Arguments passed to the handler
+
+    Returns:
+        JSONResponse: The handler payload with its HTTP status code
+    """
+    payload, status = await run_in_threadpool(handler, *args)
+    return JSONResponse(content=payload, status_code=status)
+
+@app.post('/api/agents/random')
+async def create_random_agent(request: Request):
+    """Creates a new random agent with optional concept."""
+    return await run_handler(api_handlers.create_random_agent, ai_model, await read_json(request))
+
+@app.get('/api/agents')
+async def get_agents():
+    """Retrieves list of all agents."""
+    return await run_handler(api_handlers.get_agents)
+
+@app.post('/api/agents/')
+async def create_agent(request: Request):
+    """Creates a new agent from provided configuration."""
+    return await run_handler(api_handlers.create_agent, await read_json(request))
+
+@app.get('/api/characters')
+async def get_characters(fields: str = None, limit: str = None, cursor: str = None):
+    """Retrieves character configurations, optionally projected and paginated."""
+    return await run_handler(api_handlers.get_characters, fields, limit, cursor)
+
+@app.get('/api/characters/stats')
+async def get_catalog_stats():
+    """Retrieves the agent catalog hit, miss and reload counters."""
+    return await run_handler(api_handlers.get_catalog_stats)
+
+@app.get('/api/prompts/stats')
+async def get_prompt_stats():
+    """Retrieves the prompt template cache counters and per-prompt render, LLM and parse timings."""
+    return await run_handler(api_handlers.get_prompt_stats)
+
+@app.get('/api/prompts/json-extraction/stats')
+async def get_json_extraction_stats():
+    """Retrieves the JSON parse-recovery counters of the LLM responses."""
+    return await run_handler(api_handlers.get_json_extraction_stats)
+
+@app.get('/api/prompts/retries/stats')
+async def get_retry_stats():
+    """Retrieves the retry counters of each prompt."""
+    return await run_handler(api_handlers.get_retry_stats)
+
+@app.get('/api/models/cache/stats')
+async def get_llm_cache_stats():
+    """Retrieves the LLM response cache counters and the hit rate of each prompt."""
+    return await run_handler(api_handlers.get_llm_cache_stats)
+
+@app.get('/api/agents/chat/context/stats')
+async def get_chat_context_stats():
+    """Retrieves the chat context and summary counters."""
+    return await run_handler(api_handlers.get_chat_context_stats)
+
+@app.get('/api/agents/memory/stats')
+async def get_agent_memory_stats():
+    """Retrieves the agent memory counters."""
+    return await run_handler(api_handlers.get_agent_memory_stats)
+
+@app.get('/api/agents/continuity/stats')
+async def get_continuity_digest_stats():
+    """Retrieves the continuity digest counters."""
+    return await run_handler(api_handlers.get_continuity_digest_stats)
+
+@app.get('/api/models/health')
+async def get_model_health():
+    """Retrieves the circuit breaker state and health counters of every model provider."""
+    return await run_handler(api_handlers.get_model_health)
+
+@app.post('/api/agents/chat')
+async def chat_with_agent(request: Request):
+    """Handles chat interactions with an agent."""
+    return await run_handler(api_handlers.chat_with_agent, await read_json(request))
+
+@app.post('/api/agents/chat/stream')
+async def chat_with_agent_stream(request: Request):
+    """Handles chat interactions with an agent, streaming tokens as Server-Sent Events."""
+    payload, status = await run_in_threadpool(api_handlers.chat_with_agent_stream, await read_json(request))
+    if status != 200:
+        return JSONResponse(content=payload, status_code=status)
+
+    # the model stream is blocking, so each chunk is read in a worker thread
+    return StreamingResponse(
+        iterate_in_threadpool(payload),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get('/api/agents/chat-history')
+async def get_chat_history(master_file_path: str = None, before: str = None, limit: str = None):
+    """Retrieves chat history for a specific agent, a page of it if before or limit is set."""
+    return await run_handler(api_handlers.get_chat_history, master_file_path, before, limit)
+
+@app.post('/api/agents/seasons')
+async def create_season(request: Request):
+    """Generates a new season of content for an agent."""
+    return await run_handler(api_handlers.create_season, ai_model, await read_json(request))
+
+@app.post('/api/agents/episodes/posts')
+async def create_episode_content(request: Request):
+    """Generates posts for an agent's episodes."""
+    return await run_handler(api_handlers.create_episode_content, ai_model, await read_json(request))
+
+@app.post('/api/jobs/seasons')
+async def submit_season_job(request: Request):
+    """Queues the generation of a new season and returns immediately."""
+    return await run_handler(api_handlers.submit_season_job, await read_json(request))
+
+@app.post('/api/jobs/posts')
+async def submit_posts_job(request: Request):
+    """Queues the generation of posts for the latest season and returns immediately."""
+    return await run_handler(api_handlers.submit_posts_job, await read_json(request))
+
+@app.get('/api/jobs/{job_id}')
+async def get_job(job_id: str):
+    """Retrieves the status and per-episode progress of a job."""
+    return await run_handler(api_handlers.get_job, job_id)
+
+@app.get('/api/jobs/{job_id}/result')
+async def get_job_result(job_id: str):
+    """Retrieves the updated agent data once a job has completed."""
+    return await run_handler(api_handlers.get_job_result, job_id)
+
+@app.post('/api/start-post-manager/twitter')
+async def start_post_manager_twitter(request: Request):
+    """Starts the Twitter post manager for an agent."""
+    return await run_handler(api_handlers.start_post_manager_twitter, await read_json(request))
+
+@app.post('/api/post-to-twitter')
+async def post_to_twitter(request: Request):
+    """Posts a single tweet with the running post manager."""
+    return await run_handler(api_handlers.post_to_twitter, await read_json(request))
+
+@app.put('/api/agents/update-seasons')
+async def update_seasons(request: Request):
+    """Updates the seasons array for a specific agent."""
+    return await run_handler(api_handlers.update_seasons, await read_json(request))
+
+@app.delete('/api/agents/seasons')
+async def delete_season(request: Request):
+    """Deletes a specific season and all its posts for an agent."""
+    return await run_handler(api_handlers.delete_season, await read_json(request))
+
+@app.put('/api/agents/update-backstory')
+async def update_backstory(request: Request):
+    """Updates the backstory for a specific agent."""
+    return await run_handler(api_handlers.update_backstory, await read_json(request))
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("Async API Server starting on port 8080...")
+    uvicorn.run(app, host='0.0.0.0', port=8080)
@@ -21,6 +21,9 @@ import dotenv
 import time
 import json
 import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -30,6 +33,9 @@ from utils.template_types import TemplateType
 
 dotenv.load_dotenv()
 
+# One HTTP session for the Leonardo API, so polling reuses its connections
+leonardo_session = requests.Session()
+
 # Define the Lambda endpoint URL
 get_inconsistent_image_lambda_url = "https://46i9cnowhh.execute-api.us-east-1.amazonaws.com/getImageInconsistent"
 
@@ -151,10 +157,157 @@ def get_image_url(generation_id):
         "authorization": "Bearer " + os.getenv("LEONARDO_API_KEY", "")
     }
 
-    response = requests.get(url, headers=headers)
+    response = leonardo_session.get(url, headers=headers, timeout=30)
 
     return response.json()
 
+#--------------------------------
+# Wait for many generations at once
+#--------------------------------
+# Recent generation times in seconds, shared by every poller so new batches start polling at the right time
+_generation_durations = deque(maxlen=50)
+_generation_durations_lock = threading.Lock()
+
+class GenerationPoller:
+    """
+    Description:
+        Polls the status of many Leonardo generations together and yields
+        each one as soon as it is complete. Every generation has its own
+        schedule: the first poll is made around the time generations have
+        been taking so far, later polls back off exponentially, so quick
+        generations are picked up quickly without polling slow ones every
+        few seconds. A 429 from the API backs the generation off to max_delay.
+
+    Attributes:
+        initial_delay (float): the first poll delay until a generation time is known, in seconds
+        max_delay (float): the longest delay between two polls of a generation, in seconds
+        backoff (float): the factor the delay grows by after each poll
+        timeout (float): how long a generation is waited for, in seconds
+        max_workers (int): the number of status requests sent at the same time
+    """
+
+    def __init__(self, initial_delay=3.0, max_delay=8.0, backoff=1.3, timeout=120.0, max_workers=8):
+        """Initialize the GenerationPoller class.
+
+        Args:
+            initial_delay (float): the first poll delay until a generation time is known, in seconds
+            max_delay (float): the longest delay between two polls of a generation, in seconds
+            backoff (float): the factor the delay grows by after each poll
+            timeout (float): how long a generation is waited for, in seconds
+            max_workers (int): the number of status requests sent at the same time
+
+        Example:
+            >>> poller = GenerationPoller(timeout=60)
+        """
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.stats = {"polls": 0, "completed": 0, "failed": 0, "timed_out": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+
+    def first_delay(self) -> float:
+        """Returns the delay before the first poll, 80% of the average generation time seen so far."""
+        with _generation_durations_lock:
+            if not _generation_durations:
+                return self.initial_delay
+            return max(1.0, 0.8 * sum(_generation_durations) / len(_generation_durations))
+
+    def wait(self, generation_ids: list, fetch=None):
+        """Polls the generations until each one is complete, failed or timed out.
+
+        Args:
+            generation_ids (list): the generation ids
+            fetch (callable, optional): called as fetch(generation_id), returns
+                (HTTP status code, response JSON), get_generation_status if None
+
+        Yields:
+            tuple: (generation_id, status, response) as each generation finishes, status is
+                "COMPLETE", "FAILED" or "TIMEOUT"
+
+        Example:
+            >>> for generation_id, status, response in poller.wait(ids):
+            ...     print(generation_id, status)
+        """
+        fetch = fetch or get_generation_status
+        started = time.monotonic()
+        first_delay = self.first_delay()
+        pending = {generation_id: {"next_poll": started + first_delay, "delay": first_delay} for generation_id in generation_ids}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="leonardo-poll") as executor:
+            while pending:
+                now = time.monotonic()
+                due = [generation_id for generation_id, state in pending.items() if state["next_poll"] <= now]
+                if not due:
+                    time.sleep(max(0.0, min(state["next_poll"] for state in pending.values()) - now))
+                    continue
+
+                for generation_id, (status_code, response) in zip(due, executor.map(self._fetch, [fetch] * len(due), due)):
+                    state = pending[generation_id]
+                    elapsed = time.monotonic() - started
+                    status = ((response or {}).get("generations_by_pk") or {}).get("status")
+                    images = ((response or {}).get("generations_by_pk") or {}).get("generated_images")
+
+                    if status == "COMPLETE" or (status is None and images):
+                        self._finished("completed", elapsed)
+                        del pending[generation_id]
+                        yield generation_id, "COMPLETE", response
+                    elif status == "FAILED":
+                        self._finished("failed")
+                        del pending[generation_id]
+                        yield generation_id, "FAILED", response
+                    elif elapsed >= self.timeout:
+                        self._finished("timed_out")
+                        del pending[generation_id]
+                        yield generation_id, "TIMEOUT", response
+                    else:
+                        if status_code == 429:
+                            with self._lock:
+                                self.stats["rate_limited"] += 1
+                            state["delay"] = self.max_delay
+                        else:
+                            state["delay"] = min(self.max_delay, state["delay"] * self.backoff)
+                        state["next_poll"] = time.monotonic() + state["delay"]
+
+    def _fetch(self, fetch, generation_id):
+        with self._lock:
+            self.stats["polls"] += 1
+        try:
+            return fetch(generation_id)
+        except Exception as e:
+            print(f"[GenerationPoller] - Error polling generation {generation_id}: {str(e)}")
+            return None, None
+
+    def _finished(self, outcome, duration=None):
+        with self._lock:
+            self.stats[outcome] += 1
+        if duration is not None:
+            with _generation_durations_lock:
+                _generation_durations.append(duration)
+
+def get_generation_status(generation_id):
+    """Returns the HTTP status code and the JSON of a generation.
+
+    Args:
+        generation_id (str): the generation id
+
+    Returns:
+        tuple: (HTTP status code, response JSON or None)
+    """
+    url = "https://cloud.leonardo.ai/api/rest/v1/generations/" + generation_id
+
+    headers = {
+        "accept": "application/json",
+        "authorization": "Bearer " + os.getenv("LEONARDO_API_KEY", "")
+    }
+
+    response = leonardo_session.get(url, headers=headers, timeout=30)
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, None
+
 #--------------------------------
 # Get list of models
 #--------------------------------
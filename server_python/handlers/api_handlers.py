@@ -0,0 +1,990 @@
+#
+# Module: api_handlers
+#
+# This module implements the request handlers shared by the Flask and ASGI API servers.
+#
+# Title: API Handlers
+# Summary: Framework independent API handler implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-24
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-24
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+#
+# Every handler takes plain python values and returns a (payload, status_code)
+# tuple, so api.py (Flask) and api_async.py (FastAPI) only have to translate
+# the request and response objects. Handlers are blocking, the ASGI server
+# runs them in a worker thread.
+
+# standard imports
+import os
+import json
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from prompt_chaining.step_1_create_agent import create_agent as generateAgent
+from prompt_chaining.content_run import run_content_units
+from prompt_chaining.step_5_agent_chat import agent_chat, agent_chat_stream
+from models.model_registry import get_model_registry
+from models.cached_model import get_response_cache, LLM_CACHE_ENABLED
+from models.failover_model import get_provider_health, LLM_FAILOVER_PROVIDERS
+from models.hedged_model import get_hedging_stats, LLM_HEDGE_PROVIDER
+from utils.post_manager import PostManager
+from utils import config_utils
+from utils.job_queue import JobQueue, JobStatus
+from utils.run_ledger import RunStatus
+from utils.agent_catalog import get_agent_catalog, remove_derived_files, SUMMARY_FIELDS
+from utils.content_generator import ContentGenerator
+from utils.file_locks import file_lock
+from utils.prompt_cache import get_prompt_cache
+from utils.json_extractor import get_json_extractor
+from utils.retry_policy import get_retry_policy
+from utils.chat_context import get_chat_context_builder
+from utils.chat_log import get_chat_log, chat_log_exists, CHAT_HISTORY_PAGE_SIZE
+from utils.memory_store import get_memory_stats
+from utils.continuity_digest import get_continuity_stats
+
+# Largest page size accepted by the characters listing
+MAX_CHARACTERS_PAGE_SIZE = 500
+
+# Background generation jobs, created by start_job_queue
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+job_queue = None
+
+# Post manager shared by both servers - Will be instantiated when a user logs in to Twitter
+post_manager_twitter = None
+
+def create_default_ai_model():
+    """Creates the AI model used by the generation routes.
+
+    Returns:
+        ModelInterface: a FailoverModel over LLM_FAILOVER_PROVIDERS when it is set, otherwise
+            the shared OpenAIModel, or GeminiModel if OpenAI can not be created
+    """
+    if LLM_FAILOVER_PROVIDERS:
+        ai_model = get_model_registry().get_failover(LLM_FAILOVER_PROVIDERS)
+        print(f"FailoverModel created over {[name for name, _ in ai_model.models]}")
+        return ai_model
+
+    try:
+        ai_model = get_model_registry().get("openai")
+        print(f"OpenAIModel created successfully: {ai_model}")
+    except Exception as e:
+        print(f"Error creating OpenAIModel: {str(e)}")
+        print("Using GeminiModel instead")
+        ai_model = get_model_registry().get("gemini")
+    return ai_model
+
+def get_agent_ai_model(master_file_path):
+    """Returns the shared AI model selected by the agent's ai_model settings.
+
+    Args:
+        master_file_path (str): Path to agent's master configuration file
+
+    Returns:
+        ModelInterface: the agent's model, or the default chat model (Gemini), hedged when LLM_HEDGE_PROVIDER is set
+    """
+    registry = get_model_registry()
+    ai_model = registry.get_for_agent(get_agent_catalog().get(master_file_path))
+
+    # chat is interactive, hedge its slow calls when a hedge provider is set
+    if LLM_HEDGE_PROVIDER:
+        try:
+            ai_model = registry.get_hedged(ai_model)
+        except Exception as e:
+            print(f"[get_agent_ai_model] - Error creating the hedge model, not hedging: {str(e)}")
+    return ai_model
+
+# -------------------------------------------------------------------
+# Agents
+# -------------------------------------------------------------------
+def get_agents():
+    """Retrieves list of all agents.
+
+    Returns:
+        tuple: (list of agent names, HTTP status code)
+    """
+    agents = [agent for agent in config_utils.list_available_agents() if agent != "temporary"]
+    return agents, 200
+
+def create_random_agent(ai_model, data):
+    """Creates a new random agent with optional concept.
+
+    Args:
+        ai_model (ModelInterface): The AI model to use
+        data (dict): Request body, concept (str, optional): Initial concept for the agent
+
+    Returns:
+        tuple: (generated agent data, HTTP status code)
+    """
+    # Get concept from request body if provided
+    concept = data.get('concept', '')  # Default to empty string if no concept provided
+
+    print("[create_random_agent] - Creating a random agent", f"concept: {concept}" if concept else "")
+    print("Using global AI Model instance", ai_model)
+
+    # Create RandomAgents directory if it doesn't exist
+    random_agents_dir = os.path.join('configs', 'RandomAgents')
+    os.makedirs(random_agents_dir, exist_ok=True)
+
+    # Call the generateAgent function with the concept
+    generated_master_file_path = generateAgent(ai_model, concept)
+    print(f"[create_random_agent] - generatedMasterFilePath for generatedAgent: {generated_master_file_path}")
+
+    try:
+        if not generated_master_file_path:
+            return {"error": "No file path generated"}, 500
+
+        # Get just the filename without path and extension
+        base_filename = os.path.basename(generated_master_file_path)
+        name_without_ext = os.path.splitext(base_filename)[0]
+
+        # Replace _master with _random in the filename
+        name_without_ext = name_without_ext.replace('_master', '_random')
+
+        # Generate unique filename in the RandomAgents directory
+        counter = 1
+        final_path = os.path.join(random_agents_dir, f"{name_without_ext}.json")
+        while os.path.exists(final_path):
+            filename = f"{name_without_ext}_{counter}.json"
+            final_path = os.path.join(random_agents_dir, filename)
+            counter += 1
+
+        # Move the generated file to the RandomAgents directory
+        if os.path.exists(generated_master_file_path):
+            os.rename(generated_master_file_path, final_path)
+            print(f"[create_random_agent] - Moved file to: {final_path}")
+
+            # The summary and continuity digest belong to the moved master file
+            remove_derived_files(generated_master_file_path)
+
+            # Clean up any empty character directory that might have been created
+            char_dir = os.path.dirname(generated_master_file_path)
+            if os.path.exists(char_dir) and not os.listdir(char_dir):
+                os.rmdir(char_dir)
+
+        # Read the JSON data from the file
+        with open(final_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        print(f"[create_random_agent] - Loaded data from file: {data}")
+
+        return data, 200
+
+    except Exception as e:
+        print(f"[create_random_agent] - Error: {str(e)}")
+        return {"error": "Failed to load agent data"}, 500
+
+def create_agent(data):
+    """Creates a new agent from provided configuration. If an agent with the same name exists,
+    it will be replaced.
+
+    Args:
+        data (dict): Request body with agent_details (dict) and concept (str)
+
+    Returns:
+        tuple: (created agent data, HTTP status code)
+    """
+    print(f"[create_agent] - Received data: {data}")
+
+    # Extract character name from the agent_details
+    character_name = data.get('agent_details', {}).get('name')
+    if not character_name:
+        return {"error": "Character name is required"}, 400
+
+    # Replace spaces with underscores in the character name
+    character_name = character_name.replace(' ', '_')
+
+    # Create a directory for the character
+    character_dir = os.path.join('configs', character_name)
+    os.makedirs(character_dir, exist_ok=True)
+
+    # Generate filename - always use _master.json
+    filename = f"{character_name}_master.json"
+    file_path = os.path.normpath(os.path.join(character_dir, filename))
+
+    # Create the new character structure based on the incoming data structure
+    new_character_data = {
+        "agent": {
+            "agent_details": {
+                "name": character_name.replace('_', ' '),
+                "personality": data.get('agent_details', {}).get('personality', []),
+                "communication_style": data.get('agent_details', {}).get('communication_style', []),
+                "backstory": data.get('agent_details', {}).get('backstory', ''),
+                "universe": data.get('agent_details', {}).get('universe', ''),
+                "topic_expertise": data.get('agent_details', {}).get('topic_expertise', []),
+                "hashtags": data.get('agent_details', {}).get('hashtags', []),
+                "emojis": data.get('agent_details', {}).get('emojis', [])            },
+            "ai_model": {
+                "model_type": "",
+                "model_name": "",
+                "memory_store": ""
+            },
+            "connectors": {
+                "twitter": False,
+                "telegram": False,
+                "discord": False
+            },
+            "concept": data.get('concept', ''),
+            "profile_image": data.get('profile_image', []),
+            "profile_image_options": data.get('profile_image_options', []),
+            "tracker": {
+                "current_season_number": 0,
+                "current_episode_number": 0,
+                "current_post_number": 0,
+                "post_every_x_minutes": 0
+            },
+            "seasons": data.get('seasons', [])
+        }
+    }
+
+    # Write data to the JSON file, overwriting if it exists. The master is
+    # written atomically under its lock, like every step that saves it
+    with file_lock(file_path):
+        if not ContentGenerator().save_json_file(file_path, new_character_data):
+            return {"error": "Failed to save the agent"}, 500
+
+    return new_character_data, 201
+
+def get_characters(fields=None, limit=None, cursor=None):
+    """Retrieves character configurations from the in-memory agent catalog.
+
+    Without any arguments every full master file is returned as a list. With
+    fields, limit or cursor a page object is returned instead.
+
+    Args:
+        fields (str, optional): comma separated summary fields, "summary" for all
+            summary fields or "full" for the full master data
+        limit (int or str, optional): maximum number of characters per page
+        cursor (str, optional): next_cursor returned by the previous page
+
+    Returns:
+        tuple: (list of character configurations or page dict, HTTP status code)
+    """
+    try:
+        catalog = get_agent_catalog()
+
+        if fields is None and limit is None and cursor is None:
+            characters = catalog.list_characters()
+            print(f"[get_characters] - Found {len(characters)} characters")
+
+            if not characters:
+                print("[get_characters] - No files found in configs directory or subdirectories")
+                return {"error": "No character files found"}, 404
+
+            return characters, 200
+
+        # parse the projection and pagination arguments
+        if fields is None or fields == "full":
+            field_list = None
+        elif fields == "summary":
+            field_list = list(SUMMARY_FIELDS)
+        else:
+            field_list = [field.strip() for field in fields.split(",") if field.strip()]
+
+        try:
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            return {"error": "limit must be an integer"}, 400
+        if limit is not None and not 1 <= limit <= MAX_CHARACTERS_PAGE_SIZE:
+            return {"error": f"limit must be between 1 and {MAX_CHARACTERS_PAGE_SIZE}"}, 400
+
+        try:
+            page = catalog.list_page(fields=field_list, limit=limit, cursor=cursor)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        print(f"[get_characters] - Returning {len(page['characters'])} of {page['total']} characters")
+        return page, 200
+
+    except Exception as e:
+        print(f"[get_characters] - Unexpected error: {str(e)}")
+        return {"error": str(e)}, 500
+
+def get_catalog_stats():
+    """Retrieves the agent catalog hit, miss and reload counters.
+
+    Returns:
+        tuple: (catalog counters, HTTP status code)
+    """
+    return get_agent_catalog().get_stats(), 200
+
+def get_prompt_stats():
+    """Retrieves the prompt template cache counters and the average render, LLM and parse time of each prompt.
+
+    Returns:
+        tuple: (prompt cache counters and timings, HTTP status code)
+    """
+    return get_prompt_cache(ContentGenerator().chain_prompts_path).get_stats(), 200
+
+def get_json_extraction_stats():
+    """Retrieves the JSON parse-recovery counters of the LLM responses.
+
+    Returns:
+        tuple: (parse outcome and repair counters, HTTP status code)
+    """
+    return get_json_extractor().get_stats(), 200
+
+def get_retry_stats():
+    """Retrieves the retry counters of each prompt.
+
+    Returns:
+        tuple: (retry counters, HTTP status code)
+    """
+    return get_retry_policy().get_stats(), 200
+
+def get_llm_cache_stats():
+    """Retrieves the LLM response cache counters and the hit rate of each prompt.
+
+    Returns:
+        tuple: (cache counters, or only enabled false when the cache is off, HTTP status code)
+    """
+    if not LLM_CACHE_ENABLED:
+        return {"enabled": False}, 200
+    return {"enabled": True, **get_response_cache().get_stats()}, 200
+
+def get_chat_context_stats():
+    """Retrieves the chat context and summary counters.
+
+    Returns:
+        tuple: (chat context counters, HTTP status code)
+    """
+    return get_chat_context_builder().get_stats(), 200
+
+def get_agent_memory_stats():
+    """Retrieves the agent memory counters.
+
+    Returns:
+        tuple: (memory counters, HTTP status code)
+    """
+    return get_memory_stats(), 200
+
+def get_continuity_digest_stats():
+    """Retrieves the continuity digest counters.
+
+    Returns:
+        tuple: (digest counters, HTTP status code)
+    """
+    return get_continuity_stats(), 200
+
+def get_model_health():
+    """Retrieves the circuit breaker state and counters of every provider, the hedging counters
+    and the model registry counters.
+
+    Returns:
+        tuple: ({"providers": breaker stats per provider model, "failover_providers", "hedging", "registry"}, HTTP status code)
+    """
+    return {
+        "providers": get_provider_health(),
+        "failover_providers": LLM_FAILOVER_PROVIDERS,
+        "hedging": get_hedging_stats(),
+        "registry": get_model_registry().get_stats(),
+    }, 200
+
+# -------------------------------------------------------------------
+# Chat
+# -------------------------------------------------------------------
+def get_request_chat_history(data):
+    """Returns the chat history of a chat request, None in session mode.
+
+    In session mode ("session": true) the client only sends the new message
+    and the server loads the chat history from the agent's chat log.
+
+    Args:
+        data (dict): the request body
+
+    Returns:
+        dict: the chat history sent by the client, or None in session mode
+    """
+    if data.get('session'):
+        return None
+    return data.get('chat_history', {'chat_history': []})
+
+def session_chat_history(chat_history):
+    """Returns only the messages added by a chat turn, so a session response stays small.
+
+    Args:
+        chat_history (dict): the chat history after the turn
+
+    Returns:
+        dict: {"agent_name", "chat_history": the new user message and agent response}
+    """
+    return {
+        "agent_name": chat_history.get("agent_name", ""),
+        "chat_history": chat_history.get("chat_history", [])[-2:],
+    }
+
+def chat_with_agent(data):
+    """Handles chat interactions with an agent.
+
+    Args:
+        data (dict): Request body with prompt (str), master_file_path (str) and either
+            chat_history (dict) or session (bool), see get_request_chat_history
+
+    Returns:
+        tuple: (agent response and updated chat history, only the new messages in session mode,
+            HTTP status code)
+    """
+    prompt = data.get('prompt')
+
+    master_file_path = data.get('master_file_path')
+    print(f"[chat_with_agent] - master_file_path: {master_file_path}")
+    print("\n\n\n")
+
+    chat_history = get_request_chat_history(data)
+
+    if not master_file_path:
+        return {"error": "Master file path is required"}, 400
+
+    if not os.path.exists(master_file_path):
+        return {"error": "Agent master file not found"}, 404
+
+    try:
+        # Get the agent's AI model
+        ai_model = get_agent_ai_model(master_file_path)
+
+        # Call the agent_chat function from step_5
+        agent_response, updated_chat_history = agent_chat(
+            ai_model=ai_model,
+            master_file_path=master_file_path,
+            prompt=prompt,
+            chat_history=chat_history
+        )
+
+        if chat_history is None:
+            updated_chat_history = session_chat_history(updated_chat_history)
+
+        return {
+            "response": agent_response,
+            "chat_history": updated_chat_history
+        }, 200
+    except Exception as e:
+        print(f"Error in chat_with_agent: {str(e)}")
+        return {"error": str(e)}, 500
+
+def format_sse(event: dict) -> str:
+    """Formats an event as a Server-Sent Events message.
+
+    Args:
+        event (dict): the event, its "type" is used as the SSE event name
+
+    Returns:
+        str: the SSE message
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def chat_with_agent_stream(data):
+    """Handles chat interactions with an agent, streaming the response as Server-Sent Events.
+
+    The stream sends "token" events with the text as the model produces it,
+    then a single "done" event with the full response, the updated chat
+    history (only the new messages in session mode) and the time to first
+    token. If the model fails an "error" event is sent instead of "done" and
+    the chat log is not changed.
+
+    Args:
+        data (dict): Request body with prompt (str), master_file_path (str) and either
+            chat_history (dict) or session (bool), see get_request_chat_history
+
+    Returns:
+        tuple: (generator of SSE messages, HTTP status code), or (error, HTTP status code)
+            if the request is invalid
+    """
+    prompt = data.get('prompt')
+    master_file_path = data.get('master_file_path')
+    chat_history = get_request_chat_history(data)
+
+    if not master_file_path:
+        return {"error": "Master file path is required"}, 400
+
+    if not os.path.exists(master_file_path):
+        return {"error": "Agent master file not found"}, 404
+
+    def stream():
+        try:
+            for event in agent_chat_stream(
+                ai_model=get_agent_ai_model(master_file_path),
+                master_file_path=master_file_path,
+                prompt=prompt,
+                chat_history=chat_history
+            ):
+                if event["type"] == "done":
+                    if chat_history is None:
+                        event["chat_history"] = session_chat_history(event["chat_history"])
+                    print(f"[chat_with_agent_stream] - time to first token: {event['time_to_first_token_ms']} ms, total: {event['total_ms']} ms")
+                yield format_sse(event)
+        except Exception as e:
+            print(f"Error in chat_with_agent_stream: {str(e)}")
+            yield format_sse({"type": "error", "error": str(e)})
+
+    return stream(), 200
+
+def get_chat_history(master_file_path, before=None, limit=None):
+    """Retrieves chat history for a specific agent.
+
+    Without before and limit the whole conversation is returned. With either,
+    a page of at most limit messages (default CHAT_HISTORY_PAGE_SIZE) with a
+    message_id lower than before (the newest if None) is returned, with the
+    total number of messages and next_before, the cursor of the page before it.
+
+    Args:
+        master_file_path (str): Path to agent's master configuration file
+        before (int, optional): the message_id the page ends before
+        limit (int, optional): the maximum number of messages in the page
+
+    Returns:
+        tuple: (agent's chat history, HTTP status code)
+    """
+    print(f"[get_chat_history] - master_file_path: {master_file_path}")
+    if not master_file_path:
+        return {"error": "Master file path is required"}, 400
+
+    paginated = before is not None or limit is not None
+    if paginated:
+        try:
+            before = None if before is None else int(before)
+            limit = CHAT_HISTORY_PAGE_SIZE if limit is None else int(limit)
+        except (TypeError, ValueError):
+            return {"error": "before and limit must be integers"}, 400
+        if limit < 1 or (before is not None and before < 0):
+            return {"error": "limit must be positive and before must not be negative"}, 400
+
+    # Extract agent name from master file path
+    agent_name = os.path.basename(master_file_path).replace('_master.json', '')
+
+    # Create the chat history file path using the same format as in step_5_agent_chat.py
+    chat_file_path = os.path.join(os.path.dirname(master_file_path), f"{agent_name}_chat_log.json")
+    print(f"[get_chat_history] - chat_file_path: {chat_file_path}")
+    print("\n\n\n")
+    # If chat history doesn't exist, return empty history with agent name
+    if not chat_log_exists(chat_file_path):
+        empty = {
+            "agent_name": agent_name,
+            "chat_history": []
+        }
+        if paginated:
+            empty.update({"total": 0, "next_before": None})
+        return empty, 200
+
+    # Load and return the chat history, a JSON chat log is migrated to JSONL on first read
+    chat_log = get_chat_log(chat_file_path, agent_name)
+    if paginated:
+        return {"agent_name": chat_log.agent_name or agent_name, **chat_log.page(before, limit)}, 200
+    return chat_log.to_chat_history(), 200
+
+# -------------------------------------------------------------------
+# Seasons and episodes
+# -------------------------------------------------------------------
+def create_season(ai_model, data):
+    """Generates a new season of content for an agent, recorded as a run in the run ledger.
+
+    Args:
+        ai_model (ModelInterface): The AI model to use
+        data (dict): Request body with master_file_path (str) and number_of_episodes (int)
+
+    Returns:
+        tuple: (updated agent data with new season, HTTP status code)
+    """
+    try:
+        master_file_path = data.get('master_file_path')
+        number_of_episodes = data.get('number_of_episodes', 3)  # Default to 3 episodes
+
+        if not master_file_path:
+            return {"error": "Master file path is required"}, 400
+
+        # Create a new season using the global AI model, an interrupted run
+        # can be resumed with content_run.py without calling the LLM again
+        run = run_content_units(ai_model, master_file_path, ["season"], {"number_of_episodes": number_of_episodes})
+        if run["status"] != RunStatus.COMPLETED:
+            return {"error": run["error"], "run_id": run["run_id"]}, 500
+
+        # Load and return the updated agent data
+        with open(master_file_path, 'r', encoding='utf-8') as f:
+            updated_agent = json.load(f)
+
+        return updated_agent, 200
+
+    except Exception as e:
+        print(f"Error creating season: {str(e)}")
+        return {"error": str(e)}, 500
+
+def create_episode_content(ai_model, data):
+    """Generates posts for an agent's episodes, recorded as a run in the run ledger.
+
+    Args:
+        ai_model (ModelInterface): The AI model to use
+        data (dict): Request body with master_file_path (str) and number_of_posts (int)
+
+    Returns:
+        tuple: (updated agent data with new posts, HTTP status code)
+    """
+    try:
+        master_file_path = data.get('master_file_path')
+        number_of_posts = data.get('number_of_posts')
+
+        if not master_file_path:
+            return {"error": "Master file path is required"}, 400
+
+        # Create posts for the episodes using the global AI model
+        run = run_content_units(ai_model, master_file_path, ["posts"], {"number_of_posts": number_of_posts})
+        if run["status"] != RunStatus.COMPLETED:
+            return {"error": run["error"], "run_id": run["run_id"]}, 500
+
+        # Load and return the updated agent data
+        with open(master_file_path, 'r', encoding='utf-8') as f:
+            updated_agent = json.load(f)
+
+        return updated_agent, 200
+
+    except Exception as e:
+        print(f"Error creating episode posts: {str(e)}")
+        return {"error": str(e)}, 500
+
+def update_seasons(data):
+    """Updates the seasons array for a specific agent using the agent's name.
+
+    Args:
+        data (dict): Request body with agent_name (str) and seasons (list)
+
+    Returns:
+        tuple: (updated agent data, HTTP status code)
+    """
+    try:
+        agent_name = data.get('agent_name')
+        new_seasons = data.get('seasons')
+
+        if not agent_name or not new_seasons:
+            return {"error": "Agent name and seasons data are required"}, 400
+
+        # Construct the master file path using the agent's name
+        master_file_path = os.path.join('configs', agent_name, f"{agent_name}_master.json")
+
+        if not os.path.exists(master_file_path):
+            return {"error": "Agent master file not found"}, 404
+
+        # Load, update and save the agent data under the master file lock,
+        # so steps saving the master at the same time are not overwritten
+        with file_lock(master_file_path):
+            with open(master_file_path, 'r', encoding='utf-8') as f:
+                agent_data = json.load(f)
+
+            # Update the seasons array
+            agent_data['agent']['seasons'] = new_seasons
+
+            # Save the updated agent data back to the file
+            if not ContentGenerator().save_json_file(master_file_path, agent_data):
+                return {"error": "Failed to save the agent"}, 500
+
+        return agent_data, 200
+
+    except Exception as e:
+        print(f"Error updating seasons: {str(e)}")
+        return {"error": str(e)}, 500
+
+def delete_season(data):
+    """Deletes a specific season and all its posts for an agent.
+
+    Args:
+        data (dict): Request body with master_file_path (str) and season_number (int)
+
+    Returns:
+        tuple: (updated agent data, HTTP status code)
+    """
+    try:
+        master_file_path = data.get('master_file_path')
+        season_number = data.get('season_number')
+
+        if not master_file_path or season_number is None:
+            return {"error": "Master file path and season number are required"}, 400
+
+        if not os.path.exists(master_file_path):
+            return {"error": "Agent master file not found"}, 404
+
+        # Load, update and save the agent data under the master file lock
+        with file_lock(master_file_path):
+            with open(master_file_path, 'r', encoding='utf-8') as f:
+                agent_data = json.load(f)
+
+            # Filter out the season to delete
+            agent_data['agent']['seasons'] = [
+                season for season in agent_data['agent']['seasons']
+                if season['season_number'] != season_number
+            ]
+
+            # Save the updated agent data back to the file
+            if not ContentGenerator().save_json_file(master_file_path, agent_data):
+                return {"error": "Failed to save the agent"}, 500
+
+        return agent_data, 200
+
+    except Exception as e:
+        print(f"Error deleting season: {str(e)}")
+        return {"error": str(e)}, 500
+
+def update_backstory(data):
+    """Updates the backstory for a specific agent.
+
+    Args:
+        data (dict): Request body with master_file_path (str) and backstory (str)
+
+    Returns:
+        tuple: (updated agent data, HTTP status code)
+    """
+    try:
+        master_file_path = data.get('master_file_path')
+        new_backstory = data.get('backstory')
+
+        print(f"Received request to update backstory. Master file path: {master_file_path}, New backstory: {new_backstory}") # Log the request data
+
+        if not master_file_path or new_backstory is None:
+            print("Error: Master file path and backstory are required") # Log missing data
+            return {"error": "Master file path and backstory are required"}, 400
+
+        if not os.path.exists(master_file_path):
+            print("Error: Agent master file not found") # Log file not found
+            return {"error": "Agent master file not found"}, 404
+
+        # Load, update and save the agent data under the master file lock
+        with file_lock(master_file_path):
+            with open(master_file_path, 'r', encoding='utf-8') as f:
+                agent_data = json.load(f)
+
+            # Update the backstory
+            agent_data['agent']['agent_details']['backstory'] = new_backstory
+
+            # Save the updated agent data back to the file
+            if not ContentGenerator().save_json_file(master_file_path, agent_data):
+                return {"error": "Failed to save the agent"}, 500
+
+        print("Backstory updated successfully") # Log success
+        return agent_data, 200
+
+    except Exception as e:
+        print(f"Error updating backstory: {str(e)}") # Log any exceptions
+        return {"error": str(e)}, 500
+
+# -------------------------------------------------------------------
+# Background generation jobs
+# -------------------------------------------------------------------
+def start_job_queue(ai_model):
+    """Creates the background job queue and resumes jobs left over from a previous run.
+
+    Args:
+        ai_model (ModelInterface): The AI model used by the generation jobs
+
+    Returns:
+        JobQueue: the job queue
+    """
+    global job_queue
+
+    # every job runs as a run of the run ledger and keeps its run_id in its progress,
+    # so a recovered job resumes the run instead of calling the LLM or saving the season again
+    def run_season_job(job, report_progress):
+        params = job["params"]
+        report_progress(stage="creating season")
+        run = run_content_units(
+            ai_model,
+            params["master_file_path"],
+            ["season"],
+            {"number_of_episodes": params["number_of_episodes"]},
+            run_id=job["progress"].get("run_id"),
+            on_start=lambda run: report_progress(run_id=run["run_id"])
+        )
+        if run["status"] != RunStatus.COMPLETED:
+            # the job records the reason, the run_id is already in its progress
+            raise RuntimeError(run["error"] or "Run did not complete")
+        report_progress(stage="done")
+        return {"master_file_path": params["master_file_path"]}
+
+    def run_posts_job(job, report_progress):
+        params = job["params"]
+
+        def on_episode_done(completed_episodes, total_episodes):
+            report_progress(
+                stage="creating posts",
+                total_episodes=total_episodes,
+                completed_episodes=completed_episodes
+            )
+
+        # a resumed job picks up the completed episodes from the posts checkpoint journal
+        report_progress(stage="creating posts")
+        run = run_content_units(
+            ai_model,
+            params["master_file_path"],
+            ["posts"],
+            {"number_of_posts": params["number_of_posts"]},
+            run_id=job["progress"].get("run_id"),
+            on_start=lambda run: report_progress(run_id=run["run_id"]),
+            progress_callback=on_episode_done
+        )
+        if run["status"] != RunStatus.COMPLETED:
+            # the job records the reason, the run_id is already in its progress
+            raise RuntimeError(run["error"] or "Run did not complete")
+        report_progress(stage="done")
+        return {"master_file_path": params["master_file_path"]}
+
+    job_queue = JobQueue(JOBS_DIR, max_workers=JOB_WORKERS)
+    job_queue.register("season", run_season_job)
+    job_queue.register("posts", run_posts_job)
+
+    resumed = job_queue.recover()
+    print(f"[start_job_queue] - {JOB_WORKERS} workers, resumed {resumed} jobs")
+    return job_queue
+
+def submit_season_job(data):
+    """Queues the generation of a new season for an agent.
+
+    Args:
+        data (dict): Request body with master_file_path (str) and number_of_episodes (int)
+
+    Returns:
+        tuple: (job id and status, HTTP status code)
+    """
+    if job_queue is None:
+        return {"error": "Job queue is not running"}, 503
+    master_file_path = data.get('master_file_path')
+    if not master_file_path:
+        return {"error": "Master file path is required"}, 400
+    if not os.path.exists(master_file_path):
+        return {"error": "Agent master file not found"}, 404
+
+    job = job_queue.submit("season", {
+        "master_file_path": master_file_path,
+        "number_of_episodes": data.get('number_of_episodes', 3)
+    }, key=os.path.normpath(master_file_path))
+
+    return {"job_id": job["job_id"], "status": job["status"]}, 202
+
+def submit_posts_job(data):
+    """Queues the generation of posts for an agent's episodes.
+
+    Args:
+        data (dict): Request body with master_file_path (str) and number_of_posts (int)
+
+    Returns:
+        tuple: (job id and status, HTTP status code)
+    """
+    if job_queue is None:
+        return {"error": "Job queue is not running"}, 503
+    master_file_path = data.get('master_file_path')
+    if not master_file_path:
+        return {"error": "Master file path is required"}, 400
+    if not os.path.exists(master_file_path):
+        return {"error": "Agent master file not found"}, 404
+
+    job = job_queue.submit("posts", {
+        "master_file_path": master_file_path,
+        "number_of_posts": data.get('number_of_posts', 6)
+    }, key=os.path.normpath(master_file_path))
+
+    return {"job_id": job["job_id"], "status": job["status"]}, 202
+
+def get_job(job_id):
+    """Retrieves the status and progress of a job.
+
+    Args:
+        job_id (str): The job id
+
+    Returns:
+        tuple: (job status, HTTP status code)
+    """
+    if job_queue is None:
+        return {"error": "Job queue is not running"}, 503
+    job = job_queue.get(job_id)
+    if not job:
+        return {"error": "Job not found"}, 404
+    return job, 200
+
+def get_job_result(job_id):
+    """Retrieves the result of a finished job, the updated agent data.
+
+    Args:
+        job_id (str): The job id
+
+    Returns:
+        tuple: (updated agent data, HTTP status code)
+    """
+    if job_queue is None:
+        return {"error": "Job queue is not running"}, 503
+    job = job_queue.get(job_id)
+    if not job:
+        return {"error": "Job not found"}, 404
+    if job["status"] == JobStatus.FAILED:
+        return {"error": job["error"], "status": job["status"], "run_id": job["progress"].get("run_id")}, 500
+    if job["status"] != JobStatus.COMPLETED:
+        return {"job_id": job_id, "status": job["status"], "progress": job["progress"]}, 202
+
+    updated_agent = get_agent_catalog().get(job["result"]["master_file_path"])
+    if updated_agent is None:
+        return {"error": "Agent master file not found"}, 404
+    return updated_agent, 200
+
+# -------------------------------------------------------------------
+# Twitter Posting
+# -------------------------------------------------------------------
+def start_post_manager_twitter(data):
+    """Starts the Twitter post manager for an agent.
+
+    Args:
+        data (dict): Request body with agent_name (str)
+
+    Returns:
+        tuple: (status message, HTTP status code)
+    """
+    global post_manager_twitter
+
+    agent_name = data.get('agent_name')
+
+    print("\n")
+    if not agent_name:
+        print("[start_post_manager_twitter] - Agent name is required")
+        return {'error': 'Agent name is required'}, 400
+
+    try:
+        # Create PostManager instance with the agent name
+        post_manager_twitter = PostManager(agent_name=agent_name)
+        print(f"[start_post_manager_twitter] - post_manager created: {post_manager_twitter}")
+
+        # Check if the PostManager is logged in
+        if post_manager_twitter and post_manager_twitter.is_logged_in:
+            return {'success': True, 'message': f'Post manager started for {agent_name}'}, 200
+        else:
+            return {'error': 'Failed to start post manager or login to Twitter'}, 500
+
+    except Exception as e:
+        print(f"[start_post_manager] - Error: {str(e)}")
+        return {'error': str(e)}, 500
+
+def post_to_twitter(data):
+    """Posts a single tweet with the running post manager.
+
+    Args:
+        data (dict): Request body with master_data (dict) and content (str)
+
+    Returns:
+        tuple: (status message, HTTP status code)
+    """
+    try:
+        master_data = data.get('master_data')
+        post_content = data.get('content')
+
+        if not master_data or not post_content:
+            return {'error': 'Master data or post content is required'}, 400
+
+        if post_manager_twitter:
+            post_success = post_manager_twitter.post_single_tweet(post_content)
+            if post_success:
+                return {'success': True}, 200
+            else:
+                return {'error': 'Failed to post to Twitter'}, 500
+        else:
+            return {'error': 'Post manager not initialized'}, 500
+
+    except Exception as e:
+        return {'error': str(e)}, 500
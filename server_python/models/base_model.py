@@ -15,6 +15,67 @@
 #     - https://github.com/ARAI-DevHub/arai-ai-agents
 #     - https://x.com/TheBlockRhino
 from abc import ABC, abstractmethod # Import the ABC class and abstractmethod from the abc module
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# The prompt template key of the current model call, e.g. "prompt_2 (Season Creation)".
+# ContentGenerator.run_prompt sets it so model wrappers can report per-prompt metrics.
+current_prompt_key = ContextVar("current_prompt_key", default=None)
+
+@contextmanager
+def prompt_key_context(prompt_key: str):
+    """ Sets the prompt key reported by model wrappers for the calls made inside the block.
+
+    Args:
+        prompt_key (str): The key for the prompt template.
+
+    Example:
+        >>> with prompt_key_context("prompt_2 (Season Creation)"):
+        ...     response = ai_model.generate_response(prompt_text)
+    """
+    token = current_prompt_key.set(prompt_key)
+    try:
+        yield
+    finally:
+        current_prompt_key.reset(token)
+
+# Model wrappers return this prefix and the error message instead of raising
+ERROR_RESPONSE_PREFIX = "Error generating response: "
+
+# The exception behind the last error response returned in this context, so
+# callers can read its status code and Retry-After header, not just the message
+last_model_error = ContextVar("last_model_error", default=None)
+
+def error_response(error: Exception) -> str:
+    """ Records a provider exception and returns the error response of a model wrapper.
+
+    Args:
+        error (Exception): The exception raised by the provider SDK.
+
+    Returns:
+        str: ERROR_RESPONSE_PREFIX followed by the error message.
+
+    Example:
+        >>> except Exception as e:
+        ...     return error_response(e)
+    """
+    last_model_error.set(error)
+    return f"{ERROR_RESPONSE_PREFIX}{str(error)}"
+
+def is_error_response(response) -> bool:
+    """ Checks whether a model response is an error message from a model wrapper.
+
+    Args:
+        response (str): The response returned by generate_response.
+
+    Returns:
+        bool: True if the response is an error message, or empty.
+
+    Example:
+        >>> is_error_response("Error generating response: 429 Too Many Requests")
+        True
+    """
+    return not isinstance(response, str) or not response.strip() or response.startswith(ERROR_RESPONSE_PREFIX)
 
 class ModelInterface(ABC):
     """Base class for all models.        
@@ -33,4 +94,23 @@ class ModelInterface(ABC):
             >>> base_model.generate_response("Hello, world!")
         """
 
-        pass
\ No newline at end of file
+        pass
+
+    def generate_response_stream(self, prompt: str, **kwargs):
+        """ Generate a response to a given prompt, yielding text chunks as they are produced.
+
+        Models that support streaming override this. The default implementation
+        yields the complete response as a single chunk.
+
+        Args:
+            prompt (str): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Example:
+            >>> for chunk in base_model.generate_response_stream("Hello, world!"):
+            ...     print(chunk, end="")
+        """
+        yield self.generate_response(prompt, **kwargs)
\ No newline at end of file
@@ -0,0 +1,446 @@
+#
+# Module: cached_model
+#
+# This module implements the CachedModel class for caching AI model responses.
+#
+# Title: Cached Model
+# Summary: LLM response cache implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+# custom ARAI code imports
+from .base_model import ModelInterface, is_error_response, current_prompt_key
+
+load_dotenv()
+
+# The cache is opt-in, set LLM_CACHE=true to wrap every model from the model registry
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "false").lower() in ("1", "true", "yes")
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "llm_cache")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "500"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Only the content generation prompts are cached, chat replies and random agents must vary
+LLM_CACHE_PROMPT_KEYS = [
+    prompt_key.strip()
+    for prompt_key in os.getenv(
+        "LLM_CACHE_PROMPT_KEYS",
+        "prompt_1 (Character Sheet Creation),prompt_2 (Season Creation),prompt_3 (Episode Posts Creation)"
+    ).split(",")
+    if prompt_key.strip()
+]
+
+# Set by response_cache_disabled() for calls whose output must vary even for the same prompt
+_cache_disabled = ContextVar("response_cache_disabled", default=False)
+
+@contextmanager
+def response_cache_disabled():
+    """Sends the model calls made inside the block to the provider, even for a cached prompt key.
+
+    Example:
+        >>> with response_cache_disabled():
+        ...     agent_data = manager.run_prompt("prompt_1 (Character Sheet Creation)", prompt_1_vars, ai_model)
+    """
+    token = _cache_disabled.set(True)
+    try:
+        yield
+    finally:
+        _cache_disabled.reset(token)
+
+class ResponseCache:
+    """
+    Description:
+        A bounded, content-addressed store of model responses. Entries are
+        saved as one JSON file each on disk and the most recently used ones
+        are also kept in memory, so a hit usually costs a dictionary lookup.
+        When the store is full the least recently used entry is evicted, and
+        entries older than the TTL are treated as misses.
+
+    Attributes:
+        cache_dir (str): the directory the responses are saved to
+        max_entries (int): the maximum number of responses on disk
+        memory_entries (int): the maximum number of responses kept in memory
+        ttl_seconds (int): how long a response stays valid, 0 for no limit
+        stats (dict): hit, miss, store, eviction and expiry counters
+    """
+
+    def __init__(self, cache_dir="llm_cache", max_entries=5000, memory_entries=500, ttl_seconds=7 * 24 * 3600):
+        """Initialize the ResponseCache class.
+
+        Args:
+            cache_dir (str): the directory the responses are saved to
+            max_entries (int): the maximum number of responses on disk
+            memory_entries (int): the maximum number of responses kept in memory
+            ttl_seconds (int): how long a response stays valid, 0 for no limit
+
+        Example:
+            >>> response_cache = ResponseCache("llm_cache", max_entries=1000)
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._prompt_stats = {}
+        self._index = OrderedDict()     # key -> created_at (None until read from disk), least recently used first
+        self._memory = OrderedDict()    # key -> response, least recently used first
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # -------------------------------------------------------------------
+    # Helpers to build keys
+    # -------------------------------------------------------------------
+    @staticmethod
+    def make_key(model_id: str, prompt, params: dict) -> str:
+        """Returns the cache key of a model call.
+
+        Args:
+            model_id (str): the model class and model name
+            prompt (str or list[dict]): the rendered prompt
+            params (dict): the keyword arguments of the call
+
+        Returns:
+            str: the sha256 of the model, prompt and parameters
+
+        Example:
+            >>> ResponseCache.make_key("OpenAIModel:gpt-4o", "Hello", {})
+        """
+        payload = json.dumps({"model": model_id, "prompt": prompt, "params": params}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # -------------------------------------------------------------------
+    # Helpers to read and write responses
+    # -------------------------------------------------------------------
+    def get(self, key: str, prompt_key: str = None):
+        """Returns a cached response.
+
+        Args:
+            key (str): the cache key
+            prompt_key (str, optional): the prompt template key, used for the hit rate metrics
+
+        Returns:
+            str: the cached response, or None on a miss
+        """
+        with self._lock:
+            cached = key in self._index
+            created_at = self._index.get(key)
+            if created_at is not None and self._is_expired(created_at):
+                self._remove(key)
+                self.stats["expired"] += 1
+                cached = False
+
+            response = None
+            if cached:
+                self._index.move_to_end(key)
+                response = self._memory.get(key)
+                if response is not None:
+                    self._memory.move_to_end(key)
+
+        # read from disk outside the lock
+        if cached and response is None:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(self._path(key))
+            except Exception:
+                entry = None
+
+            with self._lock:
+                if entry is None:
+                    self._index.pop(key, None)
+                elif self._is_expired(entry["created_at"]):
+                    self._remove(key)
+                    self.stats["expired"] += 1
+                else:
+                    response = entry["response"]
+                    self._index[key] = entry["created_at"]
+                    self._remember(key, response)
+
+        self._record(prompt_key, hit=response is not None)
+        return response
+
+    def put(self, key: str, response: str, prompt_key: str = None):
+        """Saves a response. Error responses are never cached.
+
+        Args:
+            key (str): the cache key
+            response (str): the model response
+            prompt_key (str, optional): the prompt template key, saved with the entry
+        """
+        if is_error_response(response):
+            return
+
+        created_at = time.time()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "prompt_key": prompt_key, "response": response}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"[ResponseCache] - Error saving response: {str(e)}")
+            return
+
+        with self._lock:
+            self._index[key] = created_at
+            self._index.move_to_end(key)
+            self._remember(key, response)
+            self.stats["stores"] += 1
+            while len(self._index) > self.max_entries:
+                oldest_key = next(iter(self._index))
+                self._remove(oldest_key)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key: str):
+        """Removes a response, e.g. one that could not be parsed.
+
+        Args:
+            key (str): the cache key
+        """
+        with self._lock:
+            self._remove(key)
+
+    def get_stats(self) -> dict:
+        """Returns the cache counters and the hit rate of each prompt key.
+
+        Returns:
+            dict: hit, miss, store, eviction and expiry counters, the number of
+                entries and per-prompt-key {"hits", "misses", "hit_rate"}
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._index)
+            stats["memory_entries"] = len(self._memory)
+            stats["prompts"] = {
+                prompt_key: dict(counts, hit_rate=round(counts["hits"] / (counts["hits"] + counts["misses"]), 3))
+                for prompt_key, counts in self._prompt_stats.items()
+            }
+        return stats
+
+    # -------------------------------------------------------------------
+    # Internal helpers
+    # -------------------------------------------------------------------
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, response: str):
+        """Keeps a response in memory, dropping the least recently used one if full."""
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _remove(self, key: str):
+        """Removes an entry from the index, memory and disk. Called with the lock held."""
+        self._index.pop(key, None)
+        self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _record(self, prompt_key: str, hit: bool):
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+            counts = self._prompt_stats.setdefault(prompt_key or "unknown", {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def _load_index(self):
+        """Rebuilds the LRU index from the files on disk, using the file mtime as last use."""
+        entries = []
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if filename.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                if not filename.endswith(".json"):
+                    continue
+                entries.append((os.stat(path).st_mtime, filename[:-len(".json")]))
+
+        # the creation time is read from the entry on its first use
+        for _, key in sorted(entries):
+            self._index[key] = None
+
+class CachedModel(ModelInterface):
+    """
+    Description:
+        Wraps any ModelInterface and answers repeated calls from the response
+        cache. The cache key is a hash of the wrapped model, the rendered
+        prompt and the call parameters, so a changed prompt, model or
+        personality is always a miss. Only calls made for one of the cached
+        prompt keys use the cache, every other call (e.g. a chat reply) and
+        calls inside response_cache_disabled() go to the wrapped model.
+
+    Attributes:
+        model (ModelInterface): the wrapped model
+        cache (ResponseCache): the response store
+        prompt_keys (set): the prompt keys whose calls are cached, every key if None
+        model_id (str): the wrapped model class and model name, part of every key
+    """
+
+    def __init__(self, model: ModelInterface, cache: ResponseCache = None, prompt_keys=LLM_CACHE_PROMPT_KEYS):
+        """Initialize the CachedModel class.
+
+        Args:
+            model (ModelInterface): the model to wrap
+            cache (ResponseCache, optional): the response store, the shared store if None
+            prompt_keys (list, optional): the prompt keys whose calls are cached, every key if None
+
+        Example:
+            >>> ai_model = CachedModel(OpenAIModel())
+        """
+        self.model = model
+        self.cache = cache or get_response_cache()
+        self.prompt_keys = set(prompt_keys) if prompt_keys is not None else None
+
+        # key on the provider model, not on wrappers such as LimitedModel
+        base_model = getattr(model, "wrapped_model", model)
+        self.model_id = f"{type(base_model).__name__}:{get_model_name(base_model)}"
+
+    def generate_response(self, prompt, **kwargs):
+        """Generate a response to a given prompt, from the cache if it was seen before.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to the wrapped model.
+
+        Returns:
+            str: The generated response.
+
+        Example:
+            >>> ai_model.generate_response("What is the weather in Tokyo?")
+        """
+        prompt_key = current_prompt_key.get()
+        if not self._is_cached(prompt_key):
+            return self.model.generate_response(prompt, **kwargs)
+        key = self.cache.make_key(self.model_id, prompt, kwargs)
+
+        response = self.cache.get(key, prompt_key)
+        if response is not None:
+            return response
+
+        response = self.model.generate_response(prompt, **kwargs)
+        self.cache.put(key, response, prompt_key)
+        return response
+
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response to a given prompt, yielding text chunks. A cached response is yielded in one chunk.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to the wrapped model.
+
+        Yields:
+            str: The next chunk of the generated response.
+        """
+        prompt_key = current_prompt_key.get()
+        if not self._is_cached(prompt_key):
+            yield from self.model.generate_response_stream(prompt, **kwargs)
+            return
+        key = self.cache.make_key(self.model_id, prompt, kwargs)
+
+        response = self.cache.get(key, prompt_key)
+        if response is not None:
+            yield response
+            return
+
+        chunks = []
+        for chunk in self.model.generate_response_stream(prompt, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+
+        # only complete streams are cached
+        self.cache.put(key, "".join(chunks), prompt_key)
+
+    def invalidate(self, prompt, **kwargs):
+        """Removes the cached response of a call, e.g. because it could not be parsed.
+
+        Args:
+            prompt (str or list[dict]): The prompt of the call.
+            **kwargs: Additional keyword arguments of the call.
+        """
+        self.cache.invalidate(self.cache.make_key(self.model_id, prompt, kwargs))
+
+    def _is_cached(self, prompt_key: str) -> bool:
+        """Returns whether a call made for a prompt key uses the cache."""
+        if _cache_disabled.get():
+            return False
+        return self.prompt_keys is None or prompt_key in self.prompt_keys
+
+def get_model_name(model) -> str:
+    """Returns the model name of a model wrapper.
+
+    Args:
+        model (ModelInterface): the model
+
+    Returns:
+        str: the model name, or None if it is unknown
+    """
+    model_name = getattr(model, "model_name", None)
+    if model_name is None:
+        # GeminiModel keeps the name on the GenerativeModel
+        model_name = getattr(getattr(model, "model", None), "model_name", None)
+    return model_name
+
+# -------------------------------------------------------------------
+# Process-wide response store
+# -------------------------------------------------------------------
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response store, configured from the LLM_CACHE_* environment variables.
+
+    Returns:
+        ResponseCache: the shared store
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                cache_dir=LLM_CACHE_DIR,
+                max_entries=LLM_CACHE_MAX_ENTRIES,
+                memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+                ttl_seconds=LLM_CACHE_TTL_SECONDS,
+            )
+        return _response_cache
+
+if __name__ == "__main__":
+    import tempfile
+    import timeit
+
+    class SlowModel(ModelInterface):
+        model_name = "slow-model"
+
+        def generate_response(self, prompt, **kwargs):
+            time.sleep(1)
+            return f'{{"echo": "{prompt}"}}'
+
+    ai_model = CachedModel(SlowModel(), ResponseCache(tempfile.mkdtemp()), prompt_keys=None)
+    print(f"miss: {timeit.timeit(lambda: ai_model.generate_response('Hello'), number=1) * 1e6:.0f} us")
+    print(f"hit:  {timeit.timeit(lambda: ai_model.generate_response('Hello'), number=1000) / 1000 * 1e6:.1f} us")
+    print(ai_model.cache.get_stats())
@@ -1,6 +1,6 @@
 import os
 import anthropic
-from .base_model import ModelInterface
+from .base_model import ModelInterface, error_response
 from dotenv import load_dotenv
 import sys
 import json
@@ -86,7 +86,7 @@ class ClaudeModel(ModelInterface):
 
             return response.content[0].text if isinstance(response.content, list) else response.content
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
 
 
 
@@ -154,7 +154,48 @@ class ClaudeModel(ModelInterface):
             return response.content[0].text if isinstance(response.content, list) else response.content
 
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
+
+    # -------------------------------------------------------------------
+    # Helper to stream a response to a given prompt
+    # -------------------------------------------------------------------
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response to a given prompt, yielding text chunks as the Anthropic API produces them.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, personality and communication_style.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Example:
+            >>> claude_model = ClaudeModel()
+            >>> for chunk in claude_model.generate_response_stream("What is the weather in Tokyo?"):
+            ...     print(chunk, end="")
+        """
+        if isinstance(prompt, str):
+            messages = [{
+                "role": "user",
+                "content": prompt
+            }]
+        else:
+            messages = prompt
+
+        stream_args = {
+            "model": self.model_name, # Set the model type we want to use
+            "messages": messages, # Set the prompt we want to use
+            "max_tokens": 1024
+        }
+
+        # the Anthropic API takes the persona as a system prompt
+        persona_prompt = f"{kwargs.get('personality', '')} {kwargs.get('communication_style', '')}".strip()
+        if persona_prompt:
+            stream_args["system"] = persona_prompt
+
+        with self.client.messages.stream(**stream_args) as stream:
+            for text in stream.text_stream:
+                yield text
 
 
 if __name__ == "__main__":
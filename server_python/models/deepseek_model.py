@@ -17,7 +17,7 @@
 
 import os
 from openai import OpenAI # Please install OpenAI SDK first: `pip3 install openai`
-from .base_model import ModelInterface
+from .base_model import ModelInterface, error_response
 from dotenv import load_dotenv
 import sys
 
@@ -96,7 +96,7 @@ class DeepSeekModel(ModelInterface):
 
             return response.choices[0].message.content.strip()
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
 
 
 
@@ -163,7 +163,54 @@ class DeepSeekModel(ModelInterface):
             return response.choices[0].message.content.strip()
 
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
+
+    # -------------------------------------------------------------------
+    # Helper to stream a response to a given prompt
+    # -------------------------------------------------------------------
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response to a given prompt, yielding text chunks as the DeepSeek API produces them.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, personality and communication_style.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Example:
+            >>> deepseek_model = DeepSeekModel()
+            >>> for chunk in deepseek_model.generate_response_stream("What is the weather in Tokyo?"):
+            ...     print(chunk, end="")
+        """
+        if isinstance(prompt, str):
+            messages = []
+
+            # add personality and style to the instructions
+            persona_prompt = f"{kwargs.get('personality', '')} {kwargs.get('communication_style', '')}".strip()
+            if persona_prompt:
+                messages.append({
+                    "role": "system",
+                    "content": persona_prompt
+                })
+
+            # User message
+            messages.append({
+                "role": "user",
+                "content": prompt
+            })
+        else:
+            messages = prompt
+
+        stream = self.client.chat.completions.create( # Create a streaming chat completion
+            model=self.model_name, # Set the model type we want to use
+            messages=messages, # Set the prompt we want to use
+            stream=True
+        )
+
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
 
 if __name__ == "__main__":
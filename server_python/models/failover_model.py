@@ -0,0 +1,374 @@
+#
+# Module: failover_model
+#
+# This module implements the FailoverModel class for routing calls across providers with circuit breakers.
+#
+# Title: Failover Model
+# Summary: Provider failover and circuit breaker implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import time
+import threading
+from collections import deque
+from dotenv import load_dotenv
+
+# custom ARAI code imports
+from .base_model import ModelInterface, is_error_response, error_response, last_model_error
+
+load_dotenv()
+
+# Providers tried in order by the default model, e.g. LLM_FAILOVER_PROVIDERS=openai,gemini,claude,deepseek
+LLM_FAILOVER_PROVIDERS = [p.strip() for p in os.getenv("LLM_FAILOVER_PROVIDERS", "").split(",") if p.strip()]
+
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+CIRCUIT_LATENCY_P95_MS = float(os.getenv("CIRCUIT_LATENCY_P95_MS", "90000"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+
+class CircuitState:
+    """This class is used to define the states of a circuit breaker.
+
+    Attributes:
+        CLOSED (str): calls go through
+        OPEN (str): calls are rejected until the open time has passed
+        HALF_OPEN (str): one probe call is let through to test the provider
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Description:
+        Tracks the outcome and latency of the last calls to a provider. When
+        the error rate or the p95 latency of the window passes its threshold
+        the circuit opens and calls are rejected, so requests go straight to
+        the next provider instead of waiting on a failing one. After the
+        open time a single probe is let through: a success closes the
+        circuit, a failure opens it again.
+
+    Attributes:
+        name (str): the provider the breaker protects
+        window (int): the number of recent calls considered
+        min_calls (int): the calls needed in the window before the circuit can open
+        error_rate (float): the error rate that opens the circuit
+        latency_p95_ms (float): the p95 latency that opens the circuit, 0 to ignore latency
+        open_seconds (float): how long the circuit stays open before a probe
+        state (str): the CircuitState
+    """
+
+    def __init__(self, name, window=20, min_calls=5, error_rate=0.5, latency_p95_ms=90000, open_seconds=30):
+        """Initialize the CircuitBreaker class.
+
+        Args:
+            name (str): the provider the breaker protects
+            window (int): the number of recent calls considered
+            min_calls (int): the calls needed in the window before the circuit can open
+            error_rate (float): the error rate that opens the circuit
+            latency_p95_ms (float): the p95 latency that opens the circuit, 0 to ignore latency
+            open_seconds (float): how long the circuit stays open before a probe
+
+        Example:
+            >>> breaker = CircuitBreaker("openai:gpt-4o", error_rate=0.5, open_seconds=30)
+        """
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.latency_p95_ms = latency_p95_ms
+        self.open_seconds = open_seconds
+        self.state = CircuitState.CLOSED
+        self.stats = {"calls": 0, "successes": 0, "failures": 0, "rejected": 0, "trips": 0, "probes": 0}
+        self._calls = deque(maxlen=window)  # (success, latency_ms)
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._last_trip_reason = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Returns whether a call may go to the provider.
+
+        Returns:
+            bool: True if the circuit is closed, or if this call is the half-open probe
+        """
+        with self._lock:
+            if self.state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = CircuitState.HALF_OPEN
+
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self.stats["probes"] += 1
+                return True
+
+            self.stats["rejected"] += 1
+            return False
+
+    def record(self, success: bool, latency_ms: float):
+        """Records the outcome of a call that was allowed.
+
+        Args:
+            success (bool): whether the provider returned a valid response
+            latency_ms (float): how long the call took
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["successes" if success else "failures"] += 1
+
+            if self.state == CircuitState.HALF_OPEN and self._probe_in_flight:
+                self._probe_in_flight = False
+                if success:
+                    print(f"[CircuitBreaker] - {self.name} recovered, closing the circuit")
+                    self.state = CircuitState.CLOSED
+                    self._calls.clear()
+                else:
+                    self._open("probe failed")
+                return
+
+            self._calls.append((success, latency_ms))
+            if self.state != CircuitState.CLOSED or len(self._calls) < self.min_calls:
+                return
+
+            error_rate = self._error_rate()
+            p95_ms = self._p95_ms()
+            if error_rate >= self.error_rate:
+                self._open(f"error rate {error_rate:.0%}")
+            elif self.latency_p95_ms and p95_ms >= self.latency_p95_ms:
+                self._open(f"p95 latency {p95_ms:.0f} ms")
+
+    def get_stats(self) -> dict:
+        """Returns the state and counters of the breaker.
+
+        Returns:
+            dict: state, counters, the error rate and p95 latency of the window and the last trip reason
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                **self.stats,
+                "window_calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                "p95_ms": round(self._p95_ms(), 1),
+                "last_trip_reason": self._last_trip_reason,
+            }
+
+    def _open(self, reason: str):
+        print(f"[CircuitBreaker] - Opening the circuit of {self.name} for {self.open_seconds}s: {reason}")
+        self.state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._last_trip_reason = reason
+        self.stats["trips"] += 1
+
+    def _error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for success, _ in self._calls if not success) / len(self._calls)
+
+    def _p95_ms(self) -> float:
+        if not self._calls:
+            return 0.0
+        latencies = sorted(latency_ms for _, latency_ms in self._calls)
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+# -------------------------------------------------------------------
+# Process-wide breakers, one per provider model
+# -------------------------------------------------------------------
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Returns the process-wide circuit breaker of a provider model, configured by the CIRCUIT_* environment variables.
+
+    Args:
+        name (str): the provider model, e.g. "openai:gpt-4o"
+
+    Returns:
+        CircuitBreaker: the shared breaker
+
+    Example:
+        >>> breaker = get_circuit_breaker("gemini:default")
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                name,
+                window=CIRCUIT_WINDOW,
+                min_calls=CIRCUIT_MIN_CALLS,
+                error_rate=CIRCUIT_ERROR_RATE,
+                latency_p95_ms=CIRCUIT_LATENCY_P95_MS,
+                open_seconds=CIRCUIT_OPEN_SECONDS
+            )
+        return breaker
+
+def get_provider_health() -> dict:
+    """Returns the state and counters of every circuit breaker.
+
+    Returns:
+        dict: provider model -> breaker stats
+    """
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.get_stats() for name, breaker in sorted(breakers.items())}
+
+class FailoverModel(ModelInterface):
+    """
+    Description:
+        Routes every call to an ordered list of provider models. A call goes
+        to the first provider whose circuit is closed (or due a probe); if it
+        returns an error the next provider is tried. Providers with an open
+        circuit are skipped without waiting on them.
+
+    Attributes:
+        models (list): (name, ModelInterface) pairs, in the order they are tried
+        breakers (dict): name -> CircuitBreaker
+    """
+
+    def __init__(self, models: list, breakers: dict = None):
+        """Initialize the FailoverModel class.
+
+        Args:
+            models (list): (name, ModelInterface) pairs, in the order they are tried
+            breakers (dict, optional): name -> CircuitBreaker, the shared breakers if None
+
+        Raises:
+            ValueError: If no model is given
+
+        Example:
+            >>> ai_model = FailoverModel([("openai:gpt-4o", OpenAIModel()), ("gemini:default", GeminiModel())])
+        """
+        if not models:
+            raise ValueError("FailoverModel needs at least one model")
+        self.models = list(models)
+        self.breakers = breakers or {name: get_circuit_breaker(name) for name, _ in self.models}
+
+    def generate_response(self, prompt, **kwargs):
+        """Generate a response from the first healthy provider.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to the provider model.
+
+        Returns:
+            str: The generated response, or the error response of the last provider tried.
+        """
+        response = None
+        error = None
+        for name, model in self.models:
+            breaker = self.breakers[name]
+            if not breaker.allow():
+                continue
+
+            started = time.perf_counter()
+            try:
+                last_model_error.set(None)
+                response = model.generate_response(prompt, **kwargs)
+                error = last_model_error.get()
+            except Exception as e:
+                response, error = error_response(e), e
+            success = not is_error_response(response)
+            breaker.record(success, (time.perf_counter() - started) * 1000)
+
+            if success:
+                return response
+            print(f"[FailoverModel] - {name} failed, trying the next provider: {response}")
+
+        if response is None:
+            return error_response(Exception("No provider available, every circuit is open"))
+
+        # keep the last provider error for the retry policy
+        last_model_error.set(error)
+        return response
+
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response from the first healthy provider, yielding text chunks.
+
+        Providers are switched only until the first chunk arrives, a stream
+        that fails after that raises.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to the provider model.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Raises:
+            Exception: If every provider fails, or the stream fails after its first chunk
+        """
+        last_error = Exception("No provider available, every circuit is open")
+        for name, model in self.models:
+            breaker = self.breakers[name]
+            if not breaker.allow():
+                continue
+
+            started = time.perf_counter()
+            stream = model.generate_response_stream(prompt, **kwargs)
+            try:
+                first_chunk = next(stream, "")
+            except Exception as e:
+                breaker.record(False, (time.perf_counter() - started) * 1000)
+                print(f"[FailoverModel] - {name} stream failed, trying the next provider: {str(e)}")
+                last_error = e
+                continue
+
+            # the breaker sees the time to first chunk as the latency of a stream
+            breaker.record(True, (time.perf_counter() - started) * 1000)
+            if first_chunk:
+                yield first_chunk
+            yield from stream
+            return
+
+        raise last_error
+
+    def invalidate(self, prompt, **kwargs):
+        """Removes the cached response of a call from every provider that caches responses.
+
+        Args:
+            prompt (str or list[dict]): The prompt of the call.
+            **kwargs: Additional keyword arguments of the call.
+        """
+        for _, model in self.models:
+            if hasattr(model, "invalidate"):
+                model.invalidate(prompt, **kwargs)
+
+    def get_health(self) -> dict:
+        """Returns the breaker state and counters of each provider of this model.
+
+        Returns:
+            dict: provider model -> breaker stats, in the order they are tried
+        """
+        return {name: self.breakers[name].get_stats() for name, _ in self.models}
+
+if __name__ == "__main__":
+    class DownModel(ModelInterface):
+        def generate_response(self, prompt, **kwargs):
+            return error_response(Exception("503 Service Unavailable"))
+
+    class UpModel(ModelInterface):
+        def generate_response(self, prompt, **kwargs):
+            return f"answer to {prompt}"
+
+    breakers = {
+        "down": CircuitBreaker("down", min_calls=3, open_seconds=0.2),
+        "up": CircuitBreaker("up", min_calls=3),
+    }
+    ai_model = FailoverModel([("down", DownModel()), ("up", UpModel())], breakers)
+    for i in range(6):
+        print(ai_model.generate_response(f"prompt {i}"))
+    time.sleep(0.25)
+    print(ai_model.generate_response("after the open time"))
+    for name, stats in ai_model.get_health().items():
+        print(name, stats)
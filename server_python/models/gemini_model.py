@@ -16,7 +16,7 @@
 #     - https://x.com/TheBlockRhino
 import os
 import google.generativeai as genai
-from .base_model import ModelInterface
+from .base_model import ModelInterface, error_response
 from dotenv import load_dotenv
 import yaml
 import sys
@@ -90,7 +90,7 @@ class GeminiModel(ModelInterface):
             response = self.model.generate_content(prompt)
             return response.text.strip()
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
 
     # -------------------------------------------------------------------
     # Helper to generate a response to a given prompt using a string
@@ -147,7 +147,53 @@ class GeminiModel(ModelInterface):
             return response.text.strip()
 
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
+
+    # -------------------------------------------------------------------
+    # Helper to stream a response to a given prompt
+    # -------------------------------------------------------------------
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response to a given prompt, yielding text chunks as the Gemini API produces them.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, personality and communication_style.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Example:
+            >>> gemini_model = GeminiModel()
+            >>> for chunk in gemini_model.generate_response_stream("What is the weather in Tokyo?"):
+            ...     print(chunk, end="")
+        """
+        if isinstance(prompt, str):
+            messages = []
+
+            # add personality and style to the instructions
+            persona_prompt = f"{kwargs.get('personality', '')} {kwargs.get('communication_style', '')}".strip()
+            if persona_prompt:
+                messages.append({
+                    "role": "user",
+                    "parts": [persona_prompt]
+                })
+
+            # user message
+            messages.append({
+                "role": "user",
+                "parts": [prompt]
+            })
+        else:
+            messages = prompt
+
+        for chunk in self.model.generate_content(messages, stream=True):
+            # chunk.text raises on chunks without parts, e.g. the final one with only the finish reason
+            if not chunk.candidates or not chunk.candidates[0].content.parts:
+                continue
+            text = "".join(part.text for part in chunk.candidates[0].content.parts if getattr(part, "text", ""))
+            if text:
+                yield text
+
 
 if __name__ == "__main__":
     gemini_model = GeminiModel()
@@ -0,0 +1,427 @@
+#
+# Module: hedged_model
+#
+# This module implements the HedgedModel class for cutting the tail latency of interactive calls.
+#
+# Title: Hedged Model
+# Summary: Hedged LLM request implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import time
+import queue
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# custom ARAI code imports
+from .base_model import ModelInterface, ERROR_RESPONSE_PREFIX, error_response, is_error_response, last_model_error
+
+load_dotenv()
+
+# Hedging is off unless a hedge provider is set, e.g. LLM_HEDGE_PROVIDER=gemini
+LLM_HEDGE_PROVIDER = os.getenv("LLM_HEDGE_PROVIDER", "")
+LLM_HEDGE_MODEL_NAME = os.getenv("LLM_HEDGE_MODEL_NAME", "") or None
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "250"))
+LLM_HEDGE_MAX_DELAY_MS = float(os.getenv("LLM_HEDGE_MAX_DELAY_MS", "15000"))
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "64"))
+
+# The calls of every hedged model run on this pool, so the caller can wait with a deadline
+_hedge_executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="hedge")
+
+# Cancelled calls that still hold a pool thread, e.g. a primary stalled before its first chunk.
+# They are only stopped when the provider call returns, so a growing count means the pool is filling up
+_abandoned_running = 0
+_abandoned_lock = threading.Lock()
+
+_DONE = object()
+
+class LatencyTracker:
+    """
+    Description:
+        Keeps the latencies of the last successful calls and returns a
+        percentile of them, used as the deadline before a call is hedged.
+
+    Attributes:
+        percentile (float): the percentile of the deadline, e.g. 0.95
+        min_samples (int): the samples needed before the percentile is used
+        default_ms (float): the deadline until there are enough samples
+        min_ms (float): the shortest deadline
+        max_ms (float): the longest deadline
+    """
+
+    def __init__(self, percentile=0.95, window=200, min_samples=20, default_ms=5000, min_ms=250, max_ms=15000):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_ms = default_ms
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float):
+        """Records the latency of a successful call."""
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def deadline_ms(self) -> float:
+        """Returns the time to wait for the primary before sending the hedge."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                deadline = self.default_ms
+            else:
+                samples = sorted(self._samples)
+                deadline = samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+        return min(self.max_ms, max(self.min_ms, deadline))
+
+class _Attempt:
+    """One streamed call of a race, read chunk by chunk into a queue so it can be cancelled between chunks."""
+
+    def __init__(self, name, model, prompt, kwargs, condition):
+        self.name = name
+        self.model = model
+        self.prompt = prompt
+        self.kwargs = kwargs
+        self.chunks = queue.Queue()
+        self.text = []
+        self.error = None
+        self.started = time.perf_counter()
+        self.first_chunk_ms = None
+        self.done_ms = None
+        self.cancelled = threading.Event()
+        self.on_finish = []
+        self._condition = condition
+
+    def run(self):
+        try:
+            stream = self.model.generate_response_stream(self.prompt, **self.kwargs)
+            try:
+                for chunk in stream:
+                    if self.cancelled.is_set():
+                        break
+                    if not chunk:
+                        continue
+                    if self.first_chunk_ms is None:
+                        if chunk.startswith(ERROR_RESPONSE_PREFIX):
+                            raise Exception(chunk[len(ERROR_RESPONSE_PREFIX):])
+                        self._notify(first_chunk=True)
+                    self.text.append(chunk)
+                    self.chunks.put(chunk)
+            finally:
+                # closing the stream closes the provider connection of a cancelled call
+                if hasattr(stream, "close"):
+                    stream.close()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.chunks.put(_DONE)
+            self._notify(done=True)
+            with self._condition:
+                on_finish = list(self.on_finish)
+            for callback in on_finish:
+                callback(self)
+
+    @property
+    def failed(self) -> bool:
+        return self.done_ms is not None and (self.error is not None or is_error_response("".join(self.text)))
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def when_finished(self, callback):
+        """Calls callback(attempt) once the call has stopped, right away if it already has."""
+        with self._condition:
+            if self.done_ms is None:
+                self.on_finish.append(callback)
+                return
+        callback(self)
+
+    def _notify(self, first_chunk=False, done=False):
+        with self._condition:
+            if first_chunk:
+                self.first_chunk_ms = (time.perf_counter() - self.started) * 1000
+            if done:
+                self.done_ms = (time.perf_counter() - self.started) * 1000
+            self._condition.notify_all()
+
+class HedgedModel(ModelInterface):
+    """
+    Description:
+        Sends a call to the primary model and, if it has not answered by a
+        percentile deadline of its recent latencies, sends the same call to
+        a hedge model. The first valid response wins and the other call is
+        cancelled by closing its stream. Full responses race on completion,
+        streams race on their first chunk.
+
+        generate_response also calls generate_response_stream of both
+        models and joins the chunks, so the losing call can be closed
+        mid-stream. A model without a native stream answers in one chunk and
+        a call stalled before its first chunk can not be stopped: it keeps
+        its pool thread until the provider returns, counted in the
+        abandoned_running stat.
+
+        Only the slow calls are duplicated, so at the p95 deadline about one
+        call in twenty costs twice.
+
+    Attributes:
+        primary (ModelInterface): the model every call goes to first
+        hedge (ModelInterface): the model of the duplicate call
+        name (str): the primary and hedge names, used in the logs and stats
+        trackers (dict): "response" and "stream" latency trackers of the primary
+        stats (dict): calls, hedged calls, wins and the latency saved
+    """
+
+    def __init__(self, primary, hedge, name="hedged", percentile=0.95, min_delay_ms=250, max_delay_ms=15000):
+        """Initialize the HedgedModel class.
+
+        Args:
+            primary (ModelInterface): the model every call goes to first
+            hedge (ModelInterface): the model of the duplicate call
+            name (str): the primary and hedge names, used in the logs and stats
+            percentile (float): the percentile of the primary latency used as the hedge deadline
+            min_delay_ms (float): the shortest hedge deadline
+            max_delay_ms (float): the longest hedge deadline, also used until enough latencies are recorded
+
+        Example:
+            >>> ai_model = HedgedModel(OpenAIModel(), GeminiModel(), "openai>gemini")
+        """
+        self.primary = primary
+        self.hedge = hedge
+        self.name = name
+        self.trackers = {
+            mode: LatencyTracker(percentile=percentile, default_ms=max_delay_ms, min_ms=min_delay_ms, max_ms=max_delay_ms)
+            for mode in ("response", "stream")
+        }
+        self.stats = {
+            "calls": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0,
+            "both_failed": 0, "latency_saved_ms": 0.0,
+        }
+        self._abandoned_running = 0
+        self._lock = threading.Lock()
+        _register(self)
+
+    def generate_response(self, prompt, **kwargs):
+        """Generate a response, hedged if the primary is slower than its deadline.
+
+        Both models are called through generate_response_stream, even when
+        no hedge is sent, so the losing call can be cancelled between chunks.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to both models.
+
+        Returns:
+            str: The first valid response, or the error response of the primary.
+        """
+        winner, attempts = self._race(prompt, kwargs, "response")
+        if winner is None:
+            primary = attempts[0]
+            last_model_error.set(primary.error)
+            return error_response(primary.error) if primary.error else "".join(primary.text)
+        return "".join(winner.text).strip()
+
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response, yielding the chunks of whichever model sends its first chunk first.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to both models.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Raises:
+            Exception: The error of the primary, if both models fail before their first chunk
+        """
+        winner, attempts = self._race(prompt, kwargs, "stream")
+        if winner is None:
+            raise attempts[0].error or Exception("Hedged stream failed")
+
+        while True:
+            chunk = winner.chunks.get()
+            if chunk is _DONE:
+                break
+            yield chunk
+        if winner.error:
+            raise winner.error
+
+    def invalidate(self, prompt, **kwargs):
+        """Removes the cached response of a call from both models if they cache responses."""
+        for model in (self.primary, self.hedge):
+            if hasattr(model, "invalidate"):
+                model.invalidate(prompt, **kwargs)
+
+    def get_stats(self) -> dict:
+        """Returns the hedging counters.
+
+        Returns:
+            dict: calls, hedged calls, hedge rate, wins, the latency saved by hedge wins, the current deadlines,
+                the cancelled calls of this model still running, and those of every hedged model against the pool size
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["abandoned_running"] = self._abandoned_running
+        with _abandoned_lock:
+            stats["pool"] = {"workers": LLM_HEDGE_WORKERS, "abandoned_running": _abandoned_running}
+        stats["hedge_rate"] = round(stats["hedged"] / stats["calls"], 3) if stats["calls"] else 0.0
+        stats["latency_saved_ms"] = round(stats["latency_saved_ms"], 1)
+        stats["deadline_ms"] = {mode: round(tracker.deadline_ms(), 1) for mode, tracker in self.trackers.items()}
+        return stats
+
+    # -------------------------------------------------------------------
+    # Helpers to race the calls
+    # -------------------------------------------------------------------
+    def _race(self, prompt, kwargs, mode):
+        """Runs the primary, hedges it after the deadline and returns (winner or None, attempts)."""
+        tracker = self.trackers[mode]
+        deadline = time.perf_counter() + tracker.deadline_ms() / 1000
+        condition = threading.Condition()
+
+        def ready(attempt):
+            # a full response is ready when it completes, a stream at its first chunk
+            if mode == "stream":
+                return attempt.first_chunk_ms is not None
+            return attempt.done_ms is not None and not attempt.failed
+
+        attempts = [self._start("primary", self.primary, prompt, kwargs, condition)]
+        with condition:
+            while True:
+                winner = next((attempt for attempt in attempts if ready(attempt)), None)
+                if winner is not None:
+                    break
+                if len(attempts) == 2 and all(attempt.failed for attempt in attempts):
+                    break
+
+                # hedge when the primary is past its deadline or has already failed
+                if len(attempts) == 1 and (time.perf_counter() >= deadline or attempts[0].failed):
+                    hedge_after_ms = (time.perf_counter() - attempts[0].started) * 1000
+                    print(f"[HedgedModel] - {self.name}: primary has not answered after {hedge_after_ms:.0f} ms, hedging")
+                    attempts.append(self._start("hedge", self.hedge, prompt, kwargs, condition))
+                    continue
+
+                timeout = None if len(attempts) == 2 else max(0.0, deadline - time.perf_counter())
+                condition.wait(timeout)
+
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.cancel()
+                if attempt.done_ms is None:
+                    self._abandon(attempt)
+
+        self._record(mode, winner, attempts)
+        return winner, attempts
+
+    def _abandon(self, attempt):
+        """Counts a cancelled call until its pool thread is free again."""
+        global _abandoned_running
+        with self._lock:
+            self._abandoned_running += 1
+        with _abandoned_lock:
+            _abandoned_running += 1
+            running = _abandoned_running
+        if running >= LLM_HEDGE_WORKERS // 2:
+            print(f"[HedgedModel] - {self.name}: {running} of {LLM_HEDGE_WORKERS} hedge workers are held by cancelled calls")
+        attempt.when_finished(self._release)
+
+    def _release(self, attempt):
+        global _abandoned_running
+        with self._lock:
+            self._abandoned_running -= 1
+        with _abandoned_lock:
+            _abandoned_running -= 1
+
+    def _start(self, name, model, prompt, kwargs, condition):
+        attempt = _Attempt(name, model, prompt, kwargs, condition)
+        # the model wrappers read the prompt key from the caller's context
+        context = contextvars.copy_context()
+        _hedge_executor.submit(context.run, attempt.run)
+        return attempt
+
+    def _record(self, mode, winner, attempts):
+        primary = attempts[0]
+        with self._lock:
+            self.stats["calls"] += 1
+            if len(attempts) > 1:
+                self.stats["hedged"] += 1
+            if winner is None:
+                self.stats["both_failed"] += 1
+            elif winner is primary:
+                self.stats["primary_wins"] += 1
+            else:
+                self.stats["hedge_wins"] += 1
+
+        if winner is primary:
+            self.trackers[mode].record(self._milestone_ms(mode, primary))
+        elif winner is not None:
+            # the primary is cancelled at its next chunk. The time it stops is
+            # its latency for a stream race, and a lower bound for a full response
+            won_ms = self._milestone_ms(mode, winner) + (winner.started - primary.started) * 1000
+            primary.when_finished(lambda loser: self._record_loser(mode, loser, won_ms))
+
+    def _record_loser(self, mode, primary, won_ms):
+        if primary.error is not None:
+            return
+        primary_ms = self._milestone_ms(mode, primary)
+        # keep the slow calls in the latency window, or the deadline would only see the fast ones
+        self.trackers[mode].record(primary_ms)
+        with self._lock:
+            self.stats["latency_saved_ms"] += max(0.0, primary_ms - won_ms)
+
+    def _milestone_ms(self, mode, attempt):
+        if mode == "stream" and attempt.first_chunk_ms is not None:
+            return attempt.first_chunk_ms
+        return attempt.done_ms
+
+# -------------------------------------------------------------------
+# Hedged models of the process, for the health endpoint
+# -------------------------------------------------------------------
+_hedged_models = []
+_hedged_models_lock = threading.Lock()
+
+def _register(model: HedgedModel):
+    with _hedged_models_lock:
+        _hedged_models.append(model)
+
+def get_hedging_stats() -> dict:
+    """Returns the hedging counters of every hedged model.
+
+    Returns:
+        dict: hedged model name -> counters
+    """
+    with _hedged_models_lock:
+        models = list(_hedged_models)
+    return {model.name: model.get_stats() for model in models}
+
+if __name__ == "__main__":
+    import random
+
+    class JitteryModel(ModelInterface):
+        def __init__(self, name, slow_rate):
+            self.name = name
+            self.slow_rate = slow_rate
+
+        def generate_response(self, prompt, **kwargs):
+            time.sleep(1.0 if random.random() < self.slow_rate else 0.05)
+            return f"{self.name}: {prompt}"
+
+    ai_model = HedgedModel(JitteryModel("primary", 0.1), JitteryModel("hedge", 0.0), "demo", min_delay_ms=50, max_delay_ms=200)
+    latencies = []
+    for i in range(60):
+        started = time.perf_counter()
+        ai_model.generate_response(f"prompt {i}")
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(f"p50 {latencies[30]:.0f} ms, p95 {latencies[57]:.0f} ms, max {latencies[-1]:.0f} ms")
+    print(ai_model.get_stats())
@@ -0,0 +1,245 @@
+#
+# Module: limited_model
+#
+# This module implements the LimitedModel class for capping concurrent calls per provider.
+#
+# Title: Limited Model
+# Summary: Per-provider concurrency limit implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import time
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# custom ARAI code imports
+from .base_model import ModelInterface
+
+load_dotenv()
+
+def parse_concurrency_limits(text: str) -> dict:
+    """Parses provider concurrency limits, e.g. "openai=8,gemini=4".
+
+    Args:
+        text (str): comma separated provider=limit pairs
+
+    Returns:
+        dict: provider -> limit
+
+    Raises:
+        ValueError: If a pair is not provider=limit
+
+    Example:
+        >>> parse_concurrency_limits("openai=8, gemini=4")
+        {'openai': 8, 'gemini': 4}
+    """
+    limits = {}
+    for pair in (text or "").split(","):
+        if not pair.strip():
+            continue
+        provider, _, limit = pair.partition("=")
+        if not limit.strip():
+            raise ValueError(f"Invalid concurrency limit {pair.strip()!r}, expected provider=limit")
+        limits[provider.strip().lower()] = int(limit)
+    return limits
+
+# Maximum in-flight calls per provider, e.g. LLM_CONCURRENCY_LIMITS=openai=8,gemini=4
+LLM_CONCURRENCY_LIMITS = parse_concurrency_limits(os.getenv("LLM_CONCURRENCY_LIMITS", ""))
+
+class ProviderLimiter:
+    """
+    Description:
+        Caps the number of model calls in flight per provider, across every
+        thread of the process. Calls over the cap wait for a free slot, so a
+        batch of agents stays under the provider's rate limits instead of
+        failing with 429s. A provider without a limit is not capped. Limits
+        can be changed while calls are running.
+
+    Attributes:
+        limits (dict): provider -> maximum calls in flight
+    """
+
+    def __init__(self, limits: dict = None):
+        """Initialize the ProviderLimiter class.
+
+        Args:
+            limits (dict, optional): provider -> maximum calls in flight
+
+        Example:
+            >>> limiter = ProviderLimiter({"openai": 8})
+        """
+        self.limits = dict(limits or {})
+        self._in_flight = {}
+        self._stats = {}
+        self._condition = threading.Condition()
+
+    def set_limit(self, provider: str, limit: int):
+        """Sets the maximum calls in flight of a provider, None or 0 for no limit.
+
+        Args:
+            provider (str): the provider name
+            limit (int): the maximum calls in flight
+
+        Example:
+            >>> limiter.set_limit("gemini", 4)
+        """
+        with self._condition:
+            if limit:
+                self.limits[provider] = int(limit)
+            else:
+                self.limits.pop(provider, None)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, provider: str):
+        """Holds one of the provider's slots for the calls made inside the block.
+
+        Args:
+            provider (str): the provider name
+
+        Example:
+            >>> with limiter.slot("openai"):
+            ...     response = model.generate_response(prompt)
+        """
+        started = time.perf_counter()
+        with self._condition:
+            waited = False
+            while self.limits.get(provider) and self._in_flight.get(provider, 0) >= self.limits[provider]:
+                waited = True
+                self._condition.wait()
+
+            in_flight = self._in_flight[provider] = self._in_flight.get(provider, 0) + 1
+            stats = self._stats.setdefault(provider, {"calls": 0, "waits": 0, "wait_ms": 0.0, "peak_in_flight": 0})
+            stats["calls"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], in_flight)
+            if waited:
+                stats["waits"] += 1
+                stats["wait_ms"] += (time.perf_counter() - started) * 1000
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight[provider] -= 1
+                self._condition.notify()
+
+    def get_stats(self) -> dict:
+        """Returns the limit, calls in flight and wait counters of each provider.
+
+        Returns:
+            dict: provider -> limit, in_flight, calls, waits, wait_ms and peak_in_flight
+        """
+        with self._condition:
+            return {
+                provider: {
+                    "limit": self.limits.get(provider),
+                    "in_flight": self._in_flight.get(provider, 0),
+                    **{name: round(value, 1) if isinstance(value, float) else value for name, value in stats.items()},
+                }
+                for provider, stats in self._stats.items()
+            }
+
+class LimitedModel(ModelInterface):
+    """
+    Description:
+        Wraps any ModelInterface and takes a slot of its provider from the
+        process-wide ProviderLimiter for every call. A stream holds its slot
+        until it is fully read.
+
+    Attributes:
+        wrapped_model (ModelInterface): the wrapped model
+        provider (str): the provider the slots are taken from
+        limiter (ProviderLimiter): the limiter
+    """
+
+    def __init__(self, model: ModelInterface, provider: str, limiter: ProviderLimiter = None):
+        """Initialize the LimitedModel class.
+
+        Args:
+            model (ModelInterface): the model to wrap
+            provider (str): the provider the slots are taken from
+            limiter (ProviderLimiter, optional): the limiter, the shared limiter if None
+
+        Example:
+            >>> ai_model = LimitedModel(OpenAIModel(), "openai")
+        """
+        self.wrapped_model = model
+        self.provider = provider
+        self.limiter = limiter or get_provider_limiter()
+
+    def generate_response(self, prompt, **kwargs):
+        """Generate a response to a given prompt once a provider slot is free.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to the wrapped model.
+
+        Returns:
+            str: The generated response.
+        """
+        with self.limiter.slot(self.provider):
+            return self.wrapped_model.generate_response(prompt, **kwargs)
+
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response to a given prompt, yielding text chunks, once a provider slot is free.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, passed to the wrapped model.
+
+        Yields:
+            str: The next chunk of the generated response.
+        """
+        with self.limiter.slot(self.provider):
+            yield from self.wrapped_model.generate_response_stream(prompt, **kwargs)
+
+    def __getattr__(self, name):
+        # model_name and other attributes of the wrapped model
+        return getattr(self.wrapped_model, name)
+
+# -------------------------------------------------------------------
+# Process-wide limiter
+# -------------------------------------------------------------------
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_provider_limiter() -> ProviderLimiter:
+    """Returns the process-wide provider limiter, configured by LLM_CONCURRENCY_LIMITS.
+
+    Returns:
+        ProviderLimiter: the shared limiter
+
+    Example:
+        >>> get_provider_limiter().set_limit("openai", 8)
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ProviderLimiter(LLM_CONCURRENCY_LIMITS)
+        return _limiter
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    class SlowModel(ModelInterface):
+        def generate_response(self, prompt, **kwargs):
+            time.sleep(0.1)
+            return prompt
+
+    limiter = ProviderLimiter({"demo": 2})
+    ai_model = LimitedModel(SlowModel(), "demo", limiter)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(ai_model.generate_response, [str(i) for i in range(8)]))
+    print(f"8 calls with a limit of 2 took {time.perf_counter() - started:.2f}s")
+    print(limiter.get_stats())
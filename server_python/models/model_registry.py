@@ -0,0 +1,327 @@
+#
+# Module: model_registry
+#
+# This module implements the ModelRegistry class for sharing AI model clients between requests.
+#
+# Title: Model Registry
+# Summary: Shared model client registry implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import importlib
+import threading
+from dotenv import load_dotenv
+
+# custom ARAI code imports
+from models.cached_model import CachedModel, LLM_CACHE_ENABLED
+from models.limited_model import LimitedModel, get_provider_limiter
+from models.failover_model import FailoverModel, LLM_FAILOVER_PROVIDERS
+from models.hedged_model import (
+    HedgedModel, LLM_HEDGE_PROVIDER, LLM_HEDGE_MODEL_NAME, LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_DELAY_MS, LLM_HEDGE_MAX_DELAY_MS
+)
+
+load_dotenv()
+
+# provider name -> (module, class). The modules are imported on first use so
+# a missing provider SDK only matters if an agent actually asks for it.
+MODEL_PROVIDERS = {
+    "openai": ("models.openai_model", "OpenAIModel"),
+    "gemini": ("models.gemini_model", "GeminiModel"),
+    "claude": ("models.claude_model", "ClaudeModel"),
+    "deepseek": ("models.deepseek_model", "DeepSeekModel"),
+}
+
+# other names agents use for the same providers
+PROVIDER_ALIASES = {
+    "gpt": "openai",
+    "google": "gemini",
+    "anthropic": "claude",
+}
+
+# provider used when an agent does not set ai_model.model_type
+DEFAULT_MODEL_PROVIDER = os.getenv("DEFAULT_MODEL_PROVIDER", "gemini")
+
+def normalize_provider(model_type: str) -> str:
+    """Returns the registry name of a provider.
+
+    Args:
+        model_type (str): the provider name, e.g. "openai" or "Anthropic"
+
+    Returns:
+        str: the provider name used by the registry
+
+    Example:
+        >>> normalize_provider("Anthropic")
+        'claude'
+    """
+    provider = (model_type or "").strip().lower()
+    return PROVIDER_ALIASES.get(provider, provider)
+
+class ModelRegistry:
+    """
+    Description:
+        Keeps one warm model instance per (provider, model name). The provider
+        SDK clients hold their own HTTP connection pools and are safe to share
+        between threads, so reusing an instance keeps connections open and
+        avoids re-configuring the SDK on every request.
+
+    Attributes:
+        models (dict): the model instances, keyed by (provider, model name)
+        stats (dict): counters for created models, hits and errors
+    """
+
+    def __init__(self):
+        """Initialize the ModelRegistry class.
+
+        Example:
+            >>> registry = ModelRegistry()
+        """
+        self.models = {}
+        self.failover_models = {}
+        self.hedged_models = {}
+        self.stats = {"created": 0, "hits": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    # -------------------------------------------------------------------
+    # Helpers to get models
+    # -------------------------------------------------------------------
+    def get(self, provider: str, model_name: str = None):
+        """Returns the shared model for a provider and model name, creating it on first use.
+
+        Args:
+            provider (str): the provider name, see MODEL_PROVIDERS
+            model_name (str, optional): the model name, the provider default if empty
+
+        Returns:
+            ModelInterface: the shared model instance
+
+        Raises:
+            ValueError: If the provider is unknown
+            Exception: If the model can not be created
+
+        Example:
+            >>> ai_model = get_model_registry().get("openai", "gpt-4o")
+        """
+        provider = normalize_provider(provider)
+        if provider not in MODEL_PROVIDERS:
+            raise ValueError(f"Invalid model provider: {provider}")
+
+        key = (provider, model_name or None)
+        with self._lock:
+            model = self.models.get(key)
+            if model is not None:
+                self.stats["hits"] += 1
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # build the model outside the registry lock, so a slow client setup
+        # only blocks requests for the same model
+        with key_lock:
+            with self._lock:
+                model = self.models.get(key)
+                if model is not None:
+                    self.stats["hits"] += 1
+                    return model
+
+            module_name, class_name = MODEL_PROVIDERS[provider]
+            try:
+                model_class = getattr(importlib.import_module(module_name), class_name)
+                model = model_class(model_name=model_name) if model_name else model_class()
+
+                # cap the calls in flight per provider, see LLM_CONCURRENCY_LIMITS
+                model = LimitedModel(model, provider)
+
+                # answer repeated prompts from the response cache when it is enabled
+                if LLM_CACHE_ENABLED:
+                    model = CachedModel(model)
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise
+
+            print(f"[ModelRegistry] - Created {class_name} for {model_name or 'default model'}")
+            with self._lock:
+                self.models[key] = model
+                self.stats["created"] += 1
+            return model
+
+    def get_failover(self, providers: list):
+        """Returns a shared FailoverModel that tries the providers in order.
+
+        Providers whose model can not be created (e.g. no API key) are left out.
+
+        Args:
+            providers (list): provider names, or (provider, model name) pairs, in the order they are tried
+
+        Returns:
+            FailoverModel: the shared failover model
+
+        Raises:
+            ValueError: If none of the providers can be created
+
+        Example:
+            >>> ai_model = get_model_registry().get_failover(["openai", "gemini", "claude"])
+        """
+        chain = tuple(
+            (normalize_provider(provider), None) if isinstance(provider, str) else (normalize_provider(provider[0]), provider[1] or None)
+            for provider in providers
+        )
+        chain = tuple(dict.fromkeys(chain))
+
+        with self._lock:
+            model = self.failover_models.get(chain)
+        if model is not None:
+            return model
+
+        models = []
+        for provider, model_name in chain:
+            try:
+                models.append((f"{provider}:{model_name or 'default'}", self.get(provider, model_name)))
+            except Exception as e:
+                print(f"[ModelRegistry] - Leaving {provider} out of the failover chain: {str(e)}")
+        if not models:
+            raise ValueError(f"None of the failover providers could be created: {[p for p, _ in chain]}")
+
+        with self._lock:
+            model = self.failover_models.setdefault(chain, FailoverModel(models))
+        return model
+
+    def get_hedged(self, primary, hedge_provider: str = None, hedge_model_name: str = None):
+        """Returns a shared HedgedModel that hedges slow calls of a model with a second model.
+
+        Args:
+            primary (ModelInterface): a model returned by this registry
+            hedge_provider (str, optional): the provider of the hedge calls, LLM_HEDGE_PROVIDER if None
+            hedge_model_name (str, optional): the model name of the hedge calls, LLM_HEDGE_MODEL_NAME if None
+
+        Returns:
+            HedgedModel: the shared hedged model
+
+        Example:
+            >>> ai_model = registry.get_hedged(registry.get("openai"), "gemini")
+        """
+        hedge_provider = normalize_provider(hedge_provider or LLM_HEDGE_PROVIDER)
+        hedge_model_name = hedge_model_name or LLM_HEDGE_MODEL_NAME
+        key = (id(primary), hedge_provider, hedge_model_name)
+
+        with self._lock:
+            model = self.hedged_models.get(key)
+        if model is not None:
+            return model
+
+        hedge = self.get(hedge_provider, hedge_model_name)
+        name = f"{self.get_model_label(primary)}>{hedge_provider}:{hedge_model_name or 'default'}"
+        with self._lock:
+            model = self.hedged_models.setdefault(key, HedgedModel(
+                primary, hedge, name,
+                percentile=LLM_HEDGE_PERCENTILE,
+                min_delay_ms=LLM_HEDGE_MIN_DELAY_MS,
+                max_delay_ms=LLM_HEDGE_MAX_DELAY_MS
+            ))
+        return model
+
+    def get_model_label(self, model) -> str:
+        """Returns the registry name of a model, e.g. "openai:gpt-4o".
+
+        Args:
+            model (ModelInterface): a model returned by this registry
+
+        Returns:
+            str: "provider:model name", "failover(provider,...)" or the class name of an unknown model
+        """
+        with self._lock:
+            for (provider, model_name), registered in self.models.items():
+                if registered is model:
+                    return f"{provider}:{model_name or 'default'}"
+            for chain, registered in self.failover_models.items():
+                if registered is model:
+                    return f"failover({','.join(provider for provider, _ in chain)})"
+        return type(model).__name__
+
+    def get_for_agent(self, agent_master_data: dict, default_provider: str = None):
+        """Returns the shared model selected by an agent's ai_model settings.
+
+        Falls back to the default provider if the agent does not set a
+        model_type, or if the agent's model can not be created. When
+        LLM_FAILOVER_PROVIDERS is set the agent's model is tried first and
+        the failover providers after it.
+
+        Args:
+            agent_master_data (dict): the agent master data
+            default_provider (str, optional): the provider to fall back to, DEFAULT_MODEL_PROVIDER if None
+
+        Returns:
+            ModelInterface: the shared model instance
+
+        Example:
+            >>> agent = get_agent_catalog().get("configs/Zorp/Zorp_master.json")
+            >>> ai_model = get_model_registry().get_for_agent(agent)
+        """
+        default_provider = default_provider or DEFAULT_MODEL_PROVIDER
+        settings = ((agent_master_data or {}).get("agent") or {}).get("ai_model") or {}
+        provider = settings.get("model_type")
+        model_name = settings.get("model_name")
+
+        if LLM_FAILOVER_PROVIDERS:
+            chain = [(provider, model_name)] if provider else []
+            return self.get_failover(chain + LLM_FAILOVER_PROVIDERS)
+
+        if provider:
+            try:
+                return self.get(provider, model_name)
+            except Exception as e:
+                print(f"[ModelRegistry] - Error creating {provider} model {model_name}: {str(e)}")
+                print(f"Using {default_provider} instead")
+
+        return self.get(default_provider)
+
+    def get_stats(self) -> dict:
+        """Returns the registry counters.
+
+        Returns:
+            dict: created, hit and error counters, the loaded models and the calls in flight per provider
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["models"] = [f"{provider}:{model_name or 'default'}" for provider, model_name in self.models]
+        stats["concurrency"] = get_provider_limiter().get_stats()
+        return stats
+
+# -------------------------------------------------------------------
+# Process-wide registry
+# -------------------------------------------------------------------
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Returns the process-wide model registry.
+
+    Returns:
+        ModelRegistry: the shared registry
+
+    Example:
+        >>> ai_model = get_model_registry().get("gemini")
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+if __name__ == "__main__":
+    registry = get_model_registry()
+    first = registry.get("gemini")
+    second = registry.get("google")
+    print(f"Same instance: {first is second}")
+    print(registry.get_stats())
@@ -1,6 +1,6 @@
 import os # Os is used for interacting with the operating system
 from openai import OpenAI # OpenAI is used for interacting with the OpenAI API
-from .base_model import ModelInterface # Used for agent interface
+from .base_model import ModelInterface, error_response # Used for agent interface
 from dotenv import load_dotenv # Used for loading environment variables
 
 load_dotenv() # Load environment variables from .env file
@@ -68,7 +68,7 @@ class OpenAIModel(ModelInterface): # OpenAIModel inherits from ModelInterface
 
             return response.choices[0].message.content.strip()
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
 
 
 
@@ -135,7 +135,54 @@ class OpenAIModel(ModelInterface): # OpenAIModel inherits from ModelInterface
             return response.choices[0].message.content.strip()
 
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return error_response(e)
+
+    # -------------------------------------------------------------------
+    # Helper to stream a response to a given prompt
+    # -------------------------------------------------------------------
+    def generate_response_stream(self, prompt, **kwargs):
+        """Generate a response to a given prompt, yielding text chunks as the OpenAI API produces them.
+
+        Args:
+            prompt (str or list[dict]): The prompt to generate a response to.
+            **kwargs: Additional keyword arguments, personality and communication_style.
+
+        Yields:
+            str: The next chunk of the generated response.
+
+        Example:
+            >>> openai_model = OpenAIModel()
+            >>> for chunk in openai_model.generate_response_stream("What is the weather in Tokyo?"):
+            ...     print(chunk, end="")
+        """
+        if isinstance(prompt, str):
+            messages = []
+
+            # add personality and style to the instructions
+            persona_prompt = f"{kwargs.get('personality', '')} {kwargs.get('communication_style', '')}".strip()
+            if persona_prompt:
+                messages.append({
+                    "role": "system",
+                    "content": persona_prompt
+                })
+
+            # User message
+            messages.append({
+                "role": "user",
+                "content": prompt
+            })
+        else:
+            messages = prompt
+
+        stream = self.client.chat.completions.create( # Create a streaming chat completion
+            model=self.model_name, # Set the model type we want to use
+            messages=messages, # Set the prompt we want to use
+            stream=True
+        )
+
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
 
 if __name__ == "__main__":
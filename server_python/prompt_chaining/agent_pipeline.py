@@ -0,0 +1,125 @@
+#
+# Module: agent_pipeline
+#
+# This module implements the create_agent_pipeline function for creating an agent end to end.
+#
+# Title: Agent Pipeline
+# Summary: End to end agent creation implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+import prompt_chaining.step_1_create_agent as step_1
+import prompt_chaining.step_2_create_content as step_2
+import prompt_chaining.step_3_create_posts as step_3
+import prompt_chaining.step_4_create_profile_images as step_4
+from utils.pipeline import Pipeline, print_pipeline_report
+
+def build_agent_pipeline(ai_model, concept, number_of_episodes=3, number_of_posts=6, num_images=4, include_images=True, image_prompt=""):
+    '''
+    Description:
+        Declares the agent creation steps as a dependency graph
+
+        agent -> season -> posts
+        agent -> images
+
+        The profile images only need the agent, so they are generated while
+        the season and its posts are written. Every step that saves the
+        master file reloads it under the file lock, so the steps keep each
+        other's changes.
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        concept: The concept of the new agent
+        number_of_episodes: The number of episodes in the first season
+        number_of_posts: The number of posts to create per episode
+        num_images: The number of profile images to create
+        include_images (bool, optional): whether to create the profile images
+        image_prompt (str, optional): the profile image prompt, the agent concept if empty
+
+    Returns:
+        pipeline: The pipeline, each node result is the agent master file path
+
+    Example:
+        >>> pipeline = build_agent_pipeline(ai_model, "alien drone pilot visiting earth")
+        >>> report = pipeline.run()
+    '''
+    pipeline = Pipeline("agent pipeline")
+
+    pipeline.add_node("agent", lambda results: step_1.create_agent(ai_model, concept))
+
+    pipeline.add_node(
+        "season",
+        lambda results: step_2.create_seasons_and_episodes(ai_model, results["agent"], number_of_episodes),
+        depends_on=["agent"]
+    )
+
+    pipeline.add_node(
+        "posts",
+        lambda results: step_3.create_episode_posts(ai_model, results["season"], number_of_posts),
+        depends_on=["season"]
+    )
+
+    if include_images:
+        def create_images(results):
+            # create_images raises on failure and returns nothing on success
+            step_4.create_images(ai_model, image_prompt, results["agent"], num_images)
+            return results["agent"]
+
+        pipeline.add_node("images", create_images, depends_on=["agent"])
+
+    return pipeline
+
+def create_agent_pipeline(ai_model, concept, number_of_episodes=3, number_of_posts=6, num_images=4, include_images=True, image_prompt="", max_workers=None):
+    '''
+    Description:
+        Creates an agent, its first season, the season posts and the profile
+        images, running the independent steps at the same time
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        concept: The concept of the new agent
+        number_of_episodes: The number of episodes in the first season
+        number_of_posts: The number of posts to create per episode
+        num_images: The number of profile images to create
+        include_images (bool, optional): whether to create the profile images
+        image_prompt (str, optional): the profile image prompt, the agent concept if empty
+        max_workers (int, optional): the number of steps run at the same time, every ready step if None
+
+    Returns:
+        report: The pipeline report, see Pipeline.run. report["results"]["agent"] is the master file path
+
+    Example:
+        >>> report = create_agent_pipeline(GeminiModel(), "alien drone pilot visiting earth")
+        >>> print(report["results"].get("agent"), report["total_ms"])
+    '''
+    pipeline = build_agent_pipeline(
+        ai_model, concept,
+        number_of_episodes=number_of_episodes,
+        number_of_posts=number_of_posts,
+        num_images=num_images,
+        include_images=include_images,
+        image_prompt=image_prompt
+    )
+
+    report = pipeline.run(max_workers=max_workers)
+    print_pipeline_report(report)
+    return report
+
+import models.gemini_model as gemini_model
+if __name__ == "__main__":
+    ai_model = gemini_model.GeminiModel()
+    create_agent_pipeline(ai_model, "time-traveling historian documenting the evolution of human technology through the ages")
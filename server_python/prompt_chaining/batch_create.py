@@ -0,0 +1,245 @@
+#
+# Module: batch_create
+#
+# This module implements the batch command for creating many agents from a file of concepts.
+#
+# Title: Batch Create
+# Summary: Bulk agent creation implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from prompt_chaining.agent_pipeline import build_agent_pipeline
+from models.model_registry import get_model_registry, normalize_provider, DEFAULT_MODEL_PROVIDER
+from models.limited_model import get_provider_limiter, parse_concurrency_limits
+from utils.retry_policy import get_retry_policy
+
+# Number of agents created at the same time
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+
+def load_concepts(concepts_path):
+    '''
+    Description:
+        Loads the concepts of a batch
+
+        A .json file holds a list of concepts, each a string or an object
+        with a concept and optionally a provider and model_name. Any other
+        file holds one concept per line, blank lines and lines starting with
+        # are ignored.
+
+    Args:
+        concepts_path: The path to the concepts file
+
+    Returns:
+        concepts: A list of {"concept", "provider", "model_name"} dicts
+
+    Example:
+        >>> load_concepts("concepts.txt")
+        [{'concept': 'alien drone pilot visiting earth', 'provider': None, 'model_name': None}]
+    '''
+    with open(concepts_path, 'r', encoding='utf-8') as file:
+        if concepts_path.endswith(".json"):
+            items = json.load(file)
+        else:
+            items = [line.strip() for line in file if line.strip() and not line.strip().startswith("#")]
+
+    concepts = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"concept": item}
+        concepts.append({
+            "concept": item["concept"],
+            "provider": item.get("provider"),
+            "model_name": item.get("model_name"),
+        })
+    return concepts
+
+def create_agents_batch(concepts, provider=None, model_name=None, number_of_episodes=3, number_of_posts=6,
+                        include_images=False, max_workers=None, concurrency_limits=None):
+    '''
+    Description:
+        Creates an agent, its first season and the season posts for every concept
+
+        Agents are created by a pool of worker threads. Every model call
+        takes a slot of its provider from the shared provider limiter, so
+        the number of calls in flight per provider stays under the
+        concurrency limits however many agents run at the same time.
+
+    Args:
+        concepts: The concepts, see load_concepts
+        provider (str, optional): the provider of concepts that do not set one, DEFAULT_MODEL_PROVIDER if None
+        model_name (str, optional): the model name of concepts that do not set one
+        number_of_episodes: The number of episodes in the first season
+        number_of_posts: The number of posts to create per episode
+        include_images (bool, optional): whether to create the profile images
+        max_workers (int, optional): the number of agents created at the same time, BATCH_WORKERS if None
+        concurrency_limits (dict, optional): provider -> maximum model calls in flight
+
+    Returns:
+        report: The batch report, see build_batch_report
+
+    Example:
+        >>> report = create_agents_batch(load_concepts("concepts.txt"), provider="openai", concurrency_limits={"openai": 8})
+        >>> print(report["agents_per_minute"])
+    '''
+    limiter = get_provider_limiter()
+    for limit_provider, limit in (concurrency_limits or {}).items():
+        limiter.set_limit(normalize_provider(limit_provider), limit)
+
+    registry = get_model_registry()
+    max_workers = max(1, min(max_workers or BATCH_WORKERS, len(concepts) or 1))
+    print(f"Creating {len(concepts)} agents with {max_workers} workers, limits: {limiter.limits or 'none'}")
+
+    def create_one(item):
+        ai_model = registry.get(item["provider"] or provider or DEFAULT_MODEL_PROVIDER, item["model_name"] or model_name)
+        pipeline = build_agent_pipeline(
+            ai_model, item["concept"],
+            number_of_episodes=number_of_episodes,
+            number_of_posts=number_of_posts,
+            include_images=include_images
+        )
+        return pipeline.run()
+
+    agents = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+        futures = {executor.submit(create_one, item): item for item in concepts}
+
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                run = future.result()
+                failed = [name for name, node in run["nodes"].items() if node["status"] != "completed"]
+                agent = {
+                    "concept": item["concept"],
+                    "master_file_path": run["results"].get("agent"),
+                    "status": "failed" if failed else "completed",
+                    "failed_steps": failed,
+                    "duration_ms": run["total_ms"],
+                    "steps": {name: node["duration_ms"] for name, node in run["nodes"].items()},
+                }
+            except Exception as e:
+                agent = {"concept": item["concept"], "master_file_path": None, "status": "failed",
+                         "failed_steps": [], "error": str(e), "duration_ms": None, "steps": {}}
+            agents.append(agent)
+
+            elapsed_minutes = (time.perf_counter() - started) / 60
+            completed = sum(1 for a in agents if a["status"] == "completed")
+            print(f"[{len(agents)}/{len(concepts)}] {agent['status']}: {agent['master_file_path'] or item['concept']} "
+                  f"({completed / elapsed_minutes:.1f} agents/min)")
+
+    return build_batch_report(agents, time.perf_counter() - started)
+
+def build_batch_report(agents, elapsed_seconds):
+    '''
+    Description:
+        Summarizes a batch
+
+    Args:
+        agents: The result of every agent
+        elapsed_seconds: The wall time of the batch
+
+    Returns:
+        report: The totals, the throughput in agents per minute, the agent
+            latency percentiles, the concurrency and retry counters and the
+            result of every agent
+    '''
+    completed = [agent for agent in agents if agent["status"] == "completed"]
+    durations = sorted(agent["duration_ms"] for agent in completed)
+
+    def percentile(fraction):
+        if not durations:
+            return None
+        return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+    return {
+        "agents": len(agents),
+        "completed": len(completed),
+        "failed": len(agents) - len(completed),
+        "elapsed_seconds": round(elapsed_seconds, 1),
+        "agents_per_minute": round(len(completed) / (elapsed_seconds / 60), 2) if elapsed_seconds else 0.0,
+        "agent_ms_p50": percentile(0.5),
+        "agent_ms_p95": percentile(0.95),
+        "concurrency": get_provider_limiter().get_stats(),
+        "retries": get_retry_policy().get_stats(),
+        "results": agents,
+    }
+
+def print_batch_report(report):
+    '''
+    Description:
+        Prints the summary of a batch
+
+    Args:
+        report: The batch report, see build_batch_report
+    '''
+    print("--------------------------------")
+    print(f"Agents: {report['completed']} completed, {report['failed']} failed in {report['elapsed_seconds']}s")
+    print(f"Throughput: {report['agents_per_minute']} agents/min")
+    print(f"Agent latency: p50 {report['agent_ms_p50']} ms, p95 {report['agent_ms_p95']} ms")
+    for provider, stats in report["concurrency"].items():
+        print(f"{provider}: limit {stats['limit']}, peak {stats['peak_in_flight']} in flight, "
+              f"{stats['calls']} calls, {stats['waits']} waited {stats['wait_ms']} ms")
+    for agent in report["results"]:
+        if agent["status"] != "completed":
+            print(f"Failed: {agent['concept']} {agent['failed_steps'] or agent.get('error', '')}")
+    print("--------------------------------")
+
+# -------------------------------------------------------------------
+# Command line
+# -------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Create an agent, its first season and its posts for every concept in a file")
+    parser.add_argument("concepts_path", help="a .txt file with one concept per line, or a .json list")
+    parser.add_argument("--provider", default=None, help="model provider, e.g. openai or gemini")
+    parser.add_argument("--model-name", default=None, help="model name, the provider default if empty")
+    parser.add_argument("--workers", type=int, default=None, help=f"agents created at the same time, default {BATCH_WORKERS}")
+    parser.add_argument("--limit", action="append", default=[], metavar="PROVIDER=N",
+                        help="maximum model calls in flight for a provider, e.g. --limit openai=8")
+    parser.add_argument("--episodes", type=int, default=3)
+    parser.add_argument("--posts", type=int, default=6)
+    parser.add_argument("--images", action="store_true", help="also create the profile images")
+    parser.add_argument("--report", default=None, help="save the batch report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        concurrency_limits = parse_concurrency_limits(",".join(args.limit))
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = create_agents_batch(
+        load_concepts(args.concepts_path),
+        provider=args.provider,
+        model_name=args.model_name,
+        number_of_episodes=args.episodes,
+        number_of_posts=args.posts,
+        include_images=args.images,
+        max_workers=args.workers,
+        concurrency_limits=concurrency_limits
+    )
+    print_batch_report(report)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f"Report saved to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#
+# Module: content_run
+#
+# This module implements resumable content runs (step 2 and step 3) recorded in the run ledger.
+#
+# Title: Content Run
+# Summary: Resumable prompt-chain run implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from prompt_chaining.step_2_create_content import generate_season, commit_season
+from prompt_chaining.step_3_create_posts import create_episode_posts
+from utils.run_ledger import RunLedger, RunStatus
+
+# Directory the run ledger is saved to
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+
+# The units of a content run, in the order they run
+CONTENT_RUN_UNITS = ["season", "posts"]
+
+def get_agent_key(master_file_path):
+    '''
+    Description:
+        Returns the agent name used to key the ledger, taken from the master file name
+
+    Args:
+        master_file_path: The path to the agent master json file
+
+    Returns:
+        agent_key: The agent name, e.g. "Zorp" for configs/Zorp/Zorp_master.json
+    '''
+    return os.path.basename(master_file_path).replace("_master.json", "")
+
+def start_content_run(ai_model, master_file_path, number_of_episodes, number_of_posts, ledger=None):
+    '''
+    Description:
+        Starts a new recorded run that creates a season and its posts
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        master_file_path: The path to the agent master json file
+        number_of_episodes: The number of episodes in the new season
+        number_of_posts: The number of posts to create per episode
+        ledger (RunLedger, optional): the run ledger, RUNS_DIR if None
+
+    Returns:
+        run: The run, its status is completed or failed
+
+    Example:
+        >>> run = start_content_run(ai_model, "configs/Zorp/Zorp_master.json", 3, 6)
+        >>> print(run["run_id"], run["status"])
+    '''
+    return run_content_units(
+        ai_model,
+        master_file_path,
+        CONTENT_RUN_UNITS,
+        {"number_of_episodes": number_of_episodes, "number_of_posts": number_of_posts},
+        ledger=ledger
+    )
+
+def run_content_units(ai_model, master_file_path, units, params, run_id=None, ledger=None, on_start=None, progress_callback=None):
+    '''
+    Description:
+        Runs some of the units of a content run, e.g. only the season, recorded in the ledger
+
+        If run_id is a recorded run it is resumed, otherwise a new run is
+        started and passed to on_start before any LLM call, so the caller
+        can keep its run_id and resume it after a crash.
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        master_file_path: The path to the agent master json file
+        units: The units to run, a subset of CONTENT_RUN_UNITS in the same order
+        params: The run parameters, number_of_episodes for the season and number_of_posts for the posts
+        run_id (str, optional): the run to resume
+        ledger (RunLedger, optional): the run ledger, RUNS_DIR if None
+        on_start (callable, optional): called as on_start(run) when a new run is started
+        progress_callback (callable, optional): called as progress_callback(completed_episodes, total_episodes)
+            while the posts are created
+
+    Returns:
+        run: The run, its status is completed or failed
+
+    Example:
+        >>> run = run_content_units(ai_model, "configs/Zorp/Zorp_master.json", ["season"], {"number_of_episodes": 3})
+    '''
+    ledger = ledger or RunLedger(RUNS_DIR)
+    agent_key = get_agent_key(master_file_path)
+
+    run = ledger.get_run(agent_key, run_id) if run_id else None
+    if run is not None:
+        if run["status"] == RunStatus.COMPLETED:
+            return run
+        print(f"Resuming run {run_id} of {agent_key} from {ledger.next_unit(run)}")
+        run["status"] = RunStatus.RUNNING
+    else:
+        run = ledger.start_run(
+            agent_name=agent_key,
+            master_file_path=master_file_path,
+            params=params,
+            units=units
+        )
+        print(f"Started run {run['run_id']} for {run['agent_name']}")
+        if on_start:
+            on_start(run)
+
+    return continue_content_run(ai_model, run, ledger, progress_callback)
+
+def resume_content_run(ai_model, agent_name, run_id, ledger=None):
+    '''
+    Description:
+        Resumes a recorded run from its first incomplete unit
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        agent_name: The agent the run belongs to
+        run_id: The run id
+        ledger (RunLedger, optional): the run ledger, RUNS_DIR if None
+
+    Returns:
+        run: The run, or None if it does not exist
+
+    Example:
+        >>> run = resume_content_run(ai_model, "Zorp", "4f1c...")
+    '''
+    ledger = ledger or RunLedger(RUNS_DIR)
+    run = ledger.get_run(agent_name, run_id)
+    if run is None:
+        print(f"Run {run_id} of {agent_name} not found")
+        return None
+
+    if run["status"] == RunStatus.COMPLETED:
+        print(f"Run {run_id} of {agent_name} is already completed")
+        return run
+
+    print(f"Resuming run {run_id} of {agent_name} from {ledger.next_unit(run)}")
+    run["status"] = RunStatus.RUNNING
+    return continue_content_run(ai_model, run, ledger)
+
+def resume_incomplete_runs(ai_model, agent_name=None, ledger=None):
+    '''
+    Description:
+        Resumes every run that is not completed, oldest first
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        agent_name (str, optional): only the runs of this agent
+        ledger (RunLedger, optional): the run ledger, RUNS_DIR if None
+
+    Returns:
+        runs: The resumed runs
+    '''
+    ledger = ledger or RunLedger(RUNS_DIR)
+    return [
+        resume_content_run(ai_model, run["agent_name"], run["run_id"], ledger)
+        for run in ledger.list_runs(agent_name, incomplete_only=True)
+    ]
+
+def continue_content_run(ai_model, run, ledger, progress_callback=None):
+    '''
+    Description:
+        Runs the units of a content run that are not completed yet, a run may have only some of the units
+
+        season: the generated season is recorded before it is merged, so a
+            crash between the LLM call and the save does not repeat the call
+        posts: completed episodes are kept in the posts checkpoint journal,
+            so only the missing episodes are generated again
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        run: The run from the ledger
+        ledger: The run ledger
+        progress_callback (callable, optional): called as progress_callback(completed_episodes, total_episodes)
+            while the posts are created
+
+    Returns:
+        run: The run, its status is completed or failed
+    '''
+    master_file_path = run["master_file_path"]
+    params = run["params"]
+
+    try:
+        # unit 1: season
+        season = run["units"].get("season", {"status": RunStatus.COMPLETED})
+        if season["status"] == RunStatus.PENDING:
+            season_data = generate_season(ai_model, master_file_path, params["number_of_episodes"])
+            if season_data is None:
+                ledger.finish_run(run, RunStatus.FAILED, "Failed to generate the season")
+                return run
+            ledger.update_unit(run, "season", RunStatus.GENERATED, season_data=season_data)
+
+        if season["status"] == RunStatus.GENERATED:
+            # the master may already have the season if the process stopped right after saving it
+            if not season_is_committed(master_file_path, season["season_data"]):
+                if not commit_season(master_file_path, season["season_data"]):
+                    ledger.finish_run(run, RunStatus.FAILED, "Failed to save the season")
+                    return run
+            ledger.update_unit(run, "season", RunStatus.COMPLETED)
+
+        # unit 2: posts
+        if "posts" in run["units"] and run["units"]["posts"]["status"] != RunStatus.COMPLETED:
+            ledger.update_unit(run, "posts", RunStatus.RUNNING)
+
+            def on_episode_done(completed_episodes, total_episodes):
+                ledger.update_unit(
+                    run, "posts", RunStatus.RUNNING,
+                    completed_episodes=completed_episodes,
+                    total_episodes=total_episodes
+                )
+                if progress_callback:
+                    progress_callback(completed_episodes, total_episodes)
+
+            if not create_episode_posts(
+                ai_model=ai_model,
+                master_file_path=master_file_path,
+                number_of_posts=params["number_of_posts"],
+                progress_callback=on_episode_done
+            ):
+                ledger.finish_run(run, RunStatus.FAILED, "Failed to create the posts of every episode")
+                return run
+            ledger.update_unit(run, "posts", RunStatus.COMPLETED)
+
+        ledger.finish_run(run, RunStatus.COMPLETED)
+        print(f"Run {run['run_id']} of {run['agent_name']} completed")
+    except Exception as e:
+        print(f"Error in run {run['run_id']}: {str(e)}")
+        ledger.finish_run(run, RunStatus.FAILED, str(e))
+
+    return run
+
+def season_is_committed(master_file_path, season_data):
+    '''
+    Description:
+        Checks whether a generated season is already the last season of the master file
+
+    Args:
+        master_file_path: The path to the agent master json file
+        season_data: The season returned by generate_season
+
+    Returns:
+        bool: True if the master file already ends with the season
+    '''
+    with open(master_file_path, 'r', encoding='utf-8') as file:
+        seasons = json.load(file)['agent']['seasons'] or []
+
+    new_seasons = season_data.get('seasons') or []
+    if not seasons or not new_seasons:
+        return False
+
+    return (seasons[-1].get('season_name'), seasons[-1].get('season_number')) == \
+        (new_seasons[-1].get('season_name'), new_seasons[-1].get('season_number'))
+
+# -------------------------------------------------------------------
+# Command line: start, resume and list runs
+# -------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Start, resume and list recorded content runs")
+    parser.add_argument("--provider", default=None, help="model provider, e.g. openai or gemini")
+    parser.add_argument("--model-name", default=None, help="model name, the provider default if empty")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="create a season and its posts for an agent")
+    start.add_argument("master_file_path")
+    start.add_argument("--episodes", type=int, default=3)
+    start.add_argument("--posts", type=int, default=6)
+
+    resume = commands.add_parser("resume", help="resume runs from their first incomplete unit")
+    resume.add_argument("--agent", help="the agent name")
+    resume.add_argument("--run-id", help="the run id, every incomplete run of the agent if empty")
+
+    runs = commands.add_parser("list", help="list the recorded runs")
+    runs.add_argument("--agent", help="the agent name")
+    runs.add_argument("--incomplete", action="store_true", help="only the runs that are not completed")
+
+    args = parser.parse_args()
+    if args.command == "resume" and args.run_id and not args.agent:
+        parser.error("--run-id requires --agent")
+
+    if args.command == "list":
+        ledger = RunLedger(RUNS_DIR)
+        for run in ledger.list_runs(args.agent, incomplete_only=args.incomplete):
+            print(f"{run['agent_name']:<24} {run['run_id']}  {run['status']:<10} next: {ledger.next_unit(run)}")
+        return
+
+    from models.model_registry import get_model_registry, DEFAULT_MODEL_PROVIDER
+    ai_model = get_model_registry().get(args.provider or DEFAULT_MODEL_PROVIDER, args.model_name)
+
+    if args.command == "start":
+        run = start_content_run(ai_model, args.master_file_path, args.episodes, args.posts)
+        print(f"{run['run_id']}: {run['status']}")
+    elif args.run_id:
+        run = resume_content_run(ai_model, args.agent, args.run_id)
+        print(f"{args.run_id}: {run['status'] if run else 'not found'}")
+    else:
+        for run in resume_incomplete_runs(ai_model, args.agent):
+            print(f"{run['run_id']}: {run['status']}")
+
+if __name__ == "__main__":
+    main()
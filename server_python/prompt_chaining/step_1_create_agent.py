@@ -20,13 +20,18 @@ import yaml
 import json
 import sys
 import os
-import time
+import threading
+from contextlib import nullcontext
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # custom ARAI imports
 from utils.content_generator import ContentGenerator
 import prompt_chaining.step_2_create_content as next_step
 from utils.template_types import TemplateType
+from models.cached_model import response_cache_disabled
+
+# held while an agent name is checked and its master file created
+_agent_name_lock = threading.Lock()
 
 # -------------------------------------------------------------------
 # Step 1: Create a new agent
@@ -77,39 +82,20 @@ def create_agent(ai_model, concept: str):
         "agent_json": json.dumps(agent_template)
     }
 
-     # Constants for retry configuration
-    max_retries = 3
-    delay = 2  # seconds between retries
-
-    # step 3.11: Run the prompt with retry logic for LLM failures
-    success = False
-    for attempt in range(max_retries):
-        try:
-            # step 1.3: Run the prompt
-            print("Sending prompt to AI to create a new agent")
-            agent_data = manager.run_prompt(
-                prompt_key="prompt_1 (Character Sheet Creation)",
-                template_vars=prompt_1_vars, 
-                ai_model=ai_model,
-                debug=False
-            )
-            
-            # Validate that posts_data is valid JSON and has expected structure
-            if isinstance(agent_data, dict) and 'agent' in agent_data:
-                success = True
-                break
-            else:
-                print(f"Invalid response format. Attempt {attempt + 1}/{max_retries}")
-                
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Error on attempt {attempt + 1}/{max_retries}: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            continue
-    
-    if not success:
-        print("Max retries reached. Failed to get valid response from LLM.")
+    # step 1.3: Run the prompt, failed attempts are retried by the shared retry policy
+    # without a concept the prompt is always the same, so a random agent must not come from the response cache
+    print("Sending prompt to AI to create a new agent")
+    with (nullcontext() if concept else response_cache_disabled()):
+        agent_data = manager.run_prompt(
+            prompt_key="prompt_1 (Character Sheet Creation)",
+            template_vars=prompt_1_vars, 
+            ai_model=ai_model,
+            debug=False,
+            expected_key="agent"
+        )
+
+    if agent_data is None:
+        print("Failed to get valid response from LLM.")
         return None
 
     # step 1.4: Merge agent details into the master template
@@ -123,26 +109,57 @@ def create_agent(ai_model, concept: str):
     print("Storing the concept in the agent template")
     agent_master_template["agent"]["concept"] = prompt_1_vars["concept"]
 
-    # step 1.6: create the file path for master file
+    # step 1.6: create the file path for master file. Agents created at the
+    # same time (e.g. by the batch command) can be given the same name, so
+    # the name is made unique and the file saved while holding the lock
     print("Creating the file path for the master file")
-    agent_master_file_path = manager.create_filepath(
-        agent_name=agent_master_template["agent"]["agent_details"]["name"], 
-        season_number=0,
-        episode_number=0,
-        template_type=TemplateType.MASTER
-    )
-
-    # step 1.7: Save the agent data to a file
-    print("Saving the agent data to a file")
-    manager.save_json_file(
-        save_path=agent_master_file_path,
-        json_data=agent_master_template
-    )
+    with _agent_name_lock:
+        agent_name = unique_agent_name(manager, agent_master_template["agent"]["agent_details"]["name"])
+        agent_master_template["agent"]["agent_details"]["name"] = agent_name
+        agent_master_file_path = manager.create_filepath(
+            agent_name=agent_name, 
+            season_number=0,
+            episode_number=0,
+            template_type=TemplateType.MASTER
+        )
+
+        # step 1.7: Save the agent data to a file
+        print("Saving the agent data to a file")
+        manager.save_json_file(
+            save_path=agent_master_file_path,
+            json_data=agent_master_template
+        )
 
     print("Step 1 complete")
     return agent_master_file_path
 
 
+def unique_agent_name(manager, agent_name):
+    '''
+    Description:
+        Returns the agent name, with a number added if an agent with that name already exists
+
+    Args:
+        manager: The ContentGenerator used to build the file paths
+        agent_name: The name chosen by the LLM
+
+    Returns:
+        agent_name: The name, e.g. "Zorp 2" if configs/Zorp already exists
+
+    Example:
+        >>> unique_agent_name(ContentGenerator(), "Zorp")
+        'Zorp 2'
+    '''
+    candidate = agent_name
+    counter = 2
+    while os.path.isdir(os.path.dirname(manager.create_filepath(candidate, 0, 0, TemplateType.MASTER))):
+        candidate = f"{agent_name} {counter}"
+        counter += 1
+
+    if candidate != agent_name:
+        print(f"An agent named {agent_name} already exists, using {candidate}")
+    return candidate
+
 import models.gemini_model as gemini_model
 if __name__ == "__main__":
     ai_model = gemini_model.GeminiModel()
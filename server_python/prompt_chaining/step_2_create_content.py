@@ -26,6 +26,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # custom ARAI imports
 from utils.content_generator import ContentGenerator
 from utils.template_types import TemplateType
+from utils.file_locks import file_lock
+from utils.continuity_digest import get_story_so_far
 import prompt_chaining.step_3_create_posts as next_step
 
 def create_seasons_and_episodes(ai_model, master_file_path, number_of_episodes):
@@ -38,7 +40,7 @@ def create_seasons_and_episodes(ai_model, master_file_path, number_of_episodes):
         master_file_path: The path to the agent master json file
 
     Returns:
-        season_file_path: The path to the season json file
+        master_file_path: The path to the agent master json file, or None if the season could not be created
 
     Raises:
         Exception: If there's an error creating the season
@@ -48,6 +50,28 @@ def create_seasons_and_episodes(ai_model, master_file_path, number_of_episodes):
         >>> master_file_path = "agent_template.json"
         >>> step_2(ai_model, master_file_path)
     '''
+    season_data = generate_season(ai_model, master_file_path, number_of_episodes)
+    if season_data is None:
+        return None
+
+    return commit_season(master_file_path, season_data)
+
+def generate_season(ai_model, master_file_path, number_of_episodes):
+    '''
+    Description:
+        Runs the season prompt for the agent, without changing the master file
+
+    Args:
+        ai_model: The AI model to use for generating responses
+        master_file_path: The path to the agent master json file
+        number_of_episodes: The number of episodes in the new season
+
+    Returns:
+        season_data: The generated season, or None if the LLM did not return a valid season
+
+    Example:
+        >>> season_data = generate_season(ai_model, "configs/Zorp/Zorp_master.json", 3)
+    '''
     print("Step 2: Create a new season") 
 
     # step 2.1: load the season template json file
@@ -71,17 +95,9 @@ def create_seasons_and_episodes(ai_model, master_file_path, number_of_episodes):
     if not agent_master_json['agent']['seasons'] or agent_master_json['agent']['seasons'] == []:
         agent_master_json['agent']['seasons'] = season_template['seasons']
     
-    # step 2.3: find the previous season 
-    # get last season file 
-    previous_season = None    
-    # Get the last season from the seasons array if it exists
-    seasons = agent_master_json['agent']['seasons']
-    previous_season = seasons[-1] if seasons else None
-
-    if previous_season:
-        print(f"Found previous season: {previous_season['season_number']}")
-    else:
-        print("No previous seasons found")
+    # step 2.3: the story so far comes from the continuity digest, so the prompt does
+    # not grow with the number of seasons and posts
+    story_so_far = get_story_so_far(master_file_path, agent_master_json)
 
     # step 2.3: Generate a new season name, topic, and communication style with the prompt_2 template
     # prompt 2 Season Creation:
@@ -91,70 +107,77 @@ def create_seasons_and_episodes(ai_model, master_file_path, number_of_episodes):
         "agent_name": agent_details["name"],
         "agent_json": json.dumps(agent_details),
         "season_json": json.dumps(season_template),
-        "previous_season": json.dumps(previous_season),
+        "story_so_far": story_so_far,
         "number_of_episodes": number_of_episodes
     }
 
-    # Constants for retry configuration
-    max_retries = 3
-    delay = 2  # seconds between retries
-
-    # step 3.11: Run the prompt with retry logic for LLM failures
-    success = False
-    for attempt in range(max_retries):
-        try:
-            # step 2.4: Run the prompt 
-            print("Sending prompt to AI to create a new season")
-            season_data = manager.run_prompt(
-                # prompt_key="prompt_1 (Character Creation)",
-                prompt_key="prompt_2 (Season Creation)",
-                template_vars=prompt_2_vars, 
-                ai_model=ai_model,
+    # step 2.4: Run the prompt, failed attempts are retried by the shared retry policy
+    print("Sending prompt to AI to create a new season")
+    season_data = manager.run_prompt(
+        prompt_key="prompt_2 (Season Creation)",
+        template_vars=prompt_2_vars, 
+        ai_model=ai_model,
+        expected_key="seasons"
+    )
+
+    if season_data is None:
+        print("Failed to get valid response from LLM.")
+    return season_data
+
+def commit_season(master_file_path, season_data):
+    '''
+    Description:
+        Adds a generated season to the agent master file
+
+    Args:
+        master_file_path: The path to the agent master json file
+        season_data: The season returned by generate_season
+
+    Returns:
+        master_file_path: The path to the agent master json file, or None if it could not be saved
+
+    Example:
+        >>> commit_season("configs/Zorp/Zorp_master.json", season_data)
+    '''
+    manager = ContentGenerator()
+
+    # the master is read and saved under its lock, so steps running at the
+    # same time (e.g. profile images) do not overwrite each other
+    with file_lock(master_file_path):
+        with open(master_file_path, 'r', encoding='utf-8') as file:
+            agent_master_json = json.load(file)
+
+        # if the seasons array is empty or None, we need to initialize it
+        if not agent_master_json['agent']['seasons']:
+            agent_master_json['agent']['seasons'] = manager.create_new_template_json(TemplateType.SEASON)['seasons']
+        seasons = agent_master_json['agent']['seasons']
+
+        #print(f"season data is: {season_data}")
+
+        # step 2.8: append the season data to the master data
+        if len(seasons) <= 1 and seasons[0]["season_number"] == 0:
+            print("First season, so we need to initialize the seasons array")
+            agent_master_json = manager.initialize_seasons(
+                master_data=agent_master_json,
+                seasons_data=season_data
+            )
+        else:
+            print("Appending the season data to the master data")
+            agent_master_json = manager.append_seasons(
+                master_data=agent_master_json,
+                seasons_data=season_data,
             )
-            
-            # Validate that posts_data is valid JSON and has expected structure
-            if isinstance(season_data, dict) and 'seasons' in season_data:
-                success = True
-                break
-            else:
-                print(f"Invalid response format. Attempt {attempt + 1}/{max_retries}")
-                
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Error on attempt {attempt + 1}/{max_retries}: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {delay} seconds...")
-                time.sleep(delay)
-            continue
-    
-    if not success:
-        print("Max retries reached. Failed to get valid response from LLM.")
-        return None
 
-    #print(f"season data is: {season_data}")
-
-    # step 2.8: append the season data to the master data
-    if len(seasons) <= 1 and seasons[0]["season_number"] == 0:
-        print("First season, so we need to initialize the seasons array")
-        agent_master_json = manager.initialize_seasons(
-            master_data=agent_master_json,
-            seasons_data=season_data
-        )
-    else:
-        print("Appending the season data to the master data")
-        agent_master_json = manager.append_seasons(
-            master_data=agent_master_json,
-            seasons_data=season_data,
-        )
-
-    # step 2.9: save the master data to a file
-    print("Saving the master data to a file")
-    manager.save_json_file(
-        save_path=master_file_path,
-        json_data=agent_master_json
-    )
+        # step 2.9: save the master data to a file
+        print("Saving the master data to a file")
+        if not manager.save_json_file(
+            save_path=master_file_path,
+            json_data=agent_master_json
+        ):
+            return None
 
     print("Step 2 complete")
-    #return season_file_path
+    return master_file_path
 
 import models.gemini_model as gemini_model
 if __name__ == "__main__":
@@ -20,22 +20,44 @@ import os
 import yaml
 import json
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # custom ARAI imports
 from utils.content_generator import ContentGenerator
 from utils.template_types import TemplateType
+from utils.checkpoint_journal import CheckpointJournal
+from utils.file_locks import file_lock
+from utils.memory_store import get_agent_memory, format_memories, MEMORY_TOP_K
+from utils.continuity_digest import get_story_so_far
 
-def create_episode_posts(ai_model, master_file_path, number_of_posts):
+# Number of episodes whose posts are generated at the same time
+EPISODE_POST_WORKERS = int(os.getenv("EPISODE_POST_WORKERS", "4"))
+
+def create_episode_posts(ai_model, master_file_path, number_of_posts, progress_callback=None, max_workers=None):
     '''
     Description:
         Create a new episode posts for the agent
 
+        The prompt of every episode only depends on the season JSON, so all
+        episode prompts are sent at once through a bounded pool. Each result
+        is appended to a checkpoint journal as soon as it arrives, and the
+        master file is written once, atomically, when every episode is done.
+        If a run is interrupted the next run for the same season reuses the
+        journaled episodes instead of calling the LLM again.
+
     Args:
         ai_model: The AI model to use for generating responses
         master_file_path: The path to the agent master json file
+        number_of_posts: The number of posts to create per episode
+        progress_callback (callable, optional): called as progress_callback(completed_episodes, total_episodes)
+            with the list of episode numbers whose posts are done
+        max_workers (int, optional): the number of episodes generated at the same time,
+            EPISODE_POST_WORKERS if None, 1 to generate the episodes one after another
+
+    Returns:
+        master_file_path: The path to the agent master json file, or None if an episode failed
 
     Raises:
         Exception: If there's an error creating the episode posts        
@@ -75,13 +97,21 @@ def create_episode_posts(ai_model, master_file_path, number_of_posts):
         'season_summary': current_season['season_summary'],
     }
 
-    previous_episode = None
+    # step 3.2: load the episodes completed by an interrupted run of this season
+    journal = CheckpointJournal(
+        get_posts_journal_path(master_file_path),
+        run_key=f"season-{season_details['season_number']}-{season_details['season_name']}-{number_of_posts}"
+    )
+    completed_posts = journal.load()
+    total_episodes = len(current_season['episodes'])
 
-    # Iterate over episodes while maintaining season context
+    # step 3.3: build the prompt of every episode, the previous episode is
+    # already known from the season JSON
+    memory = get_agent_memory(master_file_path)
+    story_so_far = get_story_so_far(master_file_path, agent_master_json, before_season=season_details['season_number'])
+    previous_episode = None
+    episode_prompts = []
     for episode in current_season['episodes']:
-    # Now you have access to both season_details and the current episode
-        print(f"Processing Episode {episode['episode_number']} of Season {season_details['season_number']}")
-        # Work with episode data
         episode_data = {
             'episode_name': episode['episode_name'],
             'episode_number': episode['episode_number'],
@@ -90,69 +120,153 @@ def create_episode_posts(ai_model, master_file_path, number_of_posts):
             'episode_summary': episode['episode_summary'],
         }      
 
-        # step 3.10: Generate a new season name, topic, and communication style with the prompt_2 template
-        # prompt 2 Season Creation:
-        # note that emojis will be output as unicode characters due to the yaml dump
-
-        prompt_3_vars = {
-            "agent_name": agent_details["name"],
-            "agent_json": json.dumps(agent_details),
-            "season_json": json.dumps(season_details),
-            "episode_json": json.dumps(episode_data),
-            "previous_episode": json.dumps(previous_episode),
-            "number_of_posts": number_of_posts,
-            "post_length": 277
+        if episode['episode_number'] in completed_posts:
+            print(f"Skipping Episode {episode['episode_number']}, posts already created")
+        else:
+            prompt_3_vars = {
+                "agent_name": agent_details["name"],
+                "agent_json": json.dumps(agent_details),
+                "season_json": json.dumps(season_details),
+                "episode_json": json.dumps(episode_data),
+                "previous_episode": json.dumps(previous_episode),
+                "story_so_far": story_so_far,
+                "related_memories": get_related_memories(memory, episode_data, season_details['season_number']),
+                "number_of_posts": number_of_posts,
+                "post_length": 277
+            }
+            episode_prompts.append((episode_data, prompt_3_vars))
+
+        previous_episode = episode_data
+
+    # step 3.4: send all episode prompts through a bounded pool, journaling
+    # each result as soon as it arrives
+    max_workers = max(1, min(max_workers or EPISODE_POST_WORKERS, len(episode_prompts) or 1))
+    print(f"Generating posts for {len(episode_prompts)} episodes of Season {season_details['season_number']} with {max_workers} workers")
+
+    if progress_callback and completed_posts:
+        progress_callback(sorted(completed_posts), total_episodes)
+
+    failed_episodes = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="episode") as executor:
+        futures = {
+            executor.submit(generate_episode_posts, manager, ai_model, episode_data, prompt_3_vars): episode_data
+            for episode_data, prompt_3_vars in episode_prompts
         }
 
-        # Constants for retry configuration
-        max_retries = 3
-        delay = 2  # seconds between retries
-
-        # step 3.11: Run the prompt with retry logic for LLM failures
-        success = False
-        for attempt in range(max_retries):
-            try:
-                posts_data = manager.run_prompt(
-                    prompt_key="prompt_3 (Episode Posts Creation)",
-                    template_vars=prompt_3_vars, 
-                    ai_model=ai_model,
-                )
-                
-                # Validate that posts_data is valid JSON and has expected structure
-                if isinstance(posts_data, dict) and 'posts' in posts_data:
-                    success = True
-                    break
-                else:
-                    print(f"Invalid response format. Attempt {attempt + 1}/{max_retries}")
-                    
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Error on attempt {attempt + 1}/{max_retries}: {str(e)}")
-                if attempt < max_retries - 1:
-                    print(f"Retrying in {delay} seconds...")
-                    time.sleep(delay)
+        for future in as_completed(futures):
+            episode_number = futures[future]["episode_number"]
+            posts_data = future.result()
+            if posts_data is None:
+                failed_episodes.append(episode_number)
                 continue
-        
-        if not success:
-            print("Max retries reached. Failed to get valid response from LLM.")
-            return None
 
-        print("Appending the episode data to the master data")
-        agent_master_json = manager.append_episodes(
+            journal.append(episode_number, posts_data)
+            completed_posts[episode_number] = posts_data
+
+            if progress_callback:
+                progress_callback(sorted(completed_posts), total_episodes)
+
+    if failed_episodes:
+        print(f"Failed to create posts for episodes {sorted(failed_episodes)}, the completed episodes are kept for the next run")
+        return None
+
+    # step 3.5: merge every episode in episode order and write the master file once.
+    # The master is reloaded under its lock so changes saved by steps running
+    # at the same time (e.g. profile images) are kept
+    print("Appending the posts of every episode to the master data")
+    with file_lock(master_file_path):
+        with open(master_file_path, 'r', encoding='utf-8') as file:
+            agent_master_json = json.load(file)
+
+        agent_master_json = manager.append_episodes_batch(
             master_data=agent_master_json,
-            posts_data=posts_data,
-            season_index=season_details["season_number"]-1,
-            episode_index= episode_data["episode_number"]-1
+            episodes_posts={episode_number - 1: posts_data for episode_number, posts_data in completed_posts.items()},
+            season_index=season_details["season_number"]-1
         )
 
-        # step 2.9: save the master data to a file
         print("Saving the master data to a file")
-        manager.save_json_file(
+        if not manager.save_json_file(
             save_path=master_file_path,
             json_data=agent_master_json
-        )
+        ):
+            return None
 
-        # step 3.15: Move onto the next step of creating a new season
-        previous_episode = episode_data
+    # step 3.6: the run is committed, the checkpoints are no longer needed
+    journal.clear()
+
+    return master_file_path
+
+def get_posts_journal_path(master_file_path):
+    '''
+    Description:
+        Returns the path of the posts checkpoint journal of an agent
+
+    Args:
+        master_file_path: The path to the agent master json file
+
+    Returns:
+        journal_path: The path to the journal, next to the master file
+
+    Example:
+        >>> get_posts_journal_path("configs/Zorp/Zorp_master.json")
+        'configs/Zorp/Zorp_posts_journal.jsonl'
+    '''
+    base_name = os.path.basename(master_file_path).replace("_master.json", "")
+    return os.path.join(os.path.dirname(master_file_path), f"{base_name}_posts_journal.jsonl")
+
+def get_related_memories(memory, episode_data, season_number):
+    '''
+    Description:
+        Finds the posts and episodes of earlier seasons most related to an episode
+
+    Args:
+        memory: The agent memory, see get_agent_memory, or None
+        episode_data: The episode details
+        season_number: The number of the season being written, its own episodes are left out
+
+    Returns:
+        related_memories: The related memories formatted for the prompt, empty if there are none
+    '''
+    if memory is None:
+        return ""
+
+    try:
+        query = " ".join(str(episode_data.get(field) or "") for field in ("episode_name", "episode_description", "episode_highlights"))
+        memories = memory.retrieve(query, k=2 * MEMORY_TOP_K, kinds=["post", "episode"])
+    except Exception as e:
+        print(f"Error retrieving memories for Episode {episode_data['episode_number']}: {str(e)}")
+        return ""
+
+    earlier = [m for m in memories if m["metadata"].get("season_number") != season_number]
+    return format_memories(earlier[:MEMORY_TOP_K])
+
+def generate_episode_posts(manager, ai_model, episode_data, prompt_3_vars):
+    '''
+    Description:
+        Runs the posts prompt of a single episode
+
+    Args:
+        manager: The ContentGenerator used to run the prompt
+        ai_model: The AI model to use for generating responses
+        episode_data: The episode details
+        prompt_3_vars: The template variables of the posts prompt
+
+    Returns:
+        posts_data: The generated posts, or None if every attempt failed
+    '''
+    print(f"Processing Episode {episode_data['episode_number']}")
+
+    # failed attempts are retried by the shared retry policy
+    posts_data = manager.run_prompt(
+        prompt_key="prompt_3 (Episode Posts Creation)",
+        template_vars=prompt_3_vars, 
+        ai_model=ai_model,
+        expected_key="posts"
+    )
+
+    if posts_data is None:
+        print(f"Failed to get valid response from LLM for Episode {episode_data['episode_number']}.")
+    return posts_data
 
 import models.gemini_model as gemini_model
 if __name__ == "__main__":
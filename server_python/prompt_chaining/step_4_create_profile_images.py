@@ -28,6 +28,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.content_generator import ContentGenerator
 from utils.template_types import TemplateType
 import asset_generation.images_leonardo as images_leonardo
+from utils.file_locks import file_lock
 from models.gemini_model import GeminiModel
 
 dotenv.load_dotenv()
@@ -154,16 +155,22 @@ def create_profile_images(prompt, master_file_path, model_id, style_uuid, num_im
     if not consistent:
         manager.save_json_file(save_path_profile_image, profile_image_template)
 
-    # step 4.9: append to master file
-    agent_master_json = manager.append_profile_image_options(agent_master_json, profile_image_options_template)
-    agent_master_json = manager.append_profile_image(agent_master_json, profile_image_template)
+    # step 4.9: append to master file. The master is reloaded under its lock
+    # because other steps (e.g. seasons and posts) may have saved it while
+    # the images were generated
+    with file_lock(master_file_path):
+        with open(master_file_path, 'r', encoding='utf-8') as file:
+            agent_master_json = json.load(file)
 
-    # step 4.10: save the master data to a file
-    print("Saving the master data to a file")
-    manager.save_json_file(
-        save_path=master_file_path,
-        json_data=agent_master_json
-    )
+        agent_master_json = manager.append_profile_image_options(agent_master_json, profile_image_options_template)
+        agent_master_json = manager.append_profile_image(agent_master_json, profile_image_template)
+
+        # step 4.10: save the master data to a file
+        print("Saving the master data to a file")
+        manager.save_json_file(
+            save_path=master_file_path,
+            json_data=agent_master_json
+        )
 
 
 if __name__ == "__main__":
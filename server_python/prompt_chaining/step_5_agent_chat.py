@@ -20,91 +20,369 @@ import yaml
 import json
 import sys
 import os
+import re
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils.content_generator as content_generator
 from utils.template_types import TemplateType
-import utils.config_utils as config_utils
+from utils.prompt_cache import get_prompt_cache
+from utils.json_extractor import extract_json
+from utils.chat_context import get_chat_context_builder, CHAT_CONTEXT_RECENT_TURNS
+from utils.chat_log import get_chat_log
+from utils.file_locks import file_lock
+from utils.memory_store import get_agent_memory, format_memories, chat_memory_id
+from models.base_model import prompt_key_context
 # -------------------------------------------------------------------
-# Step 5: Chat with the agent
+# Helpers shared by the blocking and streaming chat
 # -------------------------------------------------------------------
-def agent_chat(ai_model, master_file_path: str, prompt: str, chat_history):
-    # Step 5.1: Create a new content manager that will send off the prompt to the AI model
-    manager = content_generator.ContentGenerator()
+def load_chat_context(master_file_path: str, chat_history):
+    """Loads the agent details and the chat history for a chat turn.
+
+    Args:
+        master_file_path (str): the path to the agent master file
+        chat_history (dict): the chat history, if None the last messages of the
+            chat log the prompt can hold are loaded (server-side session)
 
-    # step 5.2: load the agent json file
-    agent_master_json = None    
+    Returns:
+        tuple: the agent details and the chat history, marked with "session": True
+            when it is a window of the chat log
+    """
     with open(master_file_path, 'r', encoding='utf-8') as file:
-        agent_master_json = json.load(file)  
+        agent_master_json = json.load(file)
 
-    # step 5.3: extract agent from master json
     agent_details = agent_master_json['agent']['agent_details']
 
-    # Initialize chat history if None
+    # Load the recent window of the chat log if None, older messages are in the summary
     if chat_history is None:
-        chat_history = config_utils.load_chat_history(agent_details["name"])  
-        
-    # step 5.4: Set up chat variables
-    agent_response = None
+        chat_log_path = get_chat_log_path(content_generator.ContentGenerator(), agent_details)
+        chat_history = {
+            "agent_name": agent_details["name"],
+            "chat_history": get_chat_log(chat_log_path, agent_details["name"]).tail(2 * CHAT_CONTEXT_RECENT_TURNS),
+            "session": True,
+        }
 
-    # prompt 5 Chat with the agent:
-    print("Crafting prompt for AI to chat with the agent")
-    prompt_5_vars = {
+    return agent_details, chat_history
+
+def get_chat_log_path(manager, agent_details: dict) -> str:
+    """Returns the path of the agent's chat log.
+
+    Args:
+        manager (ContentGenerator): the content generator used to create the path
+        agent_details (dict): the agent details from the master file
+
+    Returns:
+        str: the chat log path
+    """
+    return manager.create_filepath(
+        agent_name=agent_details["name"],
+        season_number=0,
+        episode_number=0,
+        template_type=TemplateType.CHAT
+    )
+
+def build_chat_prompt_vars(agent_details: dict, prompt: str, chat_history, chat_log_path: str, memory=None) -> dict:
+    """Builds the template variables for prompt 5.
+
+    Only the recent messages and the rolling summary of the older ones are
+    sent, within the chat context token budget, see ChatContextBuilder. The
+    agent's memories most relevant to the prompt are added, leaving out the
+    chat turns already in the recent messages.
+
+    Args:
+        agent_details (dict): the agent details from the master file
+        prompt (str): the user's message
+        chat_history (dict): the chat history
+        chat_log_path (str): the path to the chat log, the summary is kept beside it
+        memory (AgentMemory, optional): the agent memory, see get_agent_memory
+
+    Returns:
+        dict: the prompt 5 template variables
+    """
+    context = get_chat_context_builder().build(chat_history, chat_log_path)
+
+    memories = []
+    if memory is not None:
+        try:
+            conversation_id = get_chat_log(chat_log_path).conversation_id()
+            in_prompt = {chat_memory_id(conversation_id, message.get("message_id", 0))
+                         for message in context["recent_messages"] if message.get("role") == "user"}
+            memories = memory.retrieve(prompt, exclude_ids=in_prompt)
+        except Exception as e:
+            print(f"Error retrieving memories: {str(e)}")
+
+    return {
         "agent_name": agent_details["name"],
         "agent_json": json.dumps(agent_details),
-        "chat_history": json.dumps(chat_history),
-        "user_prompt": prompt,  # Use the prompt parameter instead of user_prompt
-        "agent_json": json.dumps(agent_details)
+        "agent_memories": format_memories(memories),
+        "chat_summary": context["summary"],
+        "chat_history": json.dumps(context["recent_messages"]),
+        "user_prompt": prompt,
     }
 
-    # get the agent's response
-    print("Sending prompt to AI to chat with the agent")
-    agent_response = manager.run_prompt(
-        prompt_key="prompt_5 (Chat with the agent)",
-        template_vars=prompt_5_vars, 
-        ai_model=ai_model,
-    )
-    
-    if agent_response:  # Add error checking
+def save_chat_turn(manager, agent_details: dict, chat_history, prompt: str, response: str, ai_model=None, memory=None):
+    """Appends a user prompt and the agent's response to the chat history and saves the chat log.
+
+    Only the new messages are appended to the JSONL chat log, see ChatLog.
+    A session window of the log, or a history whose messages have no
+    message_id, is only part of the conversation: the turn is appended after
+    the last message of the log and the log is never reset from it.
+    The rolling summary of the older messages is then updated in the
+    background with ai_model, if given, and the turn is added to the
+    agent memory, if given.
+
+    Args:
+        manager (ContentGenerator): the content generator used to save the file
+        agent_details (dict): the agent details from the master file
+        chat_history (dict): the chat history
+        prompt (str): the user's message
+        response (str): the agent's response
+        ai_model (ModelInterface, optional): the AI model used to update the summary
+        memory (AgentMemory, optional): the agent memory the turn is added to
+    """
+    # create the file path for chat file
+    print("Creating the file path for the chat file")
+    agent_chat_file_path = get_chat_log_path(manager, agent_details)
+    chat_log = get_chat_log(agent_chat_file_path, agent_details["name"])
+
+    messages = chat_history['chat_history']
+    last_id = messages[-1].get("message_id") if messages else None
+    append_only = bool(chat_history.get("session")) or (bool(messages) and last_id is None)
+
+    # the id and the append happen under the log lock, so turns of the same agent do not share ids
+    with file_lock(chat_log.jsonl_path):
+        # ids are positions in the log, a window of it only knows them from the log
+        next_id = chat_log.count() if append_only else (last_id + 1 if messages else 0)
+
         # add the user's prompt to the history log with label
-        chat_history['chat_history'].append({
+        messages.append({
             "role": "user",
             "prompt": prompt,
-            "message_id": len(chat_history['chat_history'])
+            "message_id": next_id
         })
-        
+
         # add the agent's response to the history log with label
-        chat_history['chat_history'].append({
+        messages.append({
             "role": agent_details["name"],
-            "response": agent_response['response'],
-            "message_id": len(chat_history['chat_history'])
+            "response": response,
+            "message_id": next_id + 1
         })
 
-        # Need to save the chat history to a file
-        # Need to check is there is an existing chat history file
-        # If there is, append to the file
-        # If there is not, create a new file
-        # or chat a new file, for users to have new chats
-        # later can allow the user to select which chat history to use
-
-        # step 5.5: create the file path for chat file
-        print("Creating the file path for the chat file")
-        agent_chat_file_path = manager.create_filepath(
-            agent_name=agent_details["name"], 
-            season_number=0,
-            episode_number=0,
-            template_type=TemplateType.CHAT
-        )
-
-        # step 5.6: Save the chat history to a file
+        # Append the new messages to the chat log
         print("Saving the chat history to a file")
-        manager.save_json_file(
-            save_path=agent_chat_file_path,
-            json_data=chat_history
-        )
+        if append_only:
+            chat_log.append(messages[-2:])
+        else:
+            chat_log.save_chat_history(chat_history)
+
+    # Index the turn so later chats can recall it
+    if memory is not None:
+        try:
+            memory.add_chat_turn(chat_log.conversation_id(), messages[-2], messages[-1])
+        except Exception as e:
+            print(f"Error adding the chat turn to the agent memory: {str(e)}")
+
+    # Fold the messages that left the recent window into the summary, off the chat turn
+    if ai_model is not None:
+        get_chat_context_builder().update_summary_async(ai_model, agent_details["name"], agent_chat_file_path)
+
+# -------------------------------------------------------------------
+# Step 5: Chat with the agent
+# -------------------------------------------------------------------
+def agent_chat(ai_model, master_file_path: str, prompt: str, chat_history):
+    # Step 5.1: Create a new content manager that will send off the prompt to the AI model
+    manager = content_generator.ContentGenerator()
+
+    # step 5.2 - 5.3: load the agent details and chat history
+    agent_details, chat_history = load_chat_context(master_file_path, chat_history)
+
+    # prompt 5 Chat with the agent:
+    print("Crafting prompt for AI to chat with the agent")
+    memory = get_agent_memory(master_file_path)
+    prompt_5_vars = build_chat_prompt_vars(agent_details, prompt, chat_history, get_chat_log_path(manager, agent_details), memory)
+
+    # step 5.4: get the agent's response
+    print("Sending prompt to AI to chat with the agent")
+    agent_response = manager.run_prompt(
+        prompt_key="prompt_5 (Chat with the agent)",
+        template_vars=prompt_5_vars, 
+        ai_model=ai_model,
+        expected_key="response"
+    )
+    
+    if agent_response:  # Add error checking
+        # step 5.5 - 5.6: save the chat history to a file
+        save_chat_turn(manager, agent_details, chat_history, prompt, agent_response['response'], ai_model, memory)
 
     return agent_response, chat_history
 
+# -------------------------------------------------------------------
+# Step 5 (streaming): Chat with the agent, yielding tokens as they arrive
+# -------------------------------------------------------------------
+class ResponseFieldStreamer:
+    """
+    Description:
+        Extracts the value of a string field from a JSON object while the
+        object is still being streamed. Prompt 5 asks the model for
+        {"response": "..."}, so only the text inside the response value is
+        passed on to the user, decoded as it arrives.
+
+    Attributes:
+        field (str): the name of the JSON field to extract
+        text (str): all the raw text fed so far
+        value (str): the decoded field value extracted so far
+        complete (bool): whether the closing quote of the field was seen
+    """
+
+    def __init__(self, field="response"):
+        self.field = field
+        self.text = ""
+        self.value = ""
+        self.complete = False
+        self._pattern = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._pos = None
+
+    def feed(self, chunk: str) -> str:
+        """Adds a chunk of raw model output.
+
+        Args:
+            chunk (str): the next chunk of raw model output
+
+        Returns:
+            str: the newly decoded part of the field value, may be empty
+
+        Example:
+            >>> streamer = ResponseFieldStreamer()
+            >>> streamer.feed('{"response": "Hel')
+            'Hel'
+        """
+        self.text += chunk
+        if self.complete:
+            return ""
+
+        # 1. Wait for the opening quote of the field value
+        if self._pos is None:
+            match = self._pattern.search(self.text)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        # 2. Find how far the value can be decoded without splitting an escape
+        i = self._pos
+        while i < len(self.text):
+            char = self.text[i]
+            if char == '"':
+                self.complete = True
+                break
+            if char != "\\":
+                i += 1
+                continue
+            if i + 1 >= len(self.text):
+                break
+            if self.text[i + 1] != "u":
+                i += 2
+                continue
+            if i + 6 > len(self.text):
+                break
+            # a high surrogate must be decoded together with the low surrogate after it
+            if 0xD800 <= int(self.text[i + 2:i + 6], 16) < 0xDC00:
+                if i + 12 > len(self.text):
+                    break
+                i += 12
+            else:
+                i += 6
+
+        # 3. Decode the new part of the value
+        decoded = json.loads('"' + self.text[self._pos:i] + '"', strict=False)
+        self._pos = i
+        self.value += decoded
+        return decoded
+
+    def result(self) -> str:
+        """Returns the final response once the stream has finished.
+
+        Falls back to parsing the whole output, and then to the raw text, if
+        the model did not answer with the expected JSON object.
+
+        Returns:
+            str: the agent's response
+        """
+        if self._pos is not None:
+            return self.value
+
+        parsed = extract_json(self.text)
+        if isinstance(parsed, dict) and isinstance(parsed.get(self.field), str):
+            return parsed[self.field]
+
+        return self.text.strip()
+
+def agent_chat_stream(ai_model, master_file_path: str, prompt: str, chat_history):
+    """Chats with the agent, yielding the response tokens as the model produces them.
+
+    The chat log is saved once the stream has completed.
+
+    Args:
+        ai_model (ModelInterface): the AI model to use
+        master_file_path (str): the path to the agent master file
+        prompt (str): the user's message
+        chat_history (dict): the chat history, loaded from the chat log if None
+
+    Yields:
+        dict: {"type": "token", "text": ...} events, then one {"type": "done", ...}
+            event with the full response, the updated chat history and the timings
+
+    Raises:
+        Exception: If the model fails, the chat log is left unchanged
+
+    Example:
+        >>> for event in agent_chat_stream(ai_model, master_file_path, "What is your name?", None):
+        ...     if event["type"] == "token":
+        ...         print(event["text"], end="")
+    """
+    started = time.perf_counter()
+    first_token_ms = None
+
+    # step 5.1 - 5.3: load the agent details and chat history
+    manager = content_generator.ContentGenerator()
+    agent_details, chat_history = load_chat_context(master_file_path, chat_history)
+
+    # step 5.4: render prompt 5 and stream the agent's response
+    memory = get_agent_memory(master_file_path)
+    prompt_text = manager.render_prompt(
+        "prompt_5 (Chat with the agent)",
+        build_chat_prompt_vars(agent_details, prompt, chat_history, get_chat_log_path(manager, agent_details), memory)
+    )
+
+    streamer = ResponseFieldStreamer("response")
+    llm_started = time.perf_counter()
+    with prompt_key_context("prompt_5 (Chat with the agent)"):
+        for chunk in ai_model.generate_response_stream(prompt_text):
+            text = streamer.feed(chunk)
+            if text:
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+                yield {"type": "token", "text": text}
+
+    response = streamer.result()
+    llm_ms = (time.perf_counter() - llm_started) * 1000
+    get_prompt_cache(manager.chain_prompts_path).record_timing("prompt_5 (Chat with the agent)", llm_ms=llm_ms)
+
+    # the model did not answer with JSON, send everything in one go
+    if first_token_ms is None and response:
+        first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+        yield {"type": "token", "text": response}
+
+    # step 5.5 - 5.6: save the chat history to a file
+    save_chat_turn(manager, agent_details, chat_history, prompt, response, ai_model, memory)
+
+    yield {
+        "type": "done",
+        "response": response,
+        "chat_history": chat_history,
+        "time_to_first_token_ms": first_token_ms,
+        "total_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
 
 import models.gemini_model as gemini_model
 if __name__ == "__main__":
@@ -21,6 +21,7 @@ import dotenv
 import time
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -66,37 +67,138 @@ def create_image_posts(ai_model, master_file_path, num_images, season_number, ep
     return image_descriptions
 
 def create_image_post(ai_model, prompt, model_id, style_uuid, num_images, consistent=False, max_retries=10, delay=5):
-    manager = ContentGenerator()
-
-    # step 4.4: generate the image
+    # a batch of one, waiting up to max_retries * delay seconds
+    results = create_image_posts_batch(
+        prompts=[prompt],
+        model_id=model_id,
+        style_uuid=style_uuid,
+        num_images=num_images,
+        consistent=consistent,
+        timeout=max_retries * delay
+    )
+    return results[0] if results[0]["status"] == "COMPLETE" else None
+
+def submit_image_generation(prompt, model_id, style_uuid, num_images, consistent=False):
+    '''
+    Description:
+        Starts a Leonardo generation without waiting for it
+
+    Args:
+        prompt: The image description
+        model_id: The Leonardo model id
+        style_uuid: The Leonardo style UUID
+        num_images: The number of images to generate
+        consistent: Whether to use the consistent image settings
+
+    Returns:
+        generation_id: The generation id, or None if the generation could not be started
+    '''
     if consistent:
         response, payload = images_leonardo.generated_image_consistent(prompt, model_id, style_uuid, num_images)
     else:
         response, payload = images_leonardo.generated_image_inconsistent(prompt, model_id, style_uuid, num_images)
-    
-    generation_id = response["sdGenerationJob"]["generationId"]
-
-    # step 4.5: retry loop to check for image completion
-    success = False  # Add flag to track success
-    for attempt in range(max_retries):
-        response_url = images_leonardo.get_image_url(generation_id)
-        
-        if response_url.get("generations_by_pk", {}).get("generated_images"):
-            success = True  # Set flag when successful
-            break  # Exit the loop when we have images
-            
-        print(f"Image not ready yet. Attempt {attempt + 1}/{max_retries}. Waiting {delay} seconds...")
-        time.sleep(delay)
-    
-    if not success:
-        print("Max retries reached. Image generation may have failed.")
-        return None           
 
-    # step 4.7: create the save path, use 0 as we are not in a season or episode
-    save_path = os.path.join("configs", "temporary", "image_generations", f"generation_{generation_id}.json")
-
-    # step 4.8: save the profile image options to a file
-    manager.save_json_file(save_path, response_url)
+    try:
+        return response["sdGenerationJob"]["generationId"]
+    except (TypeError, KeyError):
+        print(f"Could not start image generation: {response}")
+        return None
+
+def iter_image_posts(prompts, model_id, style_uuid, num_images=1, consistent=False, max_workers=8, timeout=120):
+    '''
+    Description:
+        Generates an image for every prompt and yields each one as soon as it is ready
+
+        All generations are started at the same time, then a single
+        GenerationPoller polls their statuses together with an adaptive
+        backoff. Each finished generation is saved to
+        configs/temporary/image_generations/generation_<id>.json.
+
+    Args:
+        prompts: The image descriptions
+        model_id: The Leonardo model id
+        style_uuid: The Leonardo style UUID
+        num_images: The number of images to generate per prompt
+        consistent: Whether to use the consistent image settings
+        max_workers: The number of requests sent to Leonardo at the same time
+        timeout: How long each generation is waited for, in seconds
+
+    Yields:
+        result: A dict with the index and prompt, the generation_id, the status
+            ("COMPLETE", "FAILED", "TIMEOUT" or "NOT_STARTED"), the image urls,
+            the save_path and the seconds taken
+
+    Example:
+        >>> for result in iter_image_posts(["a cat on the moon", "a dog on mars"], model_id, style_uuid):
+        ...     print(result["prompt"], result["image_urls"])
+    '''
+    manager = ContentGenerator()
+    started = time.monotonic()
+
+    # step 6.1: start every generation at the same time
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts) or 1)), thread_name_prefix="leonardo-submit") as executor:
+        generation_ids = list(executor.map(
+            lambda prompt: submit_image_generation(prompt, model_id, style_uuid, num_images, consistent),
+            prompts
+        ))
+    print(f"Started {sum(1 for g in generation_ids if g)}/{len(prompts)} image generations in {time.monotonic() - started:.1f}s")
+
+    indexes = {}
+    for index, generation_id in enumerate(generation_ids):
+        if generation_id:
+            indexes[generation_id] = index
+        else:
+            yield {"index": index, "prompt": prompts[index], "generation_id": None, "status": "NOT_STARTED",
+                   "image_urls": [], "save_path": None, "seconds": round(time.monotonic() - started, 1)}
+
+    # step 6.2: poll the generations together, yielding each one when it is done
+    poller = images_leonardo.GenerationPoller(timeout=timeout, max_workers=max_workers)
+    for generation_id, status, response in poller.wait(list(indexes)):
+        index = indexes[generation_id]
+        save_path = None
+        image_urls = []
+
+        if status == "COMPLETE":
+            image_urls = [image.get("url") for image in response["generations_by_pk"].get("generated_images", [])]
+
+            # step 6.3: save the generation to a file
+            save_path = os.path.join("configs", "temporary", "image_generations", f"generation_{generation_id}.json")
+            manager.save_json_file(save_path, response)
+        else:
+            print(f"Image generation {generation_id} ended with status {status}")
+
+        yield {"index": index, "prompt": prompts[index], "generation_id": generation_id, "status": status,
+               "image_urls": image_urls, "save_path": save_path, "seconds": round(time.monotonic() - started, 1)}
+
+    print(f"Image generations done in {time.monotonic() - started:.1f}s, polls: {poller.stats}")
+
+def create_image_posts_batch(prompts, model_id, style_uuid, num_images=1, consistent=False, max_workers=8, timeout=120, on_ready=None):
+    '''
+    Description:
+        Generates an image for every prompt concurrently, see iter_image_posts
+
+    Args:
+        prompts: The image descriptions
+        model_id: The Leonardo model id
+        style_uuid: The Leonardo style UUID
+        num_images: The number of images to generate per prompt
+        consistent: Whether to use the consistent image settings
+        max_workers: The number of requests sent to Leonardo at the same time
+        timeout: How long each generation is waited for, in seconds
+        on_ready (callable, optional): called with each result as soon as it is ready
+
+    Returns:
+        results: The result of every prompt, in the order of the prompts
+
+    Example:
+        >>> results = create_image_posts_batch(prompts, model_id, style_uuid, on_ready=print)
+    '''
+    results = [None] * len(prompts)
+    for result in iter_image_posts(prompts, model_id, style_uuid, num_images, consistent, max_workers, timeout):
+        results[result["index"]] = result
+        if on_ready:
+            on_ready(result)
+    return results
 
 if __name__ == "__main__":    
     # Setup model details
@@ -133,17 +235,17 @@ if __name__ == "__main__":
     print("\n\n")
     
     # print the image descriptions
-    for image_description in image_descriptions["image_post_descriptions"]:
+    post_descriptions = image_descriptions["image_post_descriptions"]
+    for image_description in post_descriptions:
         print(image_description["image_description"] + "\n")
         print(image_description["post_after"] + "\n")
-        # Generate the image
-        create_image_post(
-            ai_model=ai_model, 
-            prompt=image_description["image_description"], 
-            model_id=model_id, 
-            style_uuid=style_uuid, 
-            num_images=1, 
-            consistent=False, 
-            max_retries=10, 
-            delay=5
-        )
\ No newline at end of file
+
+    # Generate every image at the same time, printing each one when it is ready
+    results = create_image_posts_batch(
+        prompts=[image_description["image_description"] for image_description in post_descriptions],
+        model_id=model_id,
+        style_uuid=style_uuid,
+        num_images=1,
+        consistent=False,
+        on_ready=lambda result: print(f"Image {result['index'] + 1}/{len(post_descriptions)} {result['status']} after {result['seconds']}s: {result['image_urls']}")
+    )
@@ -0,0 +1,23 @@
+#
+# Module: conftest
+#
+# This module sets up the pytest suite for the ARAI python server.
+#
+# Title: Test Configuration
+# Summary: Shared pytest configuration.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+
+# the modules import each other from the server_python folder, e.g. "from utils.file_locks import file_lock"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
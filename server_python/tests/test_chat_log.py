@@ -0,0 +1,118 @@
+#
+# Module: test_chat_log
+#
+# This module tests the ChatLog class.
+#
+# Title: Chat Log Tests
+# Summary: Chat log migration, append, compaction and paging tests.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+
+# custom ARAI code imports
+from utils.chat_log import ChatLog
+
+def make_messages(start, end):
+    return [{"role": "user", "prompt": f"message {i}", "message_id": i} for i in range(start, end)]
+
+def test_migration_stamps_message_ids(tmp_path):
+    chat_log_path = str(tmp_path / "Zed_chat_log.json")
+    legacy = [{"role": "user", "prompt": f"message {i}"} for i in range(5)]
+    with open(chat_log_path, "w", encoding="utf-8") as f:
+        json.dump({"agent_name": "Zed", "chat_history": legacy}, f)
+
+    chat_log = ChatLog(chat_log_path)
+    messages = chat_log.read()
+
+    assert [message["message_id"] for message in messages] == [0, 1, 2, 3, 4]
+    assert chat_log.agent_name == "Zed"
+    assert os.path.exists(chat_log_path + ".bak")
+    assert not os.path.exists(chat_log_path)
+
+    # a turn after the migration continues the ids
+    chat_log.append(make_messages(5, 7))
+    assert [message["message_id"] for message in ChatLog(chat_log_path).read()] == list(range(7))
+
+def test_append_after_a_torn_line_keeps_the_next_record(tmp_path):
+    chat_log_path = str(tmp_path / "Zed_chat_log.json")
+    chat_log = ChatLog(chat_log_path, "Zed")
+    chat_log.append(make_messages(0, 2))
+
+    # a crash during an append leaves a partly written last line
+    with open(chat_log.jsonl_path, "ab") as f:
+        f.write(b'{"role": "user", "pro')
+
+    reopened = ChatLog(chat_log_path, "Zed")
+    reopened.append(make_messages(2, 4))
+
+    assert ChatLog(chat_log_path, "Zed").read() == make_messages(0, 4)
+    assert reopened.get_stats()["dead"] == 1
+
+def test_index_is_rebuilt_when_it_does_not_match_the_log(tmp_path):
+    chat_log_path = str(tmp_path / "Zed_chat_log.json")
+    ChatLog(chat_log_path, "Zed", index_stride=3).append(make_messages(0, 10))
+    os.remove(ChatLog(chat_log_path).index_path)
+
+    chat_log = ChatLog(chat_log_path, "Zed", index_stride=3)
+    assert chat_log.read(7) == make_messages(7, 10)
+    assert chat_log.stats["index_rebuilds"] == 1
+
+def test_reset_compacts_the_dead_records(tmp_path):
+    chat_log_path = str(tmp_path / "Zed_chat_log.json")
+    chat_log = ChatLog(chat_log_path, "Zed", compact_min_dead=5)
+    chat_log.append(make_messages(0, 8))
+    size_before = os.path.getsize(chat_log.jsonl_path)
+
+    chat_log.reset(make_messages(0, 2))
+
+    assert chat_log.stats["compactions"] == 1
+    assert chat_log.read() == make_messages(0, 2)
+    assert chat_log.get_stats()["dead"] == 0
+    assert os.path.getsize(chat_log.jsonl_path) < size_before
+    assert ChatLog(chat_log_path).read() == make_messages(0, 2)
+
+def test_page_cursors_walk_back_to_the_first_message(tmp_path):
+    chat_log = ChatLog(str(tmp_path / "Zed_chat_log.json"), "Zed", index_stride=4)
+    chat_log.append(make_messages(0, 25))
+
+    pages, before = [], None
+    while True:
+        page = chat_log.page(before=before, limit=10)
+        pages.append([message["message_id"] for message in page["chat_history"]])
+        assert page["total"] == 25
+        before = page["next_before"]
+        if before is None:
+            break
+
+    assert pages == [list(range(15, 25)), list(range(5, 15)), list(range(0, 5))]
+
+def test_save_chat_history_appends_only_new_messages(tmp_path):
+    chat_log = ChatLog(str(tmp_path / "Zed_chat_log.json"), "Zed")
+    chat_log.append(make_messages(0, 4))
+
+    # a window of the last messages plus a new turn
+    chat_log.save_chat_history({"chat_history": make_messages(2, 6)})
+
+    assert chat_log.read() == make_messages(0, 6)
+    assert chat_log.stats["resets"] == 0
+
+def test_save_chat_history_resets_a_different_conversation(tmp_path):
+    chat_log = ChatLog(str(tmp_path / "Zed_chat_log.json"), "Zed")
+    chat_log.append(make_messages(0, 4))
+    conversation_id = chat_log.conversation_id()
+
+    new_chat = [{"role": "user", "prompt": "a new chat", "message_id": 0}]
+    chat_log.save_chat_history({"chat_history": new_chat})
+
+    assert chat_log.read() == new_chat
+    assert chat_log.conversation_id() != conversation_id
@@ -0,0 +1,47 @@
+#
+# Module: test_checkpoint_journal
+#
+# This module tests the CheckpointJournal class.
+#
+# Title: Checkpoint Journal Tests
+# Summary: Checkpoint journal tests.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# custom ARAI code imports
+from utils.checkpoint_journal import CheckpointJournal
+
+def test_load_returns_the_records_of_the_run(tmp_path):
+    path = str(tmp_path / "Zed_posts_journal.jsonl")
+    CheckpointJournal(path, "season-1").append(1, {"posts": ["a"]})
+    CheckpointJournal(path, "season-2").append(1, {"posts": ["b"]})
+
+    assert CheckpointJournal(path, "season-2").load() == {1: {"posts": ["b"]}}
+
+def test_append_after_a_torn_line_keeps_the_next_record(tmp_path):
+    path = str(tmp_path / "Zed_posts_journal.jsonl")
+    journal = CheckpointJournal(path, "season-1")
+    journal.append(1, {"posts": ["a"]})
+
+    # a crash during an append leaves a partly written last line
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"run_key": "season-1", "step": 2, "da')
+
+    journal.append(2, {"posts": ["b"]})
+    assert CheckpointJournal(path, "season-1").load() == {1: {"posts": ["a"]}, 2: {"posts": ["b"]}}
+
+def test_clear_removes_the_journal(tmp_path):
+    path = str(tmp_path / "Zed_posts_journal.jsonl")
+    journal = CheckpointJournal(path, "season-1")
+    journal.append(1, {"posts": ["a"]})
+    journal.clear()
+    journal.clear()
+
+    assert journal.load() == {}
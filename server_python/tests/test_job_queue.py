@@ -0,0 +1,140 @@
+#
+# Module: test_job_queue
+#
+# This module tests the JobQueue class.
+#
+# Title: Job Queue Tests
+# Summary: Job queue ordering, failure and recovery tests.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+import time
+import datetime
+import threading
+import subprocess
+import sys
+import socket
+
+# custom ARAI code imports
+from utils.job_queue import JobQueue, JobStatus
+
+def wait_for(job_queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_queue.get(job_id)
+        if job["status"] in (JobStatus.COMPLETED, JobStatus.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def write_job(jobs_dir, job_id, status, owner=None, heartbeat_at=None):
+    job = {
+        "job_id": job_id, "job_type": "echo", "key": None, "status": status,
+        "params": {"value": job_id}, "progress": {}, "result": None, "error": None,
+        "attempts": 1, "created_at": None, "started_at": None, "finished_at": None,
+        "owner": owner, "heartbeat_at": heartbeat_at,
+    }
+    with open(os.path.join(jobs_dir, f"{job_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(job, f)
+
+def now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+def test_jobs_with_the_same_key_run_one_after_another(tmp_path):
+    job_queue = JobQueue(str(tmp_path), max_workers=4)
+    running, overlaps = [], []
+    lock = threading.Lock()
+
+    def runner(job, report_progress):
+        with lock:
+            if running:
+                overlaps.append(job["job_id"])
+            running.append(job["job_id"])
+        time.sleep(0.05)
+        with lock:
+            running.remove(job["job_id"])
+        return {"value": job["params"]["value"]}
+
+    job_queue.register("echo", runner)
+    job_ids = [job_queue.submit("echo", {"value": i}, key="Zed")["job_id"] for i in range(3)]
+
+    results = [wait_for(job_queue, job_id)["result"]["value"] for job_id in job_ids]
+    assert results == [0, 1, 2]
+    assert overlaps == []
+    job_queue.shutdown()
+
+def test_a_failed_job_keeps_the_error(tmp_path):
+    job_queue = JobQueue(str(tmp_path))
+
+    def runner(job, report_progress):
+        report_progress(run_id="run-1")
+        raise RuntimeError("LLM returned invalid JSON")
+
+    job_queue.register("echo", runner)
+    job = wait_for(job_queue, job_queue.submit("echo", {})["job_id"])
+
+    assert job["status"] == JobStatus.FAILED
+    assert job["error"] == "LLM returned invalid JSON"
+    assert job["progress"]["run_id"] == "run-1"
+    job_queue.shutdown()
+
+def test_recover_resumes_the_jobs_of_a_stopped_process(tmp_path):
+    jobs_dir = str(tmp_path)
+    # a process that exited, and one that stopped refreshing its heartbeat
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    write_job(jobs_dir, "queued", JobStatus.QUEUED, {"host": "other", "pid": 1, "instance": "a"}, "2025-01-01T00:00:00+00:00")
+    write_job(jobs_dir, "running", JobStatus.RUNNING, {"host": socket.gethostname(), "pid": exited.pid, "instance": "b"}, now())
+    write_job(jobs_dir, "done", JobStatus.COMPLETED)
+
+    job_queue = JobQueue(jobs_dir)
+    resumed = []
+    job_queue.register("echo", lambda job, report_progress: resumed.append(job["job_id"]) or {"value": 1})
+
+    assert job_queue.recover() == 2
+    for job_id in ("queued", "running"):
+        assert wait_for(job_queue, job_id)["status"] == JobStatus.COMPLETED
+    assert sorted(resumed) == ["queued", "running"]
+    job_queue.shutdown()
+
+def test_recover_leaves_the_jobs_of_a_live_process(tmp_path):
+    jobs_dir = str(tmp_path)
+    # this test process stands in for a live sibling server process
+    write_job(jobs_dir, "running", JobStatus.RUNNING, {"host": socket.gethostname(), "pid": os.getpid(), "instance": "sibling"}, now())
+
+    job_queue = JobQueue(jobs_dir)
+    job_queue.register("echo", lambda job, report_progress: {"value": 1})
+
+    assert job_queue.recover() == 0
+    assert job_queue.get("running")["status"] == JobStatus.RUNNING
+    job_queue.shutdown()
+
+def test_only_one_queue_recovers_a_jobs_dir(tmp_path):
+    jobs_dir = str(tmp_path)
+    write_job(jobs_dir, "queued", JobStatus.QUEUED)
+
+    first = JobQueue(jobs_dir)
+    first.register("echo", lambda job, report_progress: {"value": 1})
+    assert first.recover() == 1
+
+    # the lock is held by the process, another process would get 0
+    code = (
+        "import sys; sys.path.append(sys.argv[1]);"
+        "from utils.job_queue import JobQueue;"
+        "q = JobQueue(sys.argv[2]); q.register('echo', lambda job, report_progress: {});"
+        "print(q.recover())"
+    )
+    server_python = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code, server_python, jobs_dir], capture_output=True, text=True).stdout
+    assert output.strip().splitlines()[-1] == "0"
+    first.shutdown()
@@ -0,0 +1,52 @@
+#
+# Module: test_json_extractor
+#
+# This module tests the JsonExtractor class.
+#
+# Title: JSON Extractor Tests
+# Summary: JSON extraction and repair tests.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import pytest
+
+# custom ARAI code imports
+from utils.json_extractor import JsonExtractor
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"name": "Zorp"}\n```', {"name": "Zorp"}),
+    ('Here is your agent:\n{"name": "Zorp", "traits": ["bold", "kind",],}\nLet me know!', {"name": "Zorp", "traits": ["bold", "kind"]}),
+    ('{“name”: “Zorp”, "quote": "it’s “fine”"}', {"name": "Zorp", "quote": "it’s “fine”"}),
+    (
+        '{"name": "Zorp", "seasons": [{"episode": 1}, {"episode": 2, "title": "The Ret',
+        {"name": "Zorp", "seasons": [{"episode": 1}, {"episode": 2, "title": "The Ret"}]},
+    ),
+    ('Error generating response: 429 Too Many Requests', None),
+    ('Season [1]: {"season_number": 1, "episodes": []}', {"season_number": 1, "episodes": []}),
+    ('Remember to use {braces}. {"name": "Zorp"}', {"name": "Zorp"}),
+    ('Here: [{"a": 1}, {"b": 2}] done', [{"a": 1}, {"b": 2}]),
+    ('no JSON here', None),
+])
+def test_extract(text, expected):
+    assert JsonExtractor().extract(text) == expected
+
+def test_stats_count_the_outcomes_and_repairs():
+    extractor = JsonExtractor()
+    extractor.extract('{"name": "Zorp"}')
+    extractor.extract('Sure! {"name": "Zorp"} Enjoy!')
+    extractor.extract('{"traits": ["bold",]}')
+    extractor.extract('Error generating response: 429 Too Many Requests')
+    extractor.extract('nothing')
+
+    stats = extractor.get_stats()
+    assert (stats["clean"], stats["extracted"], stats["repaired"], stats["failed"], stats["error_responses"]) == (1, 1, 1, 1, 1)
+    assert stats["repairs"]["trailing_commas"] == 1
+    assert stats["retries_saved"] == 2
@@ -0,0 +1,82 @@
+#
+# Module: test_memory_store
+#
+# This module tests the LocalVectorStore class.
+#
+# Title: Memory Store Tests
+# Summary: Local vector store persistence and crash repair tests.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+
+# custom ARAI code imports
+from utils.memory_store import HashingEmbedder, LocalVectorStore
+
+TEXTS = {
+    "apple": "baking an apple pie with cinnamon",
+    "rocket": "the rocket launch reached orbit",
+    "ocean": "surfing the ocean waves at dawn",
+    "forest": "a quiet walk through the pine forest",
+}
+
+def make_item(item_id):
+    return {"id": item_id, "kind": "post", "text": TEXTS[item_id], "metadata": {}}
+
+def best_match(store, embedder, item_id):
+    return store.query(embedder.embed([TEXTS[item_id]])[0], 1)[0]["id"]
+
+def assert_aligned(store, embedder, item_ids):
+    assert store.ids() == set(item_ids)
+    for item_id in item_ids:
+        assert best_match(store, embedder, item_id) == item_id
+
+def test_memories_and_deletes_are_reloaded(tmp_path):
+    base_path = str(tmp_path / "Zed_memory")
+    embedder = HashingEmbedder(dim=64)
+    store = LocalVectorStore(base_path, embedder)
+    store.add([make_item("apple"), make_item("rocket"), make_item("ocean")])
+    store.delete(["rocket"])
+
+    assert_aligned(LocalVectorStore(base_path, embedder), embedder, ["apple", "ocean"])
+
+def test_vectors_without_an_item_are_cut_off(tmp_path):
+    base_path = str(tmp_path / "Zed_memory")
+    embedder = HashingEmbedder(dim=64)
+    LocalVectorStore(base_path, embedder).add([make_item("apple"), make_item("rocket")])
+
+    # a crash after the vectors append, before the items append, with a torn last item line
+    with open(base_path + ".f32", "ab") as f:
+        f.write(embedder.embed([TEXTS["forest"]]).tobytes() + b"\x00\x01")
+    with open(base_path + ".jsonl", "a", encoding="utf-8") as f:
+        f.write('{"id": "forest", "ki')
+
+    store = LocalVectorStore(base_path, embedder)
+    assert os.path.getsize(base_path + ".f32") == 2 * 64 * 4
+    store.add([make_item("ocean")])
+
+    assert_aligned(LocalVectorStore(base_path, embedder), embedder, ["apple", "rocket", "ocean"])
+
+def test_items_without_a_vector_are_dropped(tmp_path):
+    base_path = str(tmp_path / "Zed_memory")
+    embedder = HashingEmbedder(dim=64)
+    LocalVectorStore(base_path, embedder).add([make_item("apple")])
+
+    # an item whose vector was never written
+    with open(base_path + ".jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(make_item("forest")) + "\n")
+
+    store = LocalVectorStore(base_path, embedder)
+    assert store.ids() == {"apple"}
+    store.add([make_item("forest"), make_item("ocean")])
+
+    assert_aligned(LocalVectorStore(base_path, embedder), embedder, ["apple", "forest", "ocean"])
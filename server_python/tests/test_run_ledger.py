@@ -0,0 +1,111 @@
+#
+# Module: test_run_ledger
+#
+# This module tests the RunLedger class and resuming content runs.
+#
+# Title: Run Ledger Tests
+# Summary: Run ledger and content run resume tests.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+
+# custom ARAI code imports
+from utils.run_ledger import RunLedger, RunStatus
+from prompt_chaining.content_run import run_content_units
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+class NoCallModel:
+    """A model that fails the test if a resumed run calls the LLM again."""
+
+    def generate_response(self, prompt, **kwargs):
+        raise AssertionError("the resumed run called the LLM")
+
+def make_master(tmp_path):
+    with open(os.path.join(TEMPLATES_DIR, "master.json"), "r", encoding="utf-8") as f:
+        master = json.load(f)
+    master["agent"]["agent_details"]["name"] = "Zed"
+    master_file_path = tmp_path / "configs" / "Zed" / "Zed_master.json"
+    master_file_path.parent.mkdir(parents=True)
+    master_file_path.write_text(json.dumps(master), encoding="utf-8")
+    return str(master_file_path)
+
+def make_season(season_number):
+    return {"seasons": [{
+        "season_name": f"Season {season_number}",
+        "season_number": season_number,
+        "season_description": "", "season_highlights": "", "season_summary": "",
+        "season_posted": False, "current_episode_number": 0,
+        "episodes": [{
+            "episode_name": "Pilot", "episode_number": 1, "episode_description": "",
+            "episode_highlights": "", "episode_summary": "", "episode_posted": False,
+            "current_post_number": 0,
+        }],
+    }]}
+
+def load_seasons(master_file_path):
+    with open(master_file_path, "r", encoding="utf-8") as f:
+        return json.load(f)["agent"]["seasons"]
+
+def test_runs_are_saved_and_listed(tmp_path):
+    ledger = RunLedger(str(tmp_path / "runs"))
+    run = ledger.start_run("Zed", "Zed_master.json", {"number_of_episodes": 3}, ["season", "posts"])
+    ledger.update_unit(run, "season", RunStatus.COMPLETED)
+
+    assert ledger.next_unit(run) == "posts"
+    assert ledger.get_run("Zed", run["run_id"])["units"]["season"]["status"] == RunStatus.COMPLETED
+    assert [listed["run_id"] for listed in ledger.list_runs(incomplete_only=True)] == [run["run_id"]]
+
+    ledger.update_unit(run, "posts", RunStatus.COMPLETED)
+    ledger.finish_run(run, RunStatus.COMPLETED)
+    assert ledger.next_unit(run) is None
+    assert ledger.list_runs("Zed", incomplete_only=True) == []
+    assert ledger.get_run("Zed", "missing") is None
+
+def test_resume_commits_a_generated_season_without_calling_the_llm(tmp_path):
+    master_file_path = make_master(tmp_path)
+    ledger = RunLedger(str(tmp_path / "runs"))
+
+    # the process stopped after the season was generated, before it was saved
+    run = ledger.start_run("Zed", master_file_path, {"number_of_episodes": 1}, ["season"])
+    ledger.update_unit(run, "season", RunStatus.GENERATED, season_data=make_season(1))
+
+    resumed = run_content_units(NoCallModel(), master_file_path, ["season"], {}, run_id=run["run_id"], ledger=ledger)
+
+    assert resumed["status"] == RunStatus.COMPLETED
+    assert [season["season_name"] for season in load_seasons(master_file_path)] == ["Season 1"]
+
+def test_resume_does_not_add_a_saved_season_twice(tmp_path):
+    master_file_path = make_master(tmp_path)
+    ledger = RunLedger(str(tmp_path / "runs"))
+    run = ledger.start_run("Zed", master_file_path, {"number_of_episodes": 1}, ["season"])
+    ledger.update_unit(run, "season", RunStatus.GENERATED, season_data=make_season(1))
+    run_content_units(NoCallModel(), master_file_path, ["season"], {}, run_id=run["run_id"], ledger=ledger)
+
+    # the process stopped after the season was saved, before the unit was completed
+    ledger.update_unit(run, "season", RunStatus.GENERATED)
+    ledger.finish_run(run, RunStatus.FAILED, "stopped")
+    resumed = run_content_units(NoCallModel(), master_file_path, ["season"], {}, run_id=run["run_id"], ledger=ledger)
+
+    assert resumed["status"] == RunStatus.COMPLETED
+    assert len(load_seasons(master_file_path)) == 1
+
+def test_a_new_run_is_passed_to_on_start(tmp_path):
+    master_file_path = make_master(tmp_path)
+    ledger = RunLedger(str(tmp_path / "runs"))
+    started = []
+
+    run = run_content_units(NoCallModel(), master_file_path, [], {}, ledger=ledger, on_start=started.append)
+
+    assert [started_run["run_id"] for started_run in started] == [run["run_id"]]
+    assert run["status"] == RunStatus.COMPLETED
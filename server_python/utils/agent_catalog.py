@@ -0,0 +1,582 @@
+#
+# Module: agent_catalog
+#
+# This module implements the AgentCatalog class, an in-memory index of the agent master files.
+#
+# Title: Agent Catalog
+# Summary: Agent catalog implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-24
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-24
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import glob
+import json
+import base64
+import fnmatch
+import threading
+
+# watchdog is optional, without it the catalog falls back to stat checks
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+MASTER_FILE_PATTERN = "*master*.json"
+
+class _CatalogEventHandler(FileSystemEventHandler):
+    """Forwards file system events for master files to the catalog."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            # directory moves/deletes can add or remove many files at once
+            if event.event_type in ("moved", "deleted"):
+                self.catalog.mark_full_scan()
+            return
+
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and is_master_file(path):
+                self.catalog.mark_dirty(path)
+
+class AgentCatalog:
+    """
+    Description:
+        Process-wide in-memory index of the agent master files. Each master
+        file is loaded once and only re-read when its modification time or
+        size changes. Listings can be served from the agent summaries that
+        are precomputed when an agent is saved, in which case the master
+        files are never parsed. When watchdog is available the catalog
+        listens for file system events and only re-checks the files that
+        changed, otherwise it stats every known file on each listing.
+
+        The returned agent data is shared between callers and must not be
+        mutated.
+
+    Attributes:
+        config_dir (str): the directory containing the agent configurations
+        stats (dict): hit, miss, reload and removal counters
+    """
+
+    def __init__(self, config_dir="configs", use_watcher=True):
+        """Initialize the AgentCatalog class.
+
+        Args:
+            config_dir (str): the directory containing the agent configurations
+            use_watcher (bool): whether to use watchdog to track file changes
+
+        Example:
+            >>> catalog = AgentCatalog("configs")
+        """
+        self.config_dir = config_dir
+        self.use_watcher = use_watcher and Observer is not None
+        self.entries = {}
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "reloads": 0,
+            "removals": 0,
+            "summary_hits": 0,
+            "data_loads": 0,
+            "full_scans": 0,
+            "errors": 0,
+        }
+        self._lock = threading.RLock()
+        self._dirty = set()
+        self._needs_full_scan = True
+        self._observer = None
+
+    # -------------------------------------------------------------------
+    # Helpers to track file system changes
+    # -------------------------------------------------------------------
+    def mark_dirty(self, path: str):
+        """Marks a master file as changed so it is re-checked on the next listing.
+
+        Args:
+            path (str): path to the master file
+        """
+        with self._lock:
+            self._dirty.add(catalog_key(path))
+
+    def mark_full_scan(self):
+        """Forces a full scan of the configs directory on the next listing."""
+        with self._lock:
+            self._needs_full_scan = True
+
+    def invalidate(self, path: str):
+        """Drops a master file from the catalog, it is reloaded on next access.
+
+        Args:
+            path (str): path to the master file
+        """
+        with self._lock:
+            self.entries.pop(catalog_key(path), None)
+            self._dirty.add(catalog_key(path))
+
+    def _start_watcher(self):
+        """Starts the watchdog observer once the configs directory exists."""
+        if not self.use_watcher or self._observer is not None or not os.path.isdir(self.config_dir):
+            return
+
+        try:
+            observer = Observer()
+            observer.schedule(_CatalogEventHandler(self), self.config_dir, recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            print(f"[AgentCatalog] - Watching {self.config_dir} for changes")
+        except Exception as e:
+            print(f"[AgentCatalog] - Could not start file watcher, using stat checks: {str(e)}")
+            self.use_watcher = False
+
+    def stop(self):
+        """Stops the watchdog observer."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    # -------------------------------------------------------------------
+    # Helpers to load master files
+    # -------------------------------------------------------------------
+    def _check_file(self, path: str) -> str:
+        """Brings the summary of a single master file up to date.
+
+        The summary is taken from the summary file written when the agent was
+        saved. The master file itself is only parsed when that summary is
+        missing or stale, and its full data is loaded lazily.
+
+        Returns:
+            str: "unchanged", "loaded", "removed" or "error"
+        """
+        signature = file_signature(path)
+        entry = self.entries.get(path)
+
+        if signature is None:
+            if entry is not None:
+                del self.entries[path]
+                self.stats["removals"] += 1
+                return "removed"
+            return "unchanged"
+
+        if entry is not None and entry["signature"] == signature:
+            return "unchanged"
+
+        data = None
+        summary = load_agent_summary(path, signature)
+        if summary is None:
+            try:
+                data = self._read_master(path)
+            except Exception as e:
+                print(f"[AgentCatalog] - Error reading file {path}: {str(e)}")
+                self.stats["errors"] += 1
+                self.entries.pop(path, None)
+                return "error"
+            summary = save_agent_summary(path, data, signature)
+        else:
+            self.stats["summary_hits"] += 1
+
+        if entry is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["reloads"] += 1
+
+        self.entries[path] = {"signature": signature, "summary": summary, "data": data}
+        return "loaded"
+
+    def _read_master(self, path: str) -> dict:
+        """Parses a master file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _ensure_data(self, path: str) -> dict:
+        """Returns the full data of a catalog entry, parsing the master file if needed."""
+        entry = self.entries.get(path)
+        if entry is None:
+            return None
+        if entry["data"] is None:
+            try:
+                entry["data"] = self._read_master(path)
+                self.stats["data_loads"] += 1
+            except Exception as e:
+                print(f"[AgentCatalog] - Error reading file {path}: {str(e)}")
+                self.stats["errors"] += 1
+                return None
+        return entry["data"]
+
+    def refresh(self) -> set:
+        """Brings the catalog up to date with the master files on disk.
+
+        Returns:
+            set: paths that were loaded, reloaded or removed
+        """
+        with self._lock:
+            self._start_watcher()
+            changed = set()
+
+            if self._observer is not None and not self._needs_full_scan:
+                # only the files watchdog reported as changed need checking
+                dirty, self._dirty = self._dirty, set()
+                for path in dirty:
+                    if self._check_file(path) != "unchanged":
+                        changed.add(path)
+                return changed
+
+            pattern = os.path.join(self.config_dir, '**', MASTER_FILE_PATTERN)
+            files = {catalog_key(f) for f in glob.glob(pattern, recursive=True)}
+
+            for path in list(self.entries):
+                if path not in files:
+                    del self.entries[path]
+                    self.stats["removals"] += 1
+                    changed.add(path)
+
+            for path in files:
+                if self._check_file(path) != "unchanged":
+                    changed.add(path)
+
+            self._dirty = set()
+            self._needs_full_scan = False
+            self.stats["full_scans"] += 1
+            return changed
+
+    def _refresh_and_count(self) -> list:
+        """Refreshes the catalog, counts hits and returns the sorted entry paths."""
+        changed = self.refresh()
+        self.stats["hits"] += len([path for path in self.entries if path not in changed])
+        return sorted(self.entries)
+
+    # -------------------------------------------------------------------
+    # Public accessors
+    # -------------------------------------------------------------------
+    def list_characters(self) -> list:
+        """Returns the data of every master file, sorted by file path.
+
+        Returns:
+            list: list of agent master data
+
+        Example:
+            >>> characters = get_agent_catalog().list_characters()
+        """
+        with self._lock:
+            paths = self._refresh_and_count()
+            characters = [self._ensure_data(path) for path in paths]
+            return [data for data in characters if data is not None]
+
+    def list_summaries(self) -> list:
+        """Returns the precomputed summary of every master file, sorted by file path.
+
+        Returns:
+            list: list of agent summaries, see SUMMARY_FIELDS
+
+        Example:
+            >>> summaries = get_agent_catalog().list_summaries()
+        """
+        with self._lock:
+            paths = self._refresh_and_count()
+            return [self.entries[path]["summary"] for path in paths]
+
+    def list_page(self, fields=None, limit=None, cursor=None) -> dict:
+        """Returns one page of the catalog, optionally projected to summary fields.
+
+        Args:
+            fields (list, optional): summary fields to return, None returns the full master data
+            limit (int, optional): maximum number of agents to return, None returns all
+            cursor (str, optional): cursor returned by the previous page
+
+        Returns:
+            dict: characters (list), next_cursor (str or None) and total (int)
+
+        Raises:
+            ValueError: If the cursor or a field is invalid
+
+        Example:
+            >>> page = get_agent_catalog().list_page(fields=["name", "season_count"], limit=50)
+            >>> next_page = get_agent_catalog().list_page(fields=["name"], limit=50, cursor=page["next_cursor"])
+        """
+        if fields is not None:
+            unknown = [field for field in fields if field not in SUMMARY_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        after = catalog_key(decode_cursor(cursor)) if cursor else None
+
+        with self._lock:
+            paths = self._refresh_and_count()
+            total = len(paths)
+            if after is not None:
+                paths = [path for path in paths if path > after]
+
+            next_cursor = None
+            if limit is not None and len(paths) > limit:
+                paths = paths[:limit]
+                next_cursor = encode_cursor(paths[-1])
+
+            if fields is None:
+                characters = [self._ensure_data(path) for path in paths]
+                characters = [data for data in characters if data is not None]
+            else:
+                characters = [
+                    {field: self.entries[path]["summary"].get(field) for field in fields}
+                    for path in paths
+                ]
+
+        return {"characters": characters, "next_cursor": next_cursor, "total": total}
+
+    def get(self, path: str) -> dict:
+        """Returns the data of a single master file.
+
+        Args:
+            path (str): path to the master file
+
+        Returns:
+            dict: the agent master data, or None if the file does not exist
+
+        Example:
+            >>> agent = get_agent_catalog().get("configs/Zorp/Zorp_master.json")
+        """
+        path = catalog_key(path)
+        with self._lock:
+            entry = self.entries.get(path)
+            watched = self._observer is not None and not self._needs_full_scan
+            if entry is None or not watched or path in self._dirty:
+                self._dirty.discard(path)
+                if self._check_file(path) == "unchanged" and path in self.entries:
+                    self.stats["hits"] += 1
+            else:
+                self.stats["hits"] += 1
+
+            return self._ensure_data(path)
+
+    def get_stats(self) -> dict:
+        """Returns the catalog counters.
+
+        Returns:
+            dict: hit, miss, reload and removal counters plus catalog size
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+            stats["entries_with_data"] = len([entry for entry in self.entries.values() if entry["data"] is not None])
+            stats["watching"] = self._observer is not None
+            return stats
+
+# -------------------------------------------------------------------
+# Agent summaries, precomputed whenever an agent is saved
+# -------------------------------------------------------------------
+SUMMARY_FIELDS = ("name", "concept", "profile_image_url", "season_count", "master_file_path")
+
+def catalog_key(path: str) -> str:
+    """Returns the catalog key of a master file, its absolute path.
+
+    Master files are reached through relative paths (the configs scan, API
+    requests) and absolute ones (ContentGenerator), the key is the same for both.
+
+    Args:
+        path (str): path to the master file
+
+    Returns:
+        str: the absolute, normalized path
+    """
+    return os.path.abspath(path)
+
+def file_signature(path: str):
+    """Returns the (mtime, size) signature of a file, or None if it is missing.
+
+    Args:
+        path (str): path to the file
+
+    Returns:
+        list: [mtime in nanoseconds, size in bytes] or None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def is_master_file(path: str) -> bool:
+    """Checks whether a path is an agent master file.
+
+    Args:
+        path (str): path to check
+
+    Returns:
+        bool: True if the file name matches the master file pattern
+    """
+    return fnmatch.fnmatch(os.path.basename(path), MASTER_FILE_PATTERN)
+
+def get_summary_file_path(master_file_path: str) -> str:
+    """Returns the path of the summary file stored beside a master file.
+
+    Args:
+        master_file_path (str): path to the master file
+
+    Returns:
+        str: path to the summary file, e.g. configs/Zorp/Zorp_summary.json
+    """
+    directory, filename = os.path.split(master_file_path)
+    stem = os.path.splitext(filename)[0]
+    if stem.endswith("_master"):
+        stem = stem[:-len("_master")]
+    return os.path.join(directory, f"{stem}_summary.json")
+
+def remove_derived_files(master_file_path: str) -> list:
+    """Removes the files derived from a master file: its summary and its continuity digest.
+
+    Call this when a master file is moved or deleted, so the files it leaves
+    behind do not keep its directory alive.
+
+    Args:
+        master_file_path (str): path to the master file
+
+    Returns:
+        list: the paths that were removed
+    """
+    # imported here, continuity_digest imports this module
+    from utils.continuity_digest import get_continuity_digest_path
+
+    removed = []
+    for path in (get_summary_file_path(master_file_path), get_continuity_digest_path(master_file_path)):
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+def build_agent_summary(master_data: dict, master_file_path: str) -> dict:
+    """Builds the gallery summary of an agent.
+
+    Args:
+        master_data (dict): the agent master data
+        master_file_path (str): path to the master file
+
+    Returns:
+        dict: name, concept, profile_image_url, season_count and master_file_path
+    """
+    agent = master_data.get("agent", {}) if isinstance(master_data, dict) else {}
+    profile_image = agent.get("profile_image") or {}
+    details = profile_image.get("details", {}) if isinstance(profile_image, dict) else {}
+    seasons = [season for season in agent.get("seasons") or [] if season.get("season_number", 0) != 0]
+
+    return {
+        "name": agent.get("agent_details", {}).get("name", ""),
+        "concept": agent.get("concept", ""),
+        "profile_image_url": details.get("url", ""),
+        "season_count": len(seasons),
+        "master_file_path": os.path.normpath(master_file_path),
+    }
+
+def save_agent_summary(master_file_path: str, master_data: dict, signature=None) -> dict:
+    """Precomputes the summary of an agent and saves it beside the master file.
+
+    Call this after writing a master file so listings can serve the summary
+    without parsing the master file.
+
+    Args:
+        master_file_path (str): path to the master file that was just saved
+        master_data (dict): the data that was saved
+        signature (list, optional): signature of the saved master file, read from disk if None
+
+    Returns:
+        dict: the agent summary
+
+    Example:
+        >>> save_agent_summary("configs/Zorp/Zorp_master.json", agent_master_json)
+    """
+    summary = build_agent_summary(master_data, master_file_path)
+    if signature is None:
+        signature = file_signature(master_file_path)
+
+    summary_path = get_summary_file_path(master_file_path)
+    try:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump({"source_signature": signature, "summary": summary}, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"[AgentCatalog] - Error saving summary file {summary_path}: {str(e)}")
+
+    return summary
+
+def agent_saved(master_file_path: str, master_data: dict):
+    """Hook to call after an agent master file has been written.
+
+    Precomputes the agent summary, updates the agent's continuity digest and
+    tells the shared catalog to re-check the file.
+
+    Args:
+        master_file_path (str): path to the master file that was just saved
+        master_data (dict): the data that was saved
+    """
+    # imported here, continuity_digest imports this module
+    from utils.continuity_digest import update_continuity_digest
+
+    save_agent_summary(master_file_path, master_data)
+    update_continuity_digest(master_file_path, master_data)
+    get_agent_catalog().mark_dirty(master_file_path)
+
+def load_agent_summary(master_file_path: str, signature) -> dict:
+    """Loads the saved summary of an agent if it matches the master file on disk.
+
+    Args:
+        master_file_path (str): path to the master file
+        signature (list): current signature of the master file
+
+    Returns:
+        dict: the agent summary, or None if it is missing or stale
+    """
+    try:
+        with open(get_summary_file_path(master_file_path), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except Exception:
+        return None
+
+    if saved.get("source_signature") != list(signature):
+        return None
+    return saved.get("summary")
+
+def encode_cursor(path: str) -> str:
+    """Encodes a catalog position as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(path.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> str:
+    """Decodes a pagination cursor.
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    try:
+        path = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not path:
+        raise ValueError("Invalid cursor")
+    return path
+
+# Process-wide catalog shared by all API handlers
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_agent_catalog(config_dir="configs") -> AgentCatalog:
+    """Returns the process-wide agent catalog, creating it on first use.
+
+    Args:
+        config_dir (str): the directory containing the agent configurations
+
+    Returns:
+        AgentCatalog: the shared catalog
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = AgentCatalog(config_dir)
+        return _catalog
@@ -0,0 +1,327 @@
+#
+# Module: chat_context
+#
+# This module implements the ChatContextBuilder class for building a bounded chat context.
+#
+# Title: Chat Context
+# Summary: Sliding-window chat context with a rolling summary.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+import json
+import time
+import threading
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from utils.file_locks import file_lock
+from utils.chat_log import get_chat_log
+
+load_dotenv()
+
+# Number of recent turns (a user message and the agent's answer) sent to the model word for word
+CHAT_CONTEXT_RECENT_TURNS = int(os.getenv("CHAT_CONTEXT_RECENT_TURNS", "8"))
+# Token budget of the summary and recent messages in the chat prompt
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "3000"))
+# Token budget of the rolling summary itself
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "600"))
+# Number of messages that must fall out of the recent window before they are summarized
+CHAT_SUMMARY_BATCH_MESSAGES = int(os.getenv("CHAT_SUMMARY_BATCH_MESSAGES", "8"))
+
+SUMMARY_PROMPT_KEY = "prompt_5_summary (Summarize the chat)"
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens of a text, about 4 characters per token.
+
+    Args:
+        text (str): the text
+
+    Returns:
+        int: the estimated number of tokens
+
+    Example:
+        >>> estimate_tokens("What is your name?")
+        5
+    """
+    return (len(text or "") + 3) // 4
+
+def get_chat_summary_path(chat_log_path: str) -> str:
+    """Returns the path of the summary file kept beside a chat log.
+
+    Args:
+        chat_log_path (str): the path to the chat log, e.g. configs/Zed/Zed_chat_log.json
+
+    Returns:
+        str: the summary path, e.g. configs/Zed/Zed_chat_summary.json
+    """
+    return chat_log_path.replace("_chat_log.json", "_chat_summary.json")
+
+def load_chat_summary(summary_path: str) -> dict:
+    """Loads a rolling chat summary.
+
+    Args:
+        summary_path (str): the path to the summary file
+
+    Returns:
+        dict: the summary text, the conversation it belongs to, the message_id
+            of the last summarized message (-1 when nothing is summarized yet)
+            and the number of updates
+    """
+    try:
+        with open(summary_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"summary": "", "conversation_id": None, "summarized_through": -1, "updates": 0}
+
+class ChatContextBuilder:
+    """
+    Description:
+        Builds the chat history part of the chat prompt with a bounded size.
+        The last recent_turns turns are kept word for word, older messages
+        are folded into a rolling summary stored beside the chat log. The
+        summary is updated after a turn has been answered, in batches of
+        summary_batch_messages, so a chat turn never waits for it. The
+        summary belongs to the chat log's current conversation. The
+        summary and the recent messages together are kept under
+        token_budget, so the prompt, and the latency of a turn, stay flat
+        however long the chat runs.
+
+    Attributes:
+        recent_turns (int): the number of recent turns kept word for word
+        token_budget (int): the token budget of the summary and recent messages
+        summary_max_tokens (int): the token budget of the summary
+        summary_batch_messages (int): the number of old messages summarized at once
+        stats (dict): counters for built contexts, summary updates and dropped messages
+    """
+
+    def __init__(self, recent_turns=CHAT_CONTEXT_RECENT_TURNS, token_budget=CHAT_CONTEXT_TOKEN_BUDGET,
+                 summary_max_tokens=CHAT_SUMMARY_MAX_TOKENS, summary_batch_messages=CHAT_SUMMARY_BATCH_MESSAGES):
+        """Initialize the ChatContextBuilder class.
+
+        Args:
+            recent_turns (int): the number of recent turns kept word for word
+            token_budget (int): the token budget of the summary and recent messages
+            summary_max_tokens (int): the token budget of the summary
+            summary_batch_messages (int): the number of old messages summarized at once
+
+        Example:
+            >>> builder = ChatContextBuilder(recent_turns=4, token_budget=2000)
+        """
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_batch_messages = summary_batch_messages
+        self.stats = {"contexts": 0, "summary_updates": 0, "summary_failures": 0, "trimmed_messages": 0}
+        self._updating = set()
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------
+    # Helpers to build the context
+    # -------------------------------------------------------------------
+    def build(self, chat_history: dict, chat_log_path: str) -> dict:
+        """Builds the bounded chat context of a chat turn.
+
+        Args:
+            chat_history (dict): the chat history, {"chat_history": [messages]}, the
+                whole conversation or only its last messages
+            chat_log_path (str): the path to the chat log, the summary is kept beside it
+
+        Returns:
+            dict: the summary, the recent messages, their estimated tokens and the
+                number of messages left out of the prompt
+
+        Example:
+            >>> context = builder.build(chat_history, "configs/Zed/Zed_chat_log.json")
+            >>> print(context["tokens"])
+        """
+        messages = chat_history.get("chat_history", [])
+        state = load_chat_summary(get_chat_summary_path(chat_log_path))
+
+        # a summary of another conversation, or of a longer one, does not apply to this chat
+        summarized_through = state.get("summarized_through", -1)
+        last_id = messages[-1].get("message_id", len(messages) - 1) if messages else -1
+        if state.get("conversation_id") != get_chat_log(chat_log_path).conversation_id() or summarized_through > last_id:
+            state, summarized_through = {"summary": ""}, -1
+
+        summary = self._clip(state.get("summary", ""), self.summary_max_tokens)
+        budget = self.token_budget - estimate_tokens(summary)
+
+        # newest first: the recent window, then messages not summarized yet, while they fit the budget
+        unsummarized = [message for message in messages if message.get("message_id", 0) > summarized_through]
+        window = 2 * self.recent_turns
+        recent = []
+        tokens = 0
+        for position, message in enumerate(reversed(unsummarized)):
+            message_tokens = estimate_tokens(json.dumps(message))
+            if position >= window or tokens + message_tokens > budget:
+                break
+            recent.append(message)
+            tokens += message_tokens
+        recent.reverse()
+
+        trimmed = len(unsummarized) - len(recent)
+        with self._lock:
+            self.stats["contexts"] += 1
+            self.stats["trimmed_messages"] += trimmed
+
+        return {
+            "summary": summary,
+            "recent_messages": recent,
+            "tokens": tokens + estimate_tokens(summary),
+            "omitted_messages": last_id + 1 - len(recent),
+        }
+
+    def _clip(self, text: str, max_tokens: int) -> str:
+        """Cuts a text to a token budget, keeping its end."""
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        return "..." + text[-max_tokens * 4:]
+
+    # -------------------------------------------------------------------
+    # Helpers to update the rolling summary
+    # -------------------------------------------------------------------
+    def update_summary(self, ai_model, agent_name: str, chat_log_path: str) -> bool:
+        """Folds the messages of the chat log that left the recent window into the rolling summary.
+
+        Nothing is done until summary_batch_messages messages are waiting, so
+        the summary prompt runs once every few turns. At most ten batches are
+        folded at once, older messages are left out of the summary.
+
+        Args:
+            ai_model (ModelInterface): the AI model used to summarize
+            agent_name (str): the agent name
+            chat_log_path (str): the path to the chat log, the summary is kept beside it
+
+        Returns:
+            bool: whether the summary was updated
+        """
+        # imported here, content_generator imports the models package
+        from utils.content_generator import ContentGenerator
+
+        summary_path = get_chat_summary_path(chat_log_path)
+        chat_log = get_chat_log(chat_log_path, agent_name)
+
+        with self._lock:
+            if summary_path in self._updating:
+                return False
+            self._updating.add(summary_path)
+
+        try:
+            state = load_chat_summary(summary_path)
+            conversation_id = chat_log.conversation_id()
+            summarized_through = state.get("summarized_through", -1)
+            if state.get("conversation_id") != conversation_id:
+                state, summarized_through = {"summary": "", "updates": 0}, -1
+
+            # message_ids are positions in the conversation
+            end = chat_log.count() - 2 * self.recent_turns
+            start = max(summarized_through + 1, end - 10 * self.summary_batch_messages)
+            if end - start < self.summary_batch_messages:
+                return False
+            pending = chat_log.read(start, end)
+
+            started = time.perf_counter()
+            result = ContentGenerator().run_prompt(
+                prompt_key=SUMMARY_PROMPT_KEY,
+                template_vars={
+                    "agent_name": agent_name,
+                    "previous_summary": state.get("summary", ""),
+                    "new_messages": json.dumps(pending),
+                    "max_words": self.summary_max_tokens * 3 // 4,
+                },
+                ai_model=ai_model,
+                expected_key="summary"
+            )
+            if not result or not isinstance(result.get("summary"), str):
+                with self._lock:
+                    self.stats["summary_failures"] += 1
+                return False
+
+            new_state = {
+                "summary": self._clip(result["summary"], self.summary_max_tokens),
+                "conversation_id": conversation_id,
+                "summarized_through": end - 1,
+                "updates": state.get("updates", 0) + 1,
+            }
+            with file_lock(summary_path):
+                os.makedirs(os.path.dirname(summary_path) or ".", exist_ok=True)
+                temp_path = summary_path + ".tmp"
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    json.dump(new_state, file, indent=2, ensure_ascii=False)
+                os.replace(temp_path, summary_path)
+
+            with self._lock:
+                self.stats["summary_updates"] += 1
+            print(f"[ChatContextBuilder] - summarized {len(pending)} messages of {agent_name} in {time.perf_counter() - started:.1f}s")
+            return True
+        finally:
+            with self._lock:
+                self._updating.discard(summary_path)
+
+    def update_summary_async(self, ai_model, agent_name: str, chat_log_path: str) -> threading.Thread:
+        """Updates the rolling summary in a background thread, see update_summary.
+
+        Returns:
+            threading.Thread: the started thread
+        """
+        thread = threading.Thread(
+            target=self.update_summary,
+            args=(ai_model, agent_name, chat_log_path),
+            name="chat-summary",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def get_stats(self) -> dict:
+        """Returns the context settings and counters."""
+        with self._lock:
+            return {
+                "recent_turns": self.recent_turns,
+                "token_budget": self.token_budget,
+                "summary_max_tokens": self.summary_max_tokens,
+                **self.stats,
+            }
+
+# -------------------------------------------------------------------
+# Process-wide context builder
+# -------------------------------------------------------------------
+_builder = None
+_builder_lock = threading.Lock()
+
+def get_chat_context_builder() -> ChatContextBuilder:
+    """Returns the process-wide chat context builder.
+
+    Returns:
+        ChatContextBuilder: the shared context builder
+    """
+    global _builder
+    with _builder_lock:
+        if _builder is None:
+            _builder = ChatContextBuilder()
+        return _builder
+
+if __name__ == "__main__":
+    import tempfile
+
+    builder = ChatContextBuilder(recent_turns=2, token_budget=200)
+    chat_history = {"chat_history": []}
+    for turn in range(20):
+        chat_history["chat_history"].append({"role": "user", "prompt": f"question {turn} " * 5, "message_id": 2 * turn})
+        chat_history["chat_history"].append({"role": "Zed", "response": f"answer {turn} " * 5, "message_id": 2 * turn + 1})
+
+    chat_log_path = os.path.join(tempfile.mkdtemp(), "Zed_chat_log.json")
+    context = builder.build(chat_history, chat_log_path)
+    print(f"{len(context['recent_messages'])} recent messages, {context['tokens']} tokens, {context['omitted_messages']} omitted")
@@ -0,0 +1,469 @@
+#
+# Module: chat_log
+#
+# This module implements the ChatLog class for storing chat messages in an append-only JSONL file.
+#
+# Title: Chat Log
+# Summary: Append-only chat log implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+import json
+import uuid
+import threading
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from utils.file_locks import file_lock
+
+load_dotenv()
+
+# The index keeps the byte offset of every CHAT_LOG_INDEX_STRIDE-th message
+CHAT_LOG_INDEX_STRIDE = int(os.getenv("CHAT_LOG_INDEX_STRIDE", "100"))
+# The log is compacted once it holds this many dead records, and more dead than live messages
+CHAT_LOG_COMPACT_MIN_DEAD = int(os.getenv("CHAT_LOG_COMPACT_MIN_DEAD", "500"))
+# Default and maximum number of messages in a page of chat history
+CHAT_HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE_SIZE", "50"))
+CHAT_HISTORY_MAX_PAGE = int(os.getenv("CHAT_HISTORY_MAX_PAGE", "200"))
+
+CHAT_LOG_VERSION = 1
+
+def get_jsonl_path(chat_log_path: str) -> str:
+    """Returns the path of the JSONL log of a chat log, e.g. Zed_chat_log.json -> Zed_chat_log.jsonl."""
+    return os.path.splitext(chat_log_path)[0] + ".jsonl"
+
+def get_index_path(chat_log_path: str) -> str:
+    """Returns the path of the index of a chat log, e.g. Zed_chat_log.json -> Zed_chat_log.idx.json."""
+    return os.path.splitext(chat_log_path)[0] + ".idx.json"
+
+def encode_record(record: dict) -> bytes:
+    """Encodes a record as one JSONL line."""
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+def decode_record(line: bytes):
+    """Decodes a JSONL line, None if it is not a complete JSON object (e.g. a torn write)."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+def new_conversation_id() -> str:
+    """Returns a new conversation id."""
+    return uuid.uuid4().hex[:12]
+
+def is_message(record) -> bool:
+    """Whether a record is a chat message, not the header or a reset marker."""
+    return record is not None and "chat_log_version" not in record and not record.get("reset")
+
+class ChatLog:
+    """
+    Description:
+        Stores the chat history of an agent as an append-only JSONL file, one
+        message per line, so a chat turn writes two lines instead of the
+        whole history. A new conversation appends a reset marker, with a new
+        conversation id, and the messages it starts with, the messages
+        before the marker are dead. A message's message_id is its position
+        in the conversation.
+
+        A small index beside the log keeps the number of live messages and
+        the byte offset of every index_stride-th one, so the last messages or
+        a page of messages are read without scanning the file. The index is
+        rebuilt from the log whenever it does not match the log's size. Once
+        the dead records outnumber the live messages, the log is compacted:
+        rewritten with only the live messages.
+
+        A chat log saved in the old JSON format ({agent}_chat_log.json) is
+        migrated the first time it is opened and kept as .json.bak.
+
+    Attributes:
+        chat_log_path (str): the path of the old JSON chat log, the log and index are kept beside it
+        jsonl_path (str): the path of the JSONL log
+        index_path (str): the path of the index
+        index_stride (int): the number of messages between two indexed offsets
+        compact_min_dead (int): the number of dead records that allow a compaction
+    """
+
+    def __init__(self, chat_log_path: str, agent_name: str = "", index_stride=CHAT_LOG_INDEX_STRIDE,
+                 compact_min_dead=CHAT_LOG_COMPACT_MIN_DEAD):
+        """Initialize the ChatLog class.
+
+        Args:
+            chat_log_path (str): the path of the JSON chat log, e.g. configs/Zed/Zed_chat_log.json
+            agent_name (str, optional): the agent name written in the header of a new log
+            index_stride (int): the number of messages between two indexed offsets
+            compact_min_dead (int): the number of dead records that allow a compaction
+
+        Example:
+            >>> chat_log = ChatLog("configs/Zed/Zed_chat_log.json", "Zed")
+        """
+        self.chat_log_path = chat_log_path
+        self.jsonl_path = get_jsonl_path(chat_log_path)
+        self.index_path = get_index_path(chat_log_path)
+        self.agent_name = agent_name
+        self.index_stride = max(1, index_stride)
+        self.compact_min_dead = compact_min_dead
+        self.stats = {"appends": 0, "resets": 0, "compactions": 0, "index_rebuilds": 0, "migrations": 0}
+        self._index = None
+
+    # -------------------------------------------------------------------
+    # Helpers to open the log and keep the index
+    # -------------------------------------------------------------------
+    def _open(self):
+        """Creates or migrates the log and loads an index matching it. Call with the file lock held."""
+        if not os.path.exists(self.jsonl_path):
+            if os.path.exists(self.chat_log_path):
+                self._migrate()
+            else:
+                self._write_log([])
+
+        size = os.path.getsize(self.jsonl_path)
+        if self._index is not None and self._index["size"] == size:
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+            if index.get("size") == size and index.get("index_stride") == self.index_stride:
+                self._index = index
+                self.agent_name = index.get("agent_name", self.agent_name)
+                return
+        except (OSError, ValueError):
+            pass
+
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        """Scans the log and writes a new index. Torn lines are counted as dead records."""
+        index = {"index_stride": self.index_stride, "agent_name": self.agent_name, "conversation_id": "",
+                 "count": 0, "offsets": [], "dead": 0, "size": 0}
+        offset = 0
+        with open(self.jsonl_path, 'rb') as file:
+            for line in file:
+                record = decode_record(line)
+                if record is not None and "chat_log_version" in record:
+                    index["agent_name"] = self.agent_name = record.get("agent_name", self.agent_name)
+                    index["conversation_id"] = record.get("conversation_id", "")
+                elif record is not None and record.get("reset"):
+                    index["conversation_id"] = record.get("conversation_id", "")
+                    index["dead"] += index["count"] + 1
+                    index["count"] = 0
+                    index["offsets"] = []
+                elif record is None:
+                    index["dead"] += 1
+                else:
+                    if index["count"] % self.index_stride == 0:
+                        index["offsets"].append(offset)
+                    index["count"] += 1
+                offset += len(line)
+        index["size"] = offset
+
+        self._index = index
+        self._save_index()
+        self.stats["index_rebuilds"] += 1
+
+    def _save_index(self):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self._index, file)
+        os.replace(temp_path, self.index_path)
+
+    def _write_log(self, messages: list, conversation_id: str = None):
+        """Writes a new log with a header and the messages, replacing any log in place."""
+        os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+        temp_path = self.jsonl_path + ".tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(encode_record({
+                "chat_log_version": CHAT_LOG_VERSION,
+                "agent_name": self.agent_name,
+                "conversation_id": conversation_id or new_conversation_id(),
+            }))
+            for message in messages:
+                file.write(encode_record(message))
+        os.replace(temp_path, self.jsonl_path)
+        self._index = None
+
+    def _migrate(self):
+        """Converts a chat log in the old JSON format and keeps the old file as .json.bak.
+
+        Each message is stamped with its position as message_id, which pages
+        and chat turns rely on.
+        """
+        with open(self.chat_log_path, 'r', encoding='utf-8') as file:
+            chat_history = json.load(file)
+
+        self.agent_name = chat_history.get("agent_name") or self.agent_name
+        messages = [{**message, "message_id": position} for position, message in enumerate(chat_history.get("chat_history", []))]
+        self._write_log(messages)
+        os.replace(self.chat_log_path, self.chat_log_path + ".bak")
+        self.stats["migrations"] += 1
+        print(f"[ChatLog] - migrated {len(messages)} messages from {self.chat_log_path} to {self.jsonl_path}")
+
+    def _append_records(self, records: list):
+        """Appends records to the log and updates the index. Call with the file lock held."""
+        index = self._index
+        data = bytearray()
+
+        # a torn last line from a crash (already counted as dead) must not swallow the next record
+        if index["size"]:
+            with open(self.jsonl_path, 'rb') as file:
+                file.seek(index["size"] - 1)
+                if file.read(1) != b"\n":
+                    data += b"\n"
+
+        for record in records:
+            offset = index["size"] + len(data)
+            if record.get("reset"):
+                index["conversation_id"] = record.get("conversation_id", "")
+                index["dead"] += index["count"] + 1
+                index["count"] = 0
+                index["offsets"] = []
+            else:
+                if index["count"] % self.index_stride == 0:
+                    index["offsets"].append(offset)
+                index["count"] += 1
+            data += encode_record(record)
+
+        with open(self.jsonl_path, 'ab') as file:
+            file.write(data)
+        index["size"] += len(data)
+        self._save_index()
+
+    # -------------------------------------------------------------------
+    # Reading and writing messages
+    # -------------------------------------------------------------------
+    def count(self) -> int:
+        """Returns the number of live messages."""
+        with file_lock(self.jsonl_path):
+            self._open()
+            return self._index["count"]
+
+    def append(self, messages: list):
+        """Appends messages to the current conversation.
+
+        Args:
+            messages (list): the messages
+
+        Example:
+            >>> chat_log.append([{"role": "user", "prompt": "Hi", "message_id": 0}])
+        """
+        with file_lock(self.jsonl_path):
+            self._open()
+            self._append_records(list(messages))
+            self.stats["appends"] += 1
+            self._compact_if_needed()
+
+    def reset(self, messages: list = None):
+        """Starts a new conversation, optionally with some messages.
+
+        Args:
+            messages (list, optional): the messages the new conversation starts with
+        """
+        with file_lock(self.jsonl_path):
+            self._open()
+            self._append_records([{"reset": True, "conversation_id": new_conversation_id()}] + list(messages or []))
+            self.stats["resets"] += 1
+            self._compact_if_needed()
+
+    def read(self, start: int = 0, end: int = None) -> list:
+        """Returns the live messages from position start up to, not including, end.
+
+        Only the part of the log from the indexed offset before start is read.
+        A message without a message_id gets its position.
+
+        Args:
+            start (int): the position of the first message
+            end (int, optional): the position after the last message, the end of the log if None
+
+        Returns:
+            list: the messages
+
+        Example:
+            >>> last_ten = chat_log.read(chat_log.count() - 10)
+        """
+        with file_lock(self.jsonl_path):
+            self._open()
+            index = self._index
+            end = index["count"] if end is None else min(end, index["count"])
+            start = max(0, start)
+            if start >= end:
+                return []
+
+            block = start // self.index_stride
+            position = block * self.index_stride
+            messages = []
+            with open(self.jsonl_path, 'rb') as file:
+                file.seek(index["offsets"][block])
+                for line in file:
+                    record = decode_record(line)
+                    if not is_message(record):
+                        continue
+                    if position >= start:
+                        # logs migrated before messages were stamped have no message_id
+                        record.setdefault("message_id", position)
+                        messages.append(record)
+                    position += 1
+                    if position >= end:
+                        break
+            return messages
+
+    def tail(self, limit: int) -> list:
+        """Returns the last limit live messages."""
+        with file_lock(self.jsonl_path):
+            return self.read(self.count() - limit)
+
+    def conversation_id(self) -> str:
+        """Returns the id of the current conversation, it changes when the log is reset."""
+        with file_lock(self.jsonl_path):
+            self._open()
+            return self._index.get("conversation_id", "")
+
+    def page(self, before: int = None, limit: int = CHAT_HISTORY_PAGE_SIZE) -> dict:
+        """Returns a page of the conversation, counting back from the newest message.
+
+        Args:
+            before (int, optional): only messages with a message_id lower than before, the newest if None
+            limit (int): the maximum number of messages, capped by CHAT_HISTORY_MAX_PAGE
+
+        Returns:
+            dict: the messages, oldest first, the total number of messages and
+                next_before, the cursor of the previous page (None on the first page)
+
+        Example:
+            >>> page = chat_log.page(limit=20)
+            >>> older = chat_log.page(before=page["next_before"], limit=20)
+        """
+        limit = max(1, min(limit, CHAT_HISTORY_MAX_PAGE))
+        with file_lock(self.jsonl_path):
+            total = self.count()
+            end = total if before is None else max(0, min(before, total))
+            start = max(0, end - limit)
+            return {
+                "chat_history": self.read(start, end),
+                "total": total,
+                "next_before": start if start > 0 else None,
+            }
+
+    def to_chat_history(self) -> dict:
+        """Returns the conversation in the chat log template format.
+
+        Returns:
+            dict: {"agent_name", "chat_history": [messages]}
+        """
+        with file_lock(self.jsonl_path):
+            messages = self.read()
+            return {"agent_name": self.agent_name, "chat_history": messages}
+
+    def save_chat_history(self, chat_history: dict):
+        """Saves a chat history, appending only the messages the log does not have yet.
+
+        chat_history may hold the whole conversation or only its last
+        messages, as long as the first message_id is not past the end of the
+        log. If the log's conversation does not lead to chat_history (e.g. the
+        client started a new chat), the log is reset to chat_history.
+
+        Args:
+            chat_history (dict): {"chat_history": [messages]}
+
+        Example:
+            >>> chat_log.save_chat_history(chat_history)
+        """
+        messages = chat_history.get("chat_history", [])
+        first_id = messages[0].get("message_id", 0) if messages else 0
+        with file_lock(self.jsonl_path):
+            count = self.count()
+            # position in messages of the first message the log does not have
+            new = count - first_id
+            if 0 <= new <= len(messages) and (new == 0 or self.read(count - 1) == [messages[new - 1]]):
+                if new < len(messages):
+                    self.append(messages[new:])
+            else:
+                self.reset(messages)
+
+    # -------------------------------------------------------------------
+    # Compaction
+    # -------------------------------------------------------------------
+    def _compact_if_needed(self):
+        index = self._index
+        if index["dead"] >= self.compact_min_dead and index["dead"] > index["count"]:
+            self.compact()
+
+    def compact(self):
+        """Rewrites the log with only the live messages and rebuilds the index."""
+        with file_lock(self.jsonl_path):
+            self._open()
+            dead = self._index["dead"]
+            self._write_log(self.read(), self._index.get("conversation_id"))
+            self._rebuild_index()
+            self.stats["compactions"] += 1
+            print(f"[ChatLog] - compacted {self.jsonl_path}, dropped {dead} dead records")
+
+    def get_stats(self) -> dict:
+        """Returns the live and dead record counts, the log size and the counters."""
+        with file_lock(self.jsonl_path):
+            self._open()
+            return {"count": self._index["count"], "dead": self._index["dead"], "size": self._index["size"], **self.stats}
+
+# -------------------------------------------------------------------
+# Process-wide chat logs
+# -------------------------------------------------------------------
+_chat_logs = {}
+_chat_logs_lock = threading.Lock()
+
+def get_chat_log(chat_log_path: str, agent_name: str = "") -> ChatLog:
+    """Returns the shared ChatLog of a chat log path, so its index stays in memory.
+
+    Args:
+        chat_log_path (str): the path of the JSON chat log, e.g. configs/Zed/Zed_chat_log.json
+        agent_name (str, optional): the agent name written in the header of a new log
+
+    Returns:
+        ChatLog: the chat log
+
+    Example:
+        >>> get_chat_log("configs/Zed/Zed_chat_log.json", "Zed").tail(10)
+    """
+    key = os.path.abspath(chat_log_path)
+    with _chat_logs_lock:
+        if key not in _chat_logs:
+            _chat_logs[key] = ChatLog(chat_log_path, agent_name)
+        return _chat_logs[key]
+
+def chat_log_exists(chat_log_path: str) -> bool:
+    """Whether a chat log exists, in the JSONL or the old JSON format."""
+    return os.path.exists(get_jsonl_path(chat_log_path)) or os.path.exists(chat_log_path)
+
+def migrate_chat_logs(configs_dir: str = "configs") -> int:
+    """Migrates every chat log in the old JSON format under configs_dir.
+
+    Args:
+        configs_dir (str): the agents config directory
+
+    Returns:
+        int: the number of migrated chat logs
+    """
+    migrated = 0
+    for root, _, files in os.walk(configs_dir):
+        for name in files:
+            if name.endswith("_chat_log.json"):
+                chat_log_path = os.path.join(root, name)
+                if not os.path.exists(get_jsonl_path(chat_log_path)):
+                    get_chat_log(chat_log_path).count()
+                    migrated += 1
+    return migrated
+
+if __name__ == "__main__":
+    # One-time migration of the chat logs of every agent
+    print(f"Migrated {migrate_chat_logs()} chat logs")
@@ -0,0 +1,106 @@
+#
+# Module: checkpoint_journal
+#
+# This module implements the CheckpointJournal class for resuming interrupted generation runs.
+#
+# Title: Checkpoint Journal
+# Summary: Append-only checkpoint journal implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+import threading
+
+class CheckpointJournal:
+    """
+    Description:
+        An append-only JSON Lines file of completed steps of a generation run.
+        Each LLM result is appended and flushed to disk as soon as it arrives,
+        so a run that crashes can be resumed without paying for the completed
+        LLM calls again. Every record carries the run key, records written
+        for another run (e.g. a different season) are ignored.
+
+    Attributes:
+        path (str): the path to the journal file
+        run_key (str): identifies the run the records belong to
+    """
+
+    def __init__(self, path: str, run_key: str):
+        """Initialize the CheckpointJournal class.
+
+        Args:
+            path (str): the path to the journal file
+            run_key (str): identifies the run the records belong to
+
+        Example:
+            >>> journal = CheckpointJournal("configs/Zorp/Zorp_posts_journal.jsonl", "season-2")
+        """
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Returns the checkpoints of this run.
+
+        A partly written last line, left by a crash during an append, is ignored.
+
+        Returns:
+            dict: step id -> checkpoint data
+
+        Example:
+            >>> completed = journal.load()
+        """
+        checkpoints = {}
+        if not os.path.exists(self.path):
+            return checkpoints
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("run_key") == self.run_key:
+                    checkpoints[record["step"]] = record["data"]
+        return checkpoints
+
+    def append(self, step, data):
+        """Appends a checkpoint and flushes it to disk.
+
+        Args:
+            step (str or int): the id of the completed step, e.g. the episode number
+            data (dict): the result of the step
+
+        Example:
+            >>> journal.append(3, posts_data)
+        """
+        line = json.dumps({"run_key": self.run_key, "step": step, "data": data}, ensure_ascii=False)
+        record = (line + "\n").encode("utf-8")
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a+b") as f:
+                # a torn last line from a crash must not swallow this record
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        record = b"\n" + record
+                f.write(record)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """Removes the journal once the run has been committed."""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
@@ -6,6 +6,8 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import utils.content_generator as content_generator
 from utils.template_types import TemplateType
+from utils.agent_catalog import agent_saved
+from utils.chat_log import get_chat_log, chat_log_exists
 
 def list_available_seasons(agent_name):
     """List all available seasons for an agent
@@ -124,6 +126,7 @@ def save_agent_master_template(agent_master_template, agent_file_path):
     """
     with open(agent_file_path, 'w', encoding='utf-8') as f:
         json.dump(agent_master_template, f, indent=4)
+    agent_saved(agent_file_path, agent_master_template)
 
 def load_agent_tracker_config(agent_name):
     """Load configuration for the selected agent
@@ -163,8 +166,7 @@ def load_chat_history(agent_name):
         create_new_chat_history_file(agent_name)
     
     chat_history_path = os.path.join("configs", agent_name, f"{agent_name}_chat_log.json")
-    with open(chat_history_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return get_chat_log(chat_history_path, agent_name).to_chat_history()
 
 def create_new_chat_history_file(agent_name):
     """Create a new chat history file for an agent
@@ -173,10 +175,6 @@ def create_new_chat_history_file(agent_name):
         agent_name (str): Name of the agent
     """
     manager = content_generator.ContentGenerator()
-    
-    chat_history = manager.create_new_template_json(TemplateType.CHAT)
-
-    chat_history["agent_name"] = agent_name
 
     agent_chat_file_path = manager.create_filepath(
         agent_name=agent_name, 
@@ -185,10 +183,12 @@ def create_new_chat_history_file(agent_name):
         template_type=TemplateType.CHAT
     )
 
-    manager.save_json_file(
-        save_path=agent_chat_file_path,
-        json_data=chat_history
-    )
+    # an existing log starts a new conversation, a missing one is created empty
+    chat_log = get_chat_log(agent_chat_file_path, agent_name)
+    if chat_log_exists(agent_chat_file_path):
+        chat_log.reset()
+    else:
+        chat_log.count()
 
 def get_chat_history_file_path(agent_name):
     """Get the path to an agent's chat history file
@@ -210,4 +210,4 @@ def check_if_chat_history_exists(agent_name):
     Returns:
         bool: True if chat history exists, False otherwise
     """
-    return os.path.exists(os.path.join("configs", agent_name, f"{agent_name}_chat_log.json"))
\ No newline at end of file
+    return chat_log_exists(os.path.join("configs", agent_name, f"{agent_name}_chat_log.json"))
\ No newline at end of file
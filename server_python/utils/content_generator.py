@@ -17,15 +17,30 @@
 
 # standard imports
 import os
+import re
+import uuid
 import shutil
-import yaml
+import time
+import datetime
 import json
-from jinja2 import Template
 import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # custom ARAI code imports
-from models.base_model import ModelInterface
+from models.base_model import ModelInterface, prompt_key_context, is_error_response, last_model_error
 from utils.template_types import TemplateType
+from utils.agent_catalog import is_master_file, agent_saved
+from utils.prompt_cache import get_prompt_cache
+from utils.template_cache import get_template_cache
+from utils.json_extractor import extract_json
+from utils.retry_policy import get_retry_policy, AttemptError, ErrorClass
+
+# Save the raw and processed LLM responses to configs/temporary for debugging
+SAVE_RESPONSE_ARTIFACTS = os.getenv("SAVE_RESPONSE_ARTIFACTS", "false").lower() in ("1", "true", "yes")
+
+# Debug artifacts are written by a background thread, off the request path
+_artifact_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifacts")
 
 class ContentGenerator:
     """
@@ -85,10 +100,7 @@ class ContentGenerator:
             >>> agent_config = create_new_template_json(TemplateType.MASTER)
             >>> print(agent_config)
         """
-        # 1. Ensure directory exist
-        os.makedirs(self.templates_dir, exist_ok=True)
-
-        # 2. Load the template configuration file
+        # 1. Find the template configuration file
         if template_type == TemplateType.MASTER:
             template_path = self.master_template_path
         elif template_type == TemplateType.TRACKER:
@@ -108,142 +120,107 @@ class ContentGenerator:
         else:
             raise ValueError(f"Invalid template type: {template_type}")
 
-        # 3. Load the template configuration file
-        with open(template_path, "r") as f:
-            template = json.load(f)
-        
-        # 4. Return new configuration
-        return template
+        # 2. Return a fresh copy of the cached template, the templates are
+        # read from disk once per process
+        return get_template_cache(self.templates_dir).get(template_path)
 
     # -------------------------------------------------------------------
-    # Helper to safely parse YAML from the LLM's response
+    # Helper to safely parse JSON from the LLM's response
     # -------------------------------------------------------------------
-    def process_and_save_agent_response(self, response) -> dict:
+    def process_and_save_agent_response(self, response, prompt_key=None, save_artifacts=None) -> dict:
         """Attempts to parse JSON from LLM text. 
+
+        The response is parsed in memory. If save_artifacts is set the raw and
+        processed responses are also written to configs/temporary, in the
+        background and under unique names, so concurrent generations never
+        overwrite each other's files.
         
         Args:
             response (str): the response from the LLM
-            debug (bool, optional): whether to print debug information. Defaults to False.
+            prompt_key (str, optional): the prompt the response is for, used to name the artifacts
+            save_artifacts (bool, optional): whether to save the debug artifacts. Defaults to SAVE_RESPONSE_ARTIFACTS.
 
         Returns:
-            dict: the parsed JSON
-
-        Raises:
-            Exception: If there's an error parsing the JSON
+            dict: the parsed JSON, or None if no JSON could be recovered from the response
 
         Example:
-            >>> response = "```yaml\nname: John Doe\nage: 30\n```"
+            >>> response = "```json\n{\"name\": \"John Doe\", \"age\": 30}\n```"
             >>> parsed = process_and_save_agent_response(response)
             >>> print(parsed)
         """
-        
-        # 1. response = self.fix_yaml_from_response(response, debug)
-        raw_save_path = self.save_raw_response(response)
-        print(f"raw_save_path is: {raw_save_path}")
-
-        # 2. response = self.save_processed_response(response, debug)
-        save_path = self.create_json_from_response(response)       
-        print(f"save_path is: {save_path}")
-
-        # 3. load the yaml file into a dict
-        with open(save_path, "r", encoding="utf-8") as f:
-            try:
-                # 3.1 load the yaml file into a dict
-                response = json.load(f)                               
-            except Exception as e:
-                print(f"process_and_save_agent_response. Error loading json file: {str(e)}")                
-                return None        
-    
-        # 4. Agent directory
-        file_dir = os.path.join(self.agents_config_dir, "temporary")
-        print(f"file_dir is: {file_dir}")
-
-        # 5. Make sure the agent directory exists
-        os.makedirs(file_dir, exist_ok=True)
-
-        # 6. Move files to agent directory                
-        saved_raw_path = self.move_file(raw_save_path, file_dir)
-        saved_processed_path = self.move_file(save_path, file_dir)
-        
-        # 8. return the response
-        return response
+        # 1. strip the markdown code fence from the response
+        processed_response = self.clean_response(response)
+
+        # 2. save the debug artifacts without blocking the caller
+        if save_artifacts is None:
+            save_artifacts = SAVE_RESPONSE_ARTIFACTS
+        if save_artifacts:
+            _artifact_executor.submit(self.save_response_artifacts, response, processed_response, prompt_key)
+
+        # 3. load the json into a dict, skipping any prose around it and
+        # repairing trailing commas, smart quotes and truncated brackets
+        parsed = extract_json(response)
+        if parsed is None:
+            print(f"process_and_save_agent_response. Error loading json: {processed_response[:200]}")
+        return parsed
 
     # -------------------------------------------------------------------
-    # Helper to save the raw response to a file
+    # Helper to strip the markdown code fence from LLM text
     # -------------------------------------------------------------------
-    def save_raw_response(self, response) -> str:
-        """Saves the raw response to a file.
+    def clean_response(self, response) -> str:
+        """Strips the markdown code fence and surrounding whitespace from LLM text.
 
         Args:
             response (str): the response from the LLM
-            debug (bool, optional): whether to print debug information. Defaults to False.
 
         Returns:
-            str: the path to the saved yaml file
-
-        Raises:
-            Exception: If there's an error saving the response
+            str: the response without the code fence
 
         Example:
-            >>> response = "```yaml\nname: John Doe\nage: 30\n```"
-            >>> save_path = save_raw_response(response)
-            >>> print(save_path)
+            >>> clean_response("```json\n{\"name\": \"John Doe\"}\n```")
+            '{"name": "John Doe"}'
         """
-        # 1. create a file to save the response
-        save_path = os.path.join(self.agents_config_dir, "raw_response.json")
-        
-        # 2. Ensure directory exists
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-
-        # 3. Save the response to the file
-        with open(save_path, "w", encoding="utf-8") as f:
-            try:
-                f.write(response)                
-                return save_path
-            except Exception as e:
-                print(f"Error saving raw response to file: {str(e)}")
-                return None
+        return (response or "").replace("```json", "").replace("```", "").strip()
 
     # -------------------------------------------------------------------
-    # Helper to create a yaml file from LLM text
+    # Helper to save the raw and processed responses for debugging
     # -------------------------------------------------------------------
-    def create_json_from_response(self, response) -> str:
-        """Attempts to create a yaml file from LLM text. 
-        
+    def save_response_artifacts(self, response, processed_response, prompt_key=None) -> tuple:
+        """Saves the raw and processed responses to configs/temporary under unique names.
+
         Args:
             response (str): the response from the LLM
+            processed_response (str): the response without the code fence
+            prompt_key (str, optional): the prompt the response is for
 
         Returns:
-            str: the path to the saved yaml file
-
-        Raises:
-            Exception: If there's an error saving the response
+            tuple: the paths to the raw and processed response files
 
         Example:
-            >>> response = "```json\nname: John Doe\nage: 30\n```"
-            >>> save_path = create_json_from_response(response)
-            >>> print(save_path)
+            >>> save_response_artifacts(response, clean_response(response), "prompt_1 (Character Sheet Creation)")
         """
-        # 1. strip out '''yaml and ''' 
-        # remove new lines and leading and trailing whitespace
-        response = response.replace("```json", "").replace("```", "").strip()
-        
-        # 2. create a file to save the response
-        save_path = os.path.join(self.agents_config_dir, "processed_response.json")
+        # 1. build a unique name for this call
+        prompt_name = re.sub(r"[^A-Za-z0-9]+", "_", prompt_key or "response").strip("_")
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_prefix = f"{timestamp}_{prompt_name}_{uuid.uuid4().hex[:8]}"
 
-        # 3. Ensure directory exists
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        # 2. Make sure the temporary directory exists
+        file_dir = os.path.join(self.agents_config_dir, "temporary")
+        os.makedirs(file_dir, exist_ok=True)
 
-        # 4. Save the response to the file
-        with open(save_path, "w", encoding="utf-8") as f:
-            try:                
-                # yaml_string = yaml.dump(response, allow_unicode=True, default_flow_style=False)
-                # f.write(yaml_string)
-                f.write(response)
-            except Exception as e:
-                print(f"Error creating json file from response: {str(e)}")      
+        # 3. Save the responses
+        raw_save_path = os.path.join(file_dir, f"{file_prefix}_raw_response.json")
+        save_path = os.path.join(file_dir, f"{file_prefix}_processed_response.json")
+        try:
+            with open(raw_save_path, "w", encoding="utf-8") as f:
+                f.write(response or "")
+            with open(save_path, "w", encoding="utf-8") as f:
+                f.write(processed_response)
+        except Exception as e:
+            print(f"Error saving response artifacts: {str(e)}")
+            return None, None
 
-        return save_path
+        return raw_save_path, save_path
 
     # -------------------------------------------------------------------
     # Helper to rename file
@@ -411,34 +388,69 @@ class ContentGenerator:
         # 1. Ensure directory exists
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
 
-        # 2. Save the response to the file
-        with open(save_path, "w", encoding="utf-8") as f:
-            try:
+        # 2. Save the response to a temporary file and swap it in, so a crash
+        # never leaves a half written file behind
+        temp_path = f"{save_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
                 # Use json.dump() with the file object, not json.dumps()
                 json.dump(json_data, f, ensure_ascii=False, indent=2)
-                print(f"save_path is: {save_path}")
-                return save_path
-            except Exception as e:
-                print(f"Error saving response to json file: {str(e)}")
-                return None
+            os.replace(temp_path, save_path)
+            print(f"save_path is: {save_path}")
+        except Exception as e:
+            print(f"Error saving response to json file: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        # 3. Precompute the agent summary used by the agent listings
+        if is_master_file(save_path):
+            agent_saved(save_path, json_data)
+
+        return save_path
+
+    # -------------------------------------------------------------------
+    # Helper to render a prompt template
+    # -------------------------------------------------------------------
+    def render_prompt(self, prompt_key, template_vars) -> str:
+        """Renders a prompt template from the chain prompts file.
+
+        Args:
+            prompt_key (str): The key for the prompt template (e.g., "prompt_1", "prompt_2")
+            template_vars (dict): dict of variables to pass to the template
+
+        Returns:
+            str: the rendered prompt text
+
+        Example:
+            >>> prompt_text = render_prompt("prompt_5 (Chat with the agent)", prompt_5_vars)
+            >>> print(prompt_text)
+        """
+        # The chain prompts file is parsed and each prompt compiled once, then
+        # reloaded only when the file changes
+        return get_prompt_cache(self.chain_prompts_path).render(prompt_key, template_vars)
 
     # -------------------------------------------------------------------
     # Generic prompt runner that works with any prompt template
     # -------------------------------------------------------------------
-    def run_prompt(self, prompt_key, template_vars, ai_model, debug=False):
+    def run_prompt(self, prompt_key, template_vars, ai_model, debug=False, expected_key=None):
         """Generic prompt runner that works with any prompt template.
+
+        Failed attempts (provider errors, invalid JSON or a response without
+        the expected key) are retried by the shared retry policy, which
+        classifies the error, honors the provider's Retry-After and backs
+        off with jitter. Permanent errors such as bad credentials are not
+        retried.
         
         Args:
             prompt_key (str): The key for the prompt template (e.g., "prompt_1", "prompt_2")
             template_vars (dict): dict of variables to pass to the template
             ai_model (ModelInterface): The AI model to use for generating responses
             debug (bool, optional): whether to print debug information. Defaults to False.
+            expected_key (str, optional): a key the parsed JSON must have, e.g. "seasons"
 
         Returns:
-            dict: the parsed YAML
-
-        Raises:
-            Exception: If there's an error running the prompt
+            dict: the parsed JSON, or None if every attempt failed
 
         Example:
             >>> prompt_key = "prompt_1"
@@ -447,16 +459,8 @@ class ContentGenerator:
             >>> parsed = run_prompt(prompt_key, template_vars, ai_model, debug=True)
             >>> print(parsed)
         """
-        # 1. Load the chain prompts from the JSON file
-        with open(self.chain_prompts_path, "r", encoding="utf-8") as f:
-            chain_prompts = yaml.safe_load(f)
-
-        # 2. Grab the raw prompt template text
-        prompt_template = chain_prompts[prompt_key]
-
-        # 3. Use Jinja2 to fill placeholders
-        template = Template(prompt_template)
-        prompt_text = template.render(**template_vars)
+        # 1. - 3. Load the prompt template and fill placeholders
+        prompt_text = self.render_prompt(prompt_key, template_vars)
 
         if debug:
             print("--------------------------------")
@@ -467,8 +471,39 @@ class ContentGenerator:
             print (prompt_text)
             print("--------------------------------")
 
-        # 4. Call the LLM
-        response = ai_model.generate_response(prompt_text)
+        try:
+            return get_retry_policy().run(
+                prompt_key,
+                lambda attempt: self.run_prompt_attempt(prompt_key, prompt_text, ai_model, debug, expected_key)
+            )
+        except AttemptError as e:
+            print(f"Error: {prompt_key} failed after {e.attempts} attempt(s) ({e.error_class}): {e.message}")
+            return None
+
+    def run_prompt_attempt(self, prompt_key, prompt_text, ai_model, debug=False, expected_key=None):
+        """Sends a rendered prompt to the LLM once and parses the JSON response.
+
+        Args:
+            prompt_key (str): The key for the prompt template
+            prompt_text (str): The rendered prompt
+            ai_model (ModelInterface): The AI model to use for generating responses
+            debug (bool, optional): whether to print debug information. Defaults to False.
+            expected_key (str, optional): a key the parsed JSON must have
+
+        Returns:
+            dict: the parsed JSON
+
+        Raises:
+            AttemptError: If the model returned an error or the response can not be used
+        """
+        prompt_cache = get_prompt_cache(self.chain_prompts_path)
+
+        # 4. Call the LLM, model wrappers report their metrics under the prompt key
+        started = time.perf_counter()
+        last_model_error.set(None)
+        with prompt_key_context(prompt_key):
+            response = ai_model.generate_response(prompt_text)
+        prompt_cache.record_timing(prompt_key, llm_ms=(time.perf_counter() - started) * 1000)
 
         if debug:
             print("--------------------------------")
@@ -476,8 +511,17 @@ class ContentGenerator:
             print(response)
             print("--------------------------------")
 
-        # # 5. Parse the YAML from the LLM's response
-        json_response = self.process_and_save_agent_response(response)
+        if is_error_response(response):
+            raise AttemptError(str(response or "Empty response"), error=last_model_error.get())
+
+        # 5. Parse the JSON from the LLM's response
+        started = time.perf_counter()
+        json_response = self.process_and_save_agent_response(
+            response,
+            prompt_key=prompt_key,
+            save_artifacts=True if debug else None
+        )
+        prompt_cache.record_timing(prompt_key, parse_ms=(time.perf_counter() - started) * 1000)
 
         if debug:
             print("--------------------------------")
@@ -487,10 +531,13 @@ class ContentGenerator:
             print(f"json_response is a {type(json_response)}")
             print("--------------------------------")
 
-        if json_response is None:
-             # Handle parse error or fallback
-             print(f"Error: LLM returned invalid JSON for {prompt_key}.")
-             return None
+        if json_response is None or (expected_key and not (isinstance(json_response, dict) and expected_key in json_response)):
+            # make sure a retry asks the model again instead of the response cache
+            if hasattr(ai_model, "invalidate"):
+                ai_model.invalidate(prompt_text)
+
+            reason = "invalid JSON" if json_response is None else f"JSON without '{expected_key}'"
+            raise AttemptError(f"LLM returned {reason} for {prompt_key}", error_class=ErrorClass.INVALID_RESPONSE)
 
         # 6. return json_response
         return json_response
@@ -600,6 +647,40 @@ class ContentGenerator:
         
         return result
 
+    def append_episodes_batch(self, master_data: dict, episodes_posts: dict, season_index: int) -> dict:
+        """Adds the posts of several episodes of a season with a single copy of the master data.
+
+        Args:
+            master_data (dict): The master template data
+            episodes_posts (dict): episode index -> posts data, as returned by the posts prompt
+            season_index (int): Index of the season to update
+
+        Returns:
+            dict: Updated master data with the posts of every episode
+        """
+        if isinstance(master_data, str):
+            master_data = json.loads(master_data)
+
+        result = copy.deepcopy(master_data)
+
+        # Validate the nested structure exists
+        if "agent" not in result:
+            result["agent"] = {}
+        if "seasons" not in result["agent"]:
+            result["agent"]["seasons"] = []
+        if season_index >= len(result["agent"]["seasons"]):
+            result["agent"]["seasons"].append({"episodes": []})
+        episodes = result["agent"]["seasons"][season_index].setdefault("episodes", [])
+
+        # Replace the posts array of each episode with the new data
+        for episode_index in sorted(episodes_posts):
+            while episode_index >= len(episodes):
+                episodes.append({})
+            if "posts" in episodes_posts[episode_index]:
+                episodes[episode_index]["posts"] = episodes_posts[episode_index]["posts"]
+
+        return result
+
     def append_profile_image_options(self, master_data: dict, profile_image_data: dict) -> dict:
         """Appends new profile image data to existing master data.
         
@@ -0,0 +1,371 @@
+#
+# Module: continuity_digest
+#
+# This module implements the ContinuityDigest class for keeping a compact digest of an agent's story.
+#
+# Title: Continuity Digest
+# Summary: Incremental story-continuity digest of seasons and episodes.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+import json
+import zlib
+import threading
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from utils.file_locks import file_lock
+from utils.agent_catalog import file_signature
+
+load_dotenv()
+
+# Token budget of the story so far in the season and posts prompts
+CONTINUITY_TOKEN_BUDGET = int(os.getenv("CONTINUITY_TOKEN_BUDGET", "1200"))
+# Number of characters kept of a season or episode summary
+CONTINUITY_SUMMARY_CHARS = int(os.getenv("CONTINUITY_SUMMARY_CHARS", "240"))
+# Number of post highlights kept as the key moments of an episode
+CONTINUITY_KEY_MOMENTS = int(os.getenv("CONTINUITY_KEY_MOMENTS", "3"))
+
+DIGEST_VERSION = 1
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of tokens of a text, about 4 characters per token."""
+    return (len(text or "") + 3) // 4
+
+def get_continuity_digest_path(master_file_path: str) -> str:
+    """Returns the path of the continuity digest kept beside a master file.
+
+    Args:
+        master_file_path (str): the path to the agent master file, e.g. configs/Zed/Zed_master.json
+
+    Returns:
+        str: the digest path, e.g. configs/Zed/Zed_continuity.json
+    """
+    return master_file_path.replace("_master.json", "") + "_continuity.json"
+
+def clip_text(text: str, max_chars: int) -> str:
+    """Cuts a text to max_chars, at the end of a sentence or word when possible.
+
+    Args:
+        text (str): the text
+        max_chars (int): the maximum number of characters
+
+    Returns:
+        str: the clipped text
+
+    Example:
+        >>> clip_text("Zed lands on Mars. He finds a purple umbrella.", 25)
+        'Zed lands on Mars.'
+    """
+    text = " ".join(str(text or "").split())
+    if len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    sentence_end = cut.rfind(". ")
+    if sentence_end >= max_chars // 2:
+        return cut[:sentence_end + 1]
+    word_end = cut.rfind(" ")
+    return (cut[:word_end] if word_end > 0 else cut).rstrip(",;:") + "..."
+
+def signature_of(data) -> str:
+    """Returns a short hash of JSON data, used to find the seasons and episodes that changed."""
+    return f"{zlib.crc32(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')):08x}"
+
+class ContinuityDigest:
+    """
+    Description:
+        A compact digest of an agent's story, kept beside its master file:
+        a short summary and the highlights of every season, and of every
+        episode a short summary and a few key moments taken from its posts.
+        The digest is updated whenever the master file is saved, only the
+        seasons and episodes whose content changed are digested again. The
+        season and posts prompts get the story so far from it instead of
+        whole seasons, so their size stays bounded however many seasons
+        and posts an agent has.
+
+    Attributes:
+        master_file_path (str): the path to the agent master file
+        digest_path (str): the path to the digest file
+        summary_chars (int): the number of characters kept of a summary
+        key_moments (int): the number of key moments kept of an episode
+    """
+
+    def __init__(self, master_file_path: str, summary_chars: int = CONTINUITY_SUMMARY_CHARS,
+                 key_moments: int = CONTINUITY_KEY_MOMENTS):
+        """Initialize the ContinuityDigest class.
+
+        Args:
+            master_file_path (str): the path to the agent master file
+            summary_chars (int): the number of characters kept of a summary
+            key_moments (int): the number of key moments kept of an episode
+
+        Example:
+            >>> digest = ContinuityDigest("configs/Zed/Zed_master.json")
+        """
+        self.master_file_path = master_file_path
+        self.digest_path = get_continuity_digest_path(master_file_path)
+        self.summary_chars = summary_chars
+        self.key_moments = key_moments
+
+    # -------------------------------------------------------------------
+    # Helpers to update the digest
+    # -------------------------------------------------------------------
+    def load(self) -> dict:
+        """Loads the digest, an empty one if it is missing or was written by another version.
+
+        Returns:
+            dict: the source signature of the master file and the digested seasons
+        """
+        try:
+            with open(self.digest_path, 'r', encoding='utf-8') as file:
+                digest = json.load(file)
+            if digest.get("version") == DIGEST_VERSION:
+                return digest
+        except (OSError, ValueError):
+            pass
+        return {"version": DIGEST_VERSION, "source_signature": None, "seasons": []}
+
+    def update(self, master_data: dict, signature=None) -> dict:
+        """Digests the seasons and episodes of the master data that changed since the last update.
+
+        Args:
+            master_data (dict): the agent master data
+            signature (list, optional): the signature of the saved master file, read from disk if None
+
+        Returns:
+            dict: the number of seasons and episodes digested again and removed
+
+        Example:
+            >>> digest.update(agent_master_json)
+            {'seasons': 1, 'episodes': 3, 'removed': 0}
+        """
+        if signature is None:
+            signature = file_signature(self.master_file_path)
+
+        with file_lock(self.digest_path):
+            digest = self.load()
+            old_seasons = {season["season_number"]: season for season in digest["seasons"]}
+            counts = {"seasons": 0, "episodes": 0, "removed": 0}
+
+            seasons = []
+            for season in master_data.get("agent", {}).get("seasons") or []:
+                # season 0 is the empty placeholder of the season template
+                if not season.get("season_number"):
+                    continue
+                seasons.append(self._digest_season(season, old_seasons.get(season["season_number"]), counts))
+
+            counts["removed"] = len(set(old_seasons) - {season["season_number"] for season in seasons})
+            changed = any(counts.values()) or [s["season_number"] for s in seasons] != list(old_seasons)
+
+            digest["seasons"] = seasons
+            digest["source_signature"] = signature
+            if changed:
+                digest["updates"] = digest.get("updates", 0) + 1
+            self._save(digest)
+
+        if changed:
+            with _stats_lock:
+                _stats["updates"] += 1
+                _stats["seasons_digested"] += counts["seasons"]
+                _stats["episodes_digested"] += counts["episodes"]
+        return counts
+
+    def _digest_season(self, season: dict, old: dict, counts: dict) -> dict:
+        """Digests a season, reusing the digest of its unchanged parts."""
+        header = {key: value for key, value in season.items() if key != "episodes"}
+        header_signature = signature_of(header)
+        if old and old.get("signature") == header_signature:
+            entry = {key: value for key, value in old.items() if key != "episodes"}
+        else:
+            counts["seasons"] += 1
+            entry = {
+                "season_number": season.get("season_number"),
+                "season_name": season.get("season_name", ""),
+                "summary": clip_text(season.get("season_summary") or season.get("season_description"), self.summary_chars),
+                "highlights": clip_text(season.get("season_highlights"), self.summary_chars),
+                "signature": header_signature,
+            }
+
+        old_episodes = {episode["episode_number"]: episode for episode in (old or {}).get("episodes", [])}
+        entry["episodes"] = []
+        for episode in season.get("episodes") or []:
+            episode_signature = signature_of(episode)
+            old_episode = old_episodes.get(episode.get("episode_number"))
+            if old_episode and old_episode.get("signature") == episode_signature:
+                entry["episodes"].append(old_episode)
+                continue
+            counts["episodes"] += 1
+            entry["episodes"].append(self._digest_episode(episode, episode_signature))
+        return entry
+
+    def _digest_episode(self, episode: dict, episode_signature: str) -> dict:
+        """Digests an episode: its summary and the highlights of a few posts spread over the episode."""
+        highlights = [post.get("post_highlights") for post in episode.get("posts") or [] if post.get("post_highlights")]
+        if len(highlights) > self.key_moments:
+            step = (len(highlights) - 1) / max(self.key_moments - 1, 1)
+            highlights = [highlights[round(position * step)] for position in range(self.key_moments)]
+        if not highlights and episode.get("episode_highlights"):
+            highlights = [episode["episode_highlights"]]
+
+        return {
+            "episode_number": episode.get("episode_number"),
+            "episode_name": episode.get("episode_name", ""),
+            "summary": clip_text(episode.get("episode_summary") or episode.get("episode_description"), self.summary_chars),
+            "key_moments": [clip_text(highlight, self.summary_chars // 2) for highlight in highlights[:self.key_moments]],
+            "signature": episode_signature,
+        }
+
+    def _save(self, digest: dict):
+        """Writes the digest atomically."""
+        temp_path = self.digest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(digest, file, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.digest_path)
+
+    # -------------------------------------------------------------------
+    # Helpers to render the story so far
+    # -------------------------------------------------------------------
+    def render(self, before_season: int = None, token_budget: int = CONTINUITY_TOKEN_BUDGET, master_data: dict = None) -> str:
+        """Renders the story so far for a prompt, oldest first, within a token budget.
+
+        The latest season is rendered with its episodes, then the first season
+        and the others, newest first, with their summary and highlights. When
+        the budget runs short the older seasons fall back to their summary,
+        then the seasons between the first and the most recent ones are left out.
+
+        Args:
+            before_season (int, optional): only the seasons before this season number, every season if None
+            token_budget (int): the token budget of the rendered text
+            master_data (dict, optional): the agent master data, the digest is updated from it first
+                if the master file changed since the last update
+
+        Returns:
+            str: the story so far, empty if there is no earlier season
+
+        Example:
+            >>> digest.render(before_season=3)
+            'Season 1 - ZedOnMars: ...'
+        """
+        digest = self.load()
+        if master_data is not None and digest.get("source_signature") != file_signature(self.master_file_path):
+            self.update(master_data)
+            digest = self.load()
+
+        seasons = [season for season in digest["seasons"] if before_season is None or season["season_number"] < before_season]
+        if not seasons:
+            return ""
+
+        # the latest season first, then the first season, where the story
+        # started, then the others newest first, each in the longest form
+        # that still fits the budget
+        latest = len(seasons) - 1
+        order = [latest] + ([0] if latest else []) + list(range(latest - 1, 0, -1))
+        blocks = {}
+        tokens = 0
+        for position in order:
+            season = seasons[position]
+            candidates = [self._render_season(season, "detailed")] if position == latest else []
+            candidates += [self._render_season(season, "full"), self._render_season(season, "short")]
+            block = next((text for text in candidates if tokens + estimate_tokens(text) <= token_budget), None)
+            if block is None:
+                break
+            blocks[position] = block
+            tokens += estimate_tokens(block) + 1
+
+        lines = []
+        for position in range(len(seasons)):
+            if position in blocks:
+                lines.append(blocks[position])
+            elif not lines or not lines[-1].startswith("("):
+                left_out = len(seasons) - len(blocks)
+                lines.append(f"({left_out} season{'s' if left_out > 1 else ''} left out)")
+
+        story = "\n".join(lines)
+        with _stats_lock:
+            _stats["renders"] += 1
+            _stats["rendered_tokens"] += estimate_tokens(story)
+        return story
+
+    def _render_season(self, season: dict, form: str) -> str:
+        """Renders a season: its summary when short, with its highlights when full, with its episodes when detailed."""
+        lines = [f"Season {season['season_number']} - {season['season_name']}: {season['summary']}"]
+        if form != "short" and season.get("highlights"):
+            lines[0] += f" Highlights: {season['highlights']}"
+        if form == "detailed":
+            for episode in season.get("episodes", []):
+                line = f"  Episode {episode['episode_number']} - {episode['episode_name']}: {episode['summary']}"
+                if episode.get("key_moments"):
+                    line += f" Key moments: {'; '.join(episode['key_moments'])}"
+                lines.append(line)
+        return "\n".join(lines)
+
+# -------------------------------------------------------------------
+# Module helpers
+# -------------------------------------------------------------------
+_stats = {"updates": 0, "seasons_digested": 0, "episodes_digested": 0, "renders": 0, "rendered_tokens": 0}
+_stats_lock = threading.Lock()
+
+def update_continuity_digest(master_file_path: str, master_data: dict, signature=None):
+    """Hook to call after an agent master file has been written, updates its continuity digest.
+
+    Errors are printed and not raised, a digest that could not be updated is
+    brought up to date the next time it is rendered.
+
+    Args:
+        master_file_path (str): path to the master file that was just saved
+        master_data (dict): the data that was saved
+        signature (list, optional): signature of the saved master file, read from disk if None
+    """
+    try:
+        ContinuityDigest(master_file_path).update(master_data, signature)
+    except Exception as e:
+        print(f"[ContinuityDigest] - Error updating the digest of {master_file_path}: {str(e)}")
+
+def get_story_so_far(master_file_path: str, master_data: dict, before_season: int = None,
+                     token_budget: int = CONTINUITY_TOKEN_BUDGET) -> str:
+    """Returns the story so far of an agent for a prompt, see ContinuityDigest.render.
+
+    Args:
+        master_file_path (str): the path to the agent master file
+        master_data (dict): the agent master data, used if the digest is out of date
+        before_season (int, optional): only the seasons before this season number
+        token_budget (int): the token budget of the rendered text
+
+    Returns:
+        str: the story so far, empty if there is no earlier season
+
+    Example:
+        >>> get_story_so_far("configs/Zed/Zed_master.json", agent_master_json, before_season=2)
+    """
+    return ContinuityDigest(master_file_path).render(before_season, token_budget, master_data)
+
+def get_continuity_stats() -> dict:
+    """Returns the digest counters and the average size of the rendered story so far."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["token_budget"] = CONTINUITY_TOKEN_BUDGET
+    stats["avg_rendered_tokens"] = round(stats["rendered_tokens"] / stats["renders"], 1) if stats["renders"] else 0
+    return stats
+
+if __name__ == "__main__":
+    import glob
+
+    # digest every agent and print the story so far of each one
+    for master_file_path in glob.glob(os.path.join("configs", "*", "*_master.json")):
+        with open(master_file_path, 'r', encoding='utf-8') as file:
+            master_data = json.load(file)
+        print(f"{master_file_path}: {ContinuityDigest(master_file_path).update(master_data)}")
+        print(get_story_so_far(master_file_path, master_data))
@@ -0,0 +1,48 @@
+#
+# Module: file_locks
+#
+# This module implements per-file locks for read-modify-write updates of the agent files.
+#
+# Title: File Locks
+# Summary: Per-file lock implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import threading
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+def file_lock(path: str) -> threading.RLock:
+    """Returns the process-wide lock of a file.
+
+    Steps that can run at the same time (e.g. season creation and profile
+    images) hold the lock of the master file while they load it, merge
+    their results and save it, so neither overwrites the other's changes.
+
+    Args:
+        path (str): the path to the file
+
+    Returns:
+        threading.RLock: the lock, use it as a context manager
+
+    Example:
+        >>> with file_lock(master_file_path):
+        ...     master_data = load(master_file_path)
+        ...     save(master_file_path, merge(master_data, new_data))
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.RLock()
+        return lock
@@ -0,0 +1,414 @@
+#
+# Module: job_queue
+#
+# This module implements the JobQueue class for running long generations in the background.
+#
+# Title: Job Queue
+# Summary: Persistent background job queue implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+import uuid
+import socket
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# the recovery lock is held with fcntl on POSIX and msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# how often a process refreshes the heartbeat of the jobs it owns, and checks for jobs to take over
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+# a job whose heartbeat is older than this is taken over, its owner is assumed to have stopped
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+
+class JobStatus:
+    """This class is used to define the status of a job.
+
+    Attributes:
+        QUEUED (str): the job is waiting for a worker
+        RUNNING (str): the job is running
+        COMPLETED (str): the job finished successfully
+        FAILED (str): the job raised an error or returned no result
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobQueue:
+    """
+    Description:
+        Runs registered job types on a bounded worker pool. Every job is
+        persisted as a JSON file, so jobs that were queued or running when the
+        process stopped are picked up again by recover(). Jobs that share a
+        key (for example the same master file) never run at the same time:
+        they wait in a queue of their key and are handed to the pool one
+        after another, so they never hold a worker while they wait. When
+        several server processes share jobs_dir, only the process holding
+        the recovery lock recovers jobs, so a job is never resumed twice.
+
+        Every unfinished job records the process that owns it and a
+        heartbeat that process refreshes. Recovery only takes over jobs
+        whose owner has exited or stopped refreshing the heartbeat, so a
+        restarted worker never re-runs the jobs of a sibling that is still
+        running them.
+
+    Attributes:
+        jobs_dir (str): the directory the job files are saved to
+        max_workers (int): the maximum number of jobs running at once
+        heartbeat_seconds (float): how often the heartbeat of owned jobs is refreshed
+        stale_seconds (float): the heartbeat age after which a job is taken over
+    """
+
+    def __init__(self, jobs_dir="jobs", max_workers=4, heartbeat_seconds=JOB_HEARTBEAT_SECONDS, stale_seconds=JOB_STALE_SECONDS):
+        """Initialize the JobQueue class.
+
+        Args:
+            jobs_dir (str): the directory the job files are saved to
+            max_workers (int): the maximum number of jobs running at once
+            heartbeat_seconds (float): how often the heartbeat of owned jobs is refreshed
+            stale_seconds (float): the heartbeat age after which a job is taken over
+
+        Example:
+            >>> job_queue = JobQueue("jobs", max_workers=4)
+        """
+        self.jobs_dir = jobs_dir
+        self.max_workers = max_workers
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.runners = {}
+        self.jobs = {}
+        self._lock = threading.RLock()
+        self._active_keys = set()
+        self._pending = {}
+        self._recovery_lock_file = None
+        self._recovering = False
+        self._owner = {"host": socket.gethostname(), "pid": os.getpid(), "instance": uuid.uuid4().hex}
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+    # -------------------------------------------------------------------
+    # Helpers to register and submit jobs
+    # -------------------------------------------------------------------
+    def register(self, job_type: str, runner):
+        """Registers the function that runs a job type.
+
+        The runner is called as runner(job, report_progress) and returns the
+        job result (a JSON serialisable dict), or None if the job failed.
+        report_progress(**progress) merges the given values into the job
+        progress and persists it.
+
+        Args:
+            job_type (str): the name of the job type
+            runner (callable): the function that runs the job
+
+        Example:
+            >>> job_queue.register("season", run_season_job)
+        """
+        self.runners[job_type] = runner
+
+    def submit(self, job_type: str, params: dict, key: str = None) -> dict:
+        """Submits a new job.
+
+        Args:
+            job_type (str): the name of a registered job type
+            params (dict): the job parameters, passed to the runner in job["params"]
+            key (str, optional): jobs with the same key run one after another
+
+        Returns:
+            dict: a copy of the new job
+
+        Raises:
+            ValueError: If the job type is not registered
+
+        Example:
+            >>> job = job_queue.submit("season", {"master_file_path": path}, key=path)
+            >>> print(job["job_id"])
+        """
+        if job_type not in self.runners:
+            raise ValueError(f"Invalid job type: {job_type}")
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "job_type": job_type,
+            "key": key,
+            "status": JobStatus.QUEUED,
+            "params": params,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": self._now(),
+            "started_at": None,
+            "finished_at": None,
+            "owner": None,
+            "heartbeat_at": None,
+        }
+
+        with self._lock:
+            self._claim(job)
+            self.jobs[job["job_id"]] = job
+            self._save(job)
+            self._dispatch(job["job_id"])
+
+        return self.get(job["job_id"])
+
+    def recover(self) -> int:
+        """Loads persisted jobs and re-submits the ones that did not finish.
+
+        Only the first process to call recover() for jobs_dir recovers jobs,
+        it holds the recovery lock until it exits. Other processes (more
+        server workers, or both servers running at once) recover nothing
+        until the lock is free again. Jobs owned by a process that is still
+        running them are left alone, the holder of the recovery lock takes
+        them over if their owner stops.
+
+        Returns:
+            int: the number of jobs re-submitted
+
+        Example:
+            >>> job_queue.recover()
+        """
+        self._recovering = True
+        if not self._acquire_recovery_lock():
+            print(f"[JobQueue] - Another process recovers the jobs of {self.jobs_dir}")
+            return 0
+        return self._recover_jobs()
+
+    def _recover_jobs(self) -> int:
+        """Re-submits the unfinished jobs whose owner has stopped. Call with the recovery lock held.
+
+        Returns:
+            int: the number of jobs re-submitted
+        """
+        resubmitted = 0
+        for filename in sorted(os.listdir(self.jobs_dir)):
+            if not filename.endswith(".json"):
+                continue
+
+            try:
+                with open(os.path.join(self.jobs_dir, filename), "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except Exception as e:
+                print(f"[JobQueue] - Error loading job file {filename}: {str(e)}")
+                continue
+
+            unfinished = job["status"] in (JobStatus.QUEUED, JobStatus.RUNNING)
+            # a job of a live process is read from its file by get(), so it never goes stale here
+            if unfinished and self._owner_alive(job):
+                continue
+
+            with self._lock:
+                if job["job_id"] in self.jobs:
+                    continue
+                self.jobs[job["job_id"]] = job
+
+                if unfinished and job["job_type"] in self.runners:
+                    print(f"[JobQueue] - Resuming {job['job_type']} job {job['job_id']}")
+                    job["status"] = JobStatus.QUEUED
+                    self._claim(job)
+                    self._save(job)
+                    self._dispatch(job["job_id"])
+                    resubmitted += 1
+
+        return resubmitted
+
+    def _owner_alive(self, job: dict) -> bool:
+        """Returns whether the process that owns a job is still running it.
+
+        The owner is alive while its heartbeat is fresh. On the same host an
+        owner whose process has exited is dead at once, without waiting for
+        the heartbeat to go stale.
+        """
+        owner = job.get("owner")
+        if not owner or owner == self._owner:
+            return False
+        try:
+            heartbeat_at = datetime.datetime.fromisoformat(job["heartbeat_at"])
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        age = (datetime.datetime.now(datetime.timezone.utc) - heartbeat_at).total_seconds()
+        if age > self.stale_seconds:
+            return False
+        if owner.get("host") == self._owner["host"] and not self._pid_alive(owner.get("pid")):
+            return False
+        return True
+
+    def _pid_alive(self, pid) -> bool:
+        """Returns whether a process of this host is running."""
+        # os.kill on Windows terminates the process, the heartbeat alone decides there
+        if fcntl is None or not isinstance(pid, int):
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _acquire_recovery_lock(self) -> bool:
+        """Takes the recovery lock of jobs_dir without waiting, it is kept until the process exits.
+
+        Returns:
+            bool: whether this process holds the recovery lock
+        """
+        if self._recovery_lock_file is not None:
+            return True
+
+        lock_file = open(os.path.join(self.jobs_dir, "recover.lock"), "a+")
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._recovery_lock_file = lock_file
+        return True
+
+    # -------------------------------------------------------------------
+    # Public accessors
+    # -------------------------------------------------------------------
+    def get(self, job_id: str) -> dict:
+        """Returns a copy of a job.
+
+        Args:
+            job_id (str): the job id
+
+        Returns:
+            dict: the job, or None if it does not exist
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                return json.loads(json.dumps(job))
+
+        # a job submitted to another server process is read from its file
+        try:
+            with open(os.path.join(self.jobs_dir, f"{os.path.basename(job_id)}.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs and optionally waits for running jobs to finish."""
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+
+    # -------------------------------------------------------------------
+    # Helpers to run and persist jobs
+    # -------------------------------------------------------------------
+    def _dispatch(self, job_id: str):
+        """Hands a job to the pool, or queues it behind the running job with the same key.
+
+        Must be called with self._lock held.
+        """
+        key = self.jobs[job_id]["key"]
+        if key is not None:
+            if key in self._active_keys:
+                self._pending.setdefault(key, deque()).append(job_id)
+                return
+            self._active_keys.add(key)
+        self._executor.submit(self._run, job_id)
+
+    def _release_key(self, key: str):
+        """Hands the next job waiting for a key to the pool, or frees the key."""
+        with self._lock:
+            waiting = self._pending.get(key)
+            if waiting:
+                self._executor.submit(self._run, waiting.popleft())
+                return
+            self._pending.pop(key, None)
+            self._active_keys.discard(key)
+
+    def _run(self, job_id: str):
+        """Runs a job on a worker thread."""
+        with self._lock:
+            job = self.jobs[job_id]
+
+        try:
+            with self._lock:
+                job["status"] = JobStatus.RUNNING
+                job["started_at"] = self._now()
+                job["heartbeat_at"] = job["started_at"]
+                job["attempts"] += 1
+                self._save(job)
+
+            def report_progress(**progress):
+                with self._lock:
+                    job["progress"].update(progress)
+                    self._save(job)
+
+            try:
+                result = self.runners[job["job_type"]](self.get(job_id), report_progress)
+                error = None if result is not None else "Job returned no result"
+            except Exception as e:
+                print(f"[JobQueue] - {job['job_type']} job {job_id} failed: {str(e)}")
+                result, error = None, str(e)
+
+            with self._lock:
+                job["status"] = JobStatus.COMPLETED if error is None else JobStatus.FAILED
+                job["result"] = result
+                job["error"] = error
+                job["finished_at"] = self._now()
+                self._save(job)
+        finally:
+            if job["key"] is not None:
+                self._release_key(job["key"])
+
+    def _claim(self, job: dict):
+        """Makes this process the owner of a job. Call with self._lock held."""
+        job["owner"] = dict(self._owner)
+        job["heartbeat_at"] = self._now()
+
+    def _heartbeat_loop(self):
+        """Refreshes the heartbeat of the unfinished jobs this process owns, and takes over stopped ones."""
+        while not self._stopped.wait(self.heartbeat_seconds):
+            try:
+                with self._lock:
+                    for job in self.jobs.values():
+                        if job["status"] in (JobStatus.QUEUED, JobStatus.RUNNING) and job.get("owner") == self._owner:
+                            job["heartbeat_at"] = self._now()
+                            self._save(job)
+
+                # the holder of the recovery lock takes over the jobs of processes that stopped since,
+                # and the lock passes to another process when its holder exits
+                if self._recovering and self._acquire_recovery_lock():
+                    self._recover_jobs()
+            except Exception as e:
+                print(f"[JobQueue] - Error refreshing job heartbeats: {str(e)}")
+
+    def _save(self, job: dict):
+        """Atomically writes a job to its JSON file."""
+        path = os.path.join(self.jobs_dir, f"{job['job_id']}.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    def _now(self) -> str:
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()
@@ -0,0 +1,316 @@
+#
+# Module: json_extractor
+#
+# This module implements the JsonExtractor class for pulling JSON out of LLM responses.
+#
+# Title: JSON Extractor
+# Summary: Tolerant JSON extractor implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import sys
+import json
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI code imports
+from models.base_model import is_error_response
+
+# smart quotes models sometimes use as JSON string delimiters
+SMART_DOUBLE_QUOTES = "“”„‟"
+
+# how many cut points to try when closing a truncated response
+MAX_TRUNCATION_CUTS = 8
+
+# how many { or [ positions to try when the prose before the JSON has brackets too
+MAX_START_POSITIONS = 8
+
+class JsonExtractor:
+    """
+    Description:
+        Finds the JSON object or array in an LLM response, ignoring any
+        prose or markdown around it, even when the prose has brackets of its
+        own (e.g. "Season [1]: {...}"), and repairs the defects
+        models commonly produce: trailing commas, smart quotes used as string
+        delimiters and responses cut off before the closing brackets.
+
+        Every response that the old strip-the-fence-and-parse approach could
+        not read, but this extractor can, is one paid LLM retry saved. The
+        counters in stats show how often that happens.
+
+    Attributes:
+        stats (dict): counters for each parse outcome and repair
+    """
+
+    def __init__(self):
+        """Initialize the JsonExtractor class.
+
+        Example:
+            >>> extractor = JsonExtractor()
+        """
+        self.stats = {
+            "clean": 0,             # parsed as is
+            "extracted": 0,         # parsed after removing surrounding prose
+            "repaired": 0,          # parsed after repairing the JSON
+            "failed": 0,            # no JSON could be recovered
+            "error_responses": 0,   # the model wrapper returned an error message
+            "repairs": {"trailing_commas": 0, "smart_quotes": 0, "truncated": 0},
+        }
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------
+    # Helpers to extract JSON
+    # -------------------------------------------------------------------
+    def extract(self, text):
+        """Extracts the first JSON object or array from LLM text.
+
+        Args:
+            text (str): the response from the LLM
+
+        Returns:
+            dict or list: the parsed JSON, or None if no JSON could be recovered
+
+        Example:
+            >>> extractor.extract('Sure! Here it is: {"name": "Zorp", "age": 3,} Enjoy!')
+            {'name': 'Zorp', 'age': 3}
+        """
+        # 1. Error messages from the model wrappers are never JSON
+        if is_error_response(text):
+            self._count("error_responses")
+            return None
+
+        # 2. The common case, the response is only JSON in a code fence
+        stripped = text.replace("```json", "").replace("```", "").strip()
+        try:
+            parsed = json.loads(stripped, strict=False)
+            self._count("clean")
+            return parsed
+        except json.JSONDecodeError:
+            pass
+
+        # 3. Try each balanced object or array in the text, repairing it if needed.
+        # Prose like "Season [1]:" parses as a list, so an object found later wins
+        fallback = None
+        position = 0
+        for _ in range(MAX_START_POSITIONS):
+            start = self._find_start(stripped, position)
+            if start == -1:
+                break
+
+            candidate, complete = self._balanced_slice(stripped, start)
+            parsed, outcome, repairs = self._parse_candidate(candidate, complete)
+            if isinstance(parsed, dict):
+                self._count(outcome, repairs)
+                return parsed
+            if parsed is not None and fallback is None:
+                fallback = (parsed, outcome, repairs)
+
+            # skip past a balanced candidate, so nested brackets are not tried on their own
+            position = start + len(candidate) if complete else start + 1
+
+        if fallback is None:
+            self._count("failed")
+            return None
+
+        parsed, outcome, repairs = fallback
+        self._count(outcome, repairs)
+        return parsed
+
+    def get_stats(self) -> dict:
+        """Returns the parse outcome counters.
+
+        Returns:
+            dict: the counters, plus retries_saved (responses only this extractor could read)
+        """
+        with self._lock:
+            stats = json.loads(json.dumps(self.stats))
+        stats["retries_saved"] = stats["extracted"] + stats["repaired"]
+        return stats
+
+    def _count(self, outcome: str, repairs=()):
+        with self._lock:
+            self.stats[outcome] += 1
+            for repair in repairs:
+                self.stats["repairs"][repair] += 1
+
+    def _find_start(self, text: str, position: int = 0) -> int:
+        """Returns the index of the first { or [ from position, or -1 if there is none."""
+        starts = [index for index in (text.find("{", position), text.find("[", position)) if index != -1]
+        return min(starts) if starts else -1
+
+    def _parse_candidate(self, candidate: str, complete: bool):
+        """Parses a candidate as is, then repaired.
+
+        Returns:
+            tuple: the parsed JSON (or None), the outcome to count and the list of repairs made
+        """
+        if complete:
+            try:
+                return json.loads(candidate, strict=False), "extracted", []
+            except json.JSONDecodeError:
+                pass
+
+        parsed, repairs = self._repair(candidate)
+        return parsed, "repaired", repairs
+
+    def _balanced_slice(self, text: str, start: int):
+        """Returns the text from start to the bracket that closes it.
+
+        Returns:
+            tuple: the slice, and whether the closing bracket was found
+        """
+        depth = 0
+        in_string = False
+        escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in "{[":
+                depth += 1
+            elif char in "}]":
+                depth -= 1
+                if depth == 0:
+                    return text[start:index + 1], True
+        return text[start:], False
+
+    def _repair(self, candidate: str):
+        """Repairs smart quotes, trailing commas and missing closing brackets.
+
+        Returns:
+            tuple: the parsed JSON (or None) and the list of repairs made
+        """
+        out = []
+        stack = []
+        cuts = []           # (output length, open brackets) at each comma outside a string
+        repairs = set()
+        in_string = False
+        smart_string = False
+        escaped = False
+
+        for char in candidate:
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"' or (smart_string and char in SMART_DOUBLE_QUOTES):
+                    if char != '"':
+                        repairs.add("smart_quotes")
+                    char = '"'
+                    in_string = False
+                out.append(char)
+                continue
+
+            if char == '"' or char in SMART_DOUBLE_QUOTES:
+                if char != '"':
+                    repairs.add("smart_quotes")
+                in_string, smart_string = True, char != '"'
+                out.append('"')
+            elif char in "{[":
+                stack.append("}" if char == "{" else "]")
+                out.append(char)
+            elif char in "}]":
+                # drop a trailing comma before the closing bracket
+                while out and out[-1].isspace():
+                    out.pop()
+                if out and out[-1] == ",":
+                    out.pop()
+                    repairs.add("trailing_commas")
+                if stack:
+                    stack.pop()
+                out.append(char)
+                if not stack:
+                    break
+            else:
+                if char == ",":
+                    cuts.append((len(out), list(stack)))
+                out.append(char)
+
+        repaired = "".join(out)
+        if not stack and not in_string:
+            try:
+                return json.loads(repaired, strict=False), sorted(repairs)
+            except json.JSONDecodeError:
+                return None, sorted(repairs)
+
+        # the response was cut off, close the open string and brackets
+        repairs.add("truncated")
+        if in_string:
+            # drop a half written escape sequence and close the string
+            repaired = (repaired[:-1] if escaped else repaired) + '"'
+        attempts = [self._close(repaired, stack)]
+        for length, open_brackets in reversed(cuts[-MAX_TRUNCATION_CUTS:]):
+            attempts.append(self._close(repaired[:length], open_brackets))
+
+        for attempt in attempts:
+            try:
+                return json.loads(attempt, strict=False), sorted(repairs)
+            except json.JSONDecodeError:
+                continue
+        return None, sorted(repairs)
+
+    def _close(self, text: str, open_brackets: list) -> str:
+        """Closes the open brackets of a truncated response."""
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+        elif text.endswith(":"):
+            text += " null"
+        return text + "".join(reversed(open_brackets))
+
+# -------------------------------------------------------------------
+# Process-wide extractor
+# -------------------------------------------------------------------
+_extractor = JsonExtractor()
+
+def extract_json(text):
+    """Extracts the first JSON object or array from LLM text with the shared extractor.
+
+    Args:
+        text (str): the response from the LLM
+
+    Returns:
+        dict or list: the parsed JSON, or None if no JSON could be recovered
+
+    Example:
+        >>> extract_json('```json\n{"name": "Zorp"}\n```')
+        {'name': 'Zorp'}
+    """
+    return _extractor.extract(text)
+
+def get_json_extractor() -> JsonExtractor:
+    """Returns the process-wide extractor used by extract_json."""
+    return _extractor
+
+if __name__ == "__main__":
+    extractor = JsonExtractor()
+    samples = [
+        '```json\n{"name": "Zorp"}\n```',
+        'Here is your agent:\n{"name": "Zorp", "traits": ["bold", "kind",],}\nLet me know!',
+        '{“name”: “Zorp”, "quote": "it’s “fine”"}',
+        '{"name": "Zorp", "seasons": [{"episode": 1}, {"episode": 2, "title": "The Ret',
+        'Error generating response: 429 Too Many Requests',
+        'Season [1]: {"season_number": 1, "episodes": []}',
+        'Remember to use {braces}. {"name": "Zorp"}',
+    ]
+    for sample in samples:
+        print(extractor.extract(sample))
+    print(extractor.get_stats())
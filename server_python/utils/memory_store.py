@@ -0,0 +1,732 @@
+#
+# Module: memory_store
+#
+# This module implements the agent memory store for retrieving relevant chat turns, backstory and posts.
+#
+# Title: Memory Store
+# Summary: Local vector memory store implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# custom ARAI imports
+from utils.file_locks import file_lock
+from utils.agent_catalog import file_signature
+
+load_dotenv()
+
+# Memory store of agents whose master file leaves ai_model.memory_store empty: local, chroma or none
+DEFAULT_MEMORY_STORE = os.getenv("DEFAULT_MEMORY_STORE", "local").strip().lower()
+# Number of dimensions of the hashed embeddings
+MEMORY_EMBEDDING_DIM = int(os.getenv("MEMORY_EMBEDDING_DIM", "512"))
+# Number of texts embedded at once when indexing
+MEMORY_EMBED_BATCH = int(os.getenv("MEMORY_EMBED_BATCH", "256"))
+# Number of memories added to a prompt
+MEMORY_TOP_K = int(os.getenv("MEMORY_TOP_K", "5"))
+# Memories scoring under this cosine similarity are not added to a prompt
+MEMORY_MIN_SCORE = float(os.getenv("MEMORY_MIN_SCORE", "0.1"))
+
+STOP_WORDS = frozenset(
+    "a an and are as at be but by do does for from has have he her his i in is it its me my "
+    "of on or our she so that the their them they this to was we were what when where which "
+    "who why will with you your".split()
+)
+
+class HashingEmbedder:
+    """
+    Description:
+        Embeds texts on the CPU without a model download. The words and word
+        pairs of a text are hashed into a fixed number of signed buckets and
+        the vector is L2 normalized, so the dot product of two vectors is the
+        cosine similarity of their words. A batch of texts is embedded with a
+        single numpy scatter.
+
+    Attributes:
+        dim (int): the number of dimensions
+    """
+
+    def __init__(self, dim: int = MEMORY_EMBEDDING_DIM):
+        """Initialize the HashingEmbedder class.
+
+        Args:
+            dim (int): the number of dimensions
+
+        Example:
+            >>> embedder = HashingEmbedder(512)
+        """
+        self.dim = dim
+
+    def features(self, text: str) -> list:
+        """Returns the words, without stop words, and word pairs of a text."""
+        words = [word for word in re.findall(r"[a-z0-9']+", (text or "").lower()) if word not in STOP_WORDS]
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def embed(self, texts: list) -> np.ndarray:
+        """Embeds a batch of texts.
+
+        Args:
+            texts (list): the texts
+
+        Returns:
+            np.ndarray: a (len(texts), dim) float32 matrix of unit vectors
+
+        Example:
+            >>> embedder.embed(["a red car", "a blue car"]).shape
+            (2, 512)
+        """
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(hashed % self.dim)
+                signs.append(1.0 if hashed & 0x80000000 else -1.0)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(vectors, (np.array(rows), np.array(cols)), np.array(signs, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+# -------------------------------------------------------------------
+# Backends
+# -------------------------------------------------------------------
+class LocalVectorStore:
+    """
+    Description:
+        Keeps memories in process as a numpy matrix, searched with one
+        matrix-vector product. The memories are saved as an append-only
+        JSONL file and their vectors as an append-only float32 file beside
+        it, so adding memories only writes the new ones. Deleted memories
+        are recorded as tombstones and masked out of searches.
+
+    Attributes:
+        base_path (str): the path the .jsonl and .f32 files are named after
+        embedder (HashingEmbedder): the embedder
+    """
+
+    def __init__(self, base_path: str, embedder: HashingEmbedder):
+        """Initialize the LocalVectorStore class.
+
+        Args:
+            base_path (str): the path the .jsonl and .f32 files are named after, e.g. configs/Zed/Zed_memory
+            embedder (HashingEmbedder): the embedder
+
+        Example:
+            >>> store = LocalVectorStore("configs/Zed/Zed_memory", HashingEmbedder())
+        """
+        self.base_path = base_path
+        self.embedder = embedder
+        self.items_path = base_path + ".jsonl"
+        self.vectors_path = base_path + ".f32"
+        self._items = []
+        self._rows = {}
+        self._kind_codes = {}
+        self._vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+        self._kinds = np.zeros(0, dtype=np.int16)
+        self._live = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._lock = file_lock(self.items_path)
+        self._load()
+
+    def _load(self):
+        with self._lock:
+            items, deletes = self._repair()
+            size = len(items)
+            vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+            if size:
+                vectors = np.fromfile(self.vectors_path, dtype=np.float32, count=size * self.embedder.dim)
+                vectors = vectors.reshape(size, self.embedder.dim)
+            self._replay(items, deletes, vectors)
+
+    def _repair(self):
+        """Brings the two files back to one vector per item after a crash and returns the records.
+
+        A crash can tear the last line of the items file, or stop between
+        the vectors and the items append. The torn line, the vectors without
+        an item and the items without a vector are cut off, so the next add
+        pairs every item with its own vector again.
+
+        Returns:
+            tuple: the items, and the deletes as (number of items before it, id) pairs
+        """
+        data = b""
+        if os.path.exists(self.items_path):
+            with open(self.items_path, 'rb') as file:
+                data = file.read()
+        complete = data[:data.rfind(b"\n") + 1]
+
+        records = []
+        for line in complete.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+        row_bytes = self.embedder.dim * np.dtype(np.float32).itemsize
+        vector_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+
+        # replay the records in order, up to the last item that has a vector
+        items, deletes, kept = [], [], 0
+        for record in records:
+            if "delete" not in record:
+                if len(items) == vector_rows:
+                    break
+                items.append(record)
+            else:
+                deletes.append((len(items), record["delete"]))
+            kept += 1
+
+        if kept < len(records):
+            temp_path = self.items_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for record in records[:kept]:
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(temp_path, self.items_path)
+            print(f"[LocalVectorStore] - dropped {len(records) - kept} records without a vector from {self.items_path}")
+        elif len(complete) < len(data):
+            os.truncate(self.items_path, len(complete))
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) != len(items) * row_bytes:
+            print(f"[LocalVectorStore] - dropped {vector_rows - len(items)} vectors without an item from {self.vectors_path}")
+            os.truncate(self.vectors_path, len(items) * row_bytes)
+        return items, deletes
+
+    def _replay(self, items: list, deletes: list, vectors: np.ndarray):
+        """Loads the items and their vectors, then masks the deleted ones."""
+        self._append(items, vectors)
+        rows = {}
+        for position, item in enumerate(items):
+            rows.setdefault(item["id"], []).append(position)
+        for position, item_id in deletes:
+            # a delete applies to the versions of the item added before it
+            for row in rows.get(item_id, []):
+                if row < position:
+                    self._live[row] = False
+        self._rows = {}
+        for row in range(len(items)):
+            if self._live[row]:
+                self._rows[self._items[row]["id"]] = row
+
+    def _append(self, items: list, vectors: np.ndarray):
+        """Appends items and their vectors to the in-memory index, doubling its capacity when it is full."""
+        needed = self._size + len(items)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors), 64)
+            grown = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+            self._kinds = np.concatenate([self._kinds[:self._size], np.zeros(capacity - self._size, dtype=np.int16)])
+            self._live = np.concatenate([self._live[:self._size], np.zeros(capacity - self._size, dtype=bool)])
+
+        for offset, item in enumerate(items):
+            row = self._size + offset
+            previous = self._rows.get(item["id"])
+            if previous is not None:
+                self._live[previous] = False
+            self._rows[item["id"]] = row
+            self._kinds[row] = self._kind_codes.setdefault(item["kind"], len(self._kind_codes))
+            self._live[row] = True
+            self._items.append(item)
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
+
+    def ids(self, kind: str = None) -> set:
+        """Returns the ids of the live memories, of one kind if given."""
+        with self._lock:
+            return {item_id for item_id, row in self._rows.items() if kind is None or self._items[row]["kind"] == kind}
+
+    def add(self, items: list) -> int:
+        """Adds the memories that are not in the store yet, embedding them in batches.
+
+        Args:
+            items (list): {"id", "kind", "text", "metadata"} dicts
+
+        Returns:
+            int: the number of memories added
+        """
+        with self._lock:
+            new, seen = [], set()
+            for item in items:
+                if item["text"] and item["id"] not in seen and item["id"] not in self._rows:
+                    new.append(item)
+                    seen.add(item["id"])
+            if not new:
+                return 0
+
+            os.makedirs(os.path.dirname(self.items_path) or ".", exist_ok=True)
+            for start in range(0, len(new), MEMORY_EMBED_BATCH):
+                batch = new[start:start + MEMORY_EMBED_BATCH]
+                vectors = self.embedder.embed([item["text"] for item in batch])
+
+                # vectors first, a vector without its item is cut off on load
+                with open(self.vectors_path, 'ab') as file:
+                    file.write(vectors.tobytes())
+                with open(self.items_path, 'a', encoding='utf-8') as file:
+                    for item in batch:
+                        file.write(json.dumps(item, ensure_ascii=False) + "\n")
+                self._append(batch, vectors)
+            return len(new)
+
+    def delete(self, ids) -> int:
+        """Deletes memories by id.
+
+        Args:
+            ids (iterable): the ids
+
+        Returns:
+            int: the number of memories deleted
+        """
+        with self._lock:
+            ids = [item_id for item_id in ids if item_id in self._rows]
+            if ids:
+                with open(self.items_path, 'a', encoding='utf-8') as file:
+                    for item_id in ids:
+                        file.write(json.dumps({"delete": item_id}) + "\n")
+                for item_id in ids:
+                    self._live[self._rows.pop(item_id)] = False
+            return len(ids)
+
+    def query(self, query_vector: np.ndarray, k: int, kinds=None, exclude_ids=None) -> list:
+        """Returns the k memories most similar to a query vector.
+
+        Args:
+            query_vector (np.ndarray): the embedded query
+            k (int): the number of memories
+            kinds (list, optional): only memories of these kinds
+            exclude_ids (set, optional): memories left out of the results
+
+        Returns:
+            list: the memories with their score, best first
+        """
+        with self._lock:
+            if not self._rows:
+                return []
+
+            mask = self._live[:self._size].copy()
+            if kinds:
+                mask &= np.isin(self._kinds[:self._size], [self._kind_codes.get(kind, -1) for kind in kinds])
+            for item_id in exclude_ids or ():
+                if item_id in self._rows:
+                    mask[self._rows[item_id]] = False
+
+            scores = np.where(mask, self._vectors[:self._size] @ query_vector, -np.inf)
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [{**self._items[row], "score": float(scores[row])} for row in top if np.isfinite(scores[row])]
+
+    def count(self) -> int:
+        """Returns the number of live memories."""
+        with self._lock:
+            return len(self._rows)
+
+class ChromaVectorStore:
+    """
+    Description:
+        Keeps memories in a persistent chromadb collection. The vectors come
+        from the same HashingEmbedder, so chromadb never downloads an
+        embedding model. chromadb is imported when the store is created, so
+        it is only needed by agents that use it.
+
+    Attributes:
+        path (str): the chromadb directory
+        embedder (HashingEmbedder): the embedder
+    """
+
+    def __init__(self, base_path: str, embedder: HashingEmbedder):
+        """Initialize the ChromaVectorStore class.
+
+        Args:
+            base_path (str): the path the chromadb directory is named after, e.g. configs/Zed/Zed_memory
+            embedder (HashingEmbedder): the embedder
+
+        Raises:
+            ImportError: If chromadb is not installed
+        """
+        import chromadb
+
+        self.path = base_path + "_chroma"
+        self.embedder = embedder
+        self._client = chromadb.PersistentClient(path=self.path)
+        self._collection = self._client.get_or_create_collection(name="memories", metadata={"hnsw:space": "cosine"})
+        self._lock = threading.Lock()
+
+    def ids(self, kind: str = None) -> set:
+        """Returns the ids of the memories, of one kind if given."""
+        with self._lock:
+            result = self._collection.get(where={"kind": kind} if kind else None, include=[])
+            return set(result["ids"])
+
+    def add(self, items: list) -> int:
+        """Adds the memories that are not in the store yet, embedding them in batches."""
+        with self._lock:
+            unique = list({item["id"]: item for item in items if item["text"]}.values())
+            if not unique:
+                return 0
+            existing = set(self._collection.get(ids=[item["id"] for item in unique], include=[])["ids"])
+            new = [item for item in unique if item["id"] not in existing]
+
+            for start in range(0, len(new), MEMORY_EMBED_BATCH):
+                batch = new[start:start + MEMORY_EMBED_BATCH]
+                self._collection.add(
+                    ids=[item["id"] for item in batch],
+                    embeddings=self.embedder.embed([item["text"] for item in batch]).tolist(),
+                    documents=[item["text"] for item in batch],
+                    metadatas=[{"kind": item["kind"], "metadata": json.dumps(item.get("metadata", {}))} for item in batch],
+                )
+            return len(new)
+
+    def delete(self, ids) -> int:
+        """Deletes memories by id."""
+        ids = list(ids)
+        with self._lock:
+            if ids:
+                self._collection.delete(ids=ids)
+            return len(ids)
+
+    def query(self, query_vector: np.ndarray, k: int, kinds=None, exclude_ids=None) -> list:
+        """Returns the k memories most similar to a query vector, see LocalVectorStore.query."""
+        exclude_ids = set(exclude_ids or ())
+        with self._lock:
+            count = self._collection.count()
+            if not count:
+                return []
+            result = self._collection.query(
+                query_embeddings=[query_vector.tolist()],
+                n_results=min(count, k + len(exclude_ids)),
+                where={"kind": {"$in": list(kinds)}} if kinds else None,
+            )
+
+        memories = []
+        for item_id, text, metadata, distance in zip(result["ids"][0], result["documents"][0],
+                                                     result["metadatas"][0], result["distances"][0]):
+            if item_id in exclude_ids:
+                continue
+            memories.append({"id": item_id, "kind": metadata["kind"], "text": text,
+                             "metadata": json.loads(metadata.get("metadata") or "{}"), "score": 1.0 - distance})
+        return memories[:k]
+
+    def count(self) -> int:
+        """Returns the number of memories."""
+        with self._lock:
+            return self._collection.count()
+
+MEMORY_BACKENDS = {
+    "local": LocalVectorStore,
+    "chroma": ChromaVectorStore,
+}
+
+# -------------------------------------------------------------------
+# Agent memory
+# -------------------------------------------------------------------
+def chat_memory_id(conversation_id: str, message_id: int) -> str:
+    """Returns the memory id of the chat turn starting with a user message."""
+    return f"chat:{conversation_id}:{message_id}"
+
+class AgentMemory:
+    """
+    Description:
+        The memories of one agent: its backstory and profile, the summaries
+        of its episodes, its posts and its chat turns. The profile, episodes
+        and posts are synced from the master file whenever it changes, only
+        new or edited ones are embedded and removed ones are deleted. Chat
+        turns are added as they are saved.
+
+    Attributes:
+        master_file_path (str): the path to the agent master file
+        backend (str): the backend name, see MEMORY_BACKENDS
+        store (LocalVectorStore or ChromaVectorStore): the vector store
+        stats (dict): counters for synced, added and retrieved memories
+    """
+
+    SYNCED_KINDS = ("profile", "episode", "post")
+
+    def __init__(self, master_file_path: str, backend: str = "local", embedder: HashingEmbedder = None):
+        """Initialize the AgentMemory class.
+
+        Args:
+            master_file_path (str): the path to the agent master file
+            backend (str): the backend name, see MEMORY_BACKENDS
+            embedder (HashingEmbedder, optional): the embedder, a new one if None
+
+        Example:
+            >>> memory = AgentMemory("configs/Zed/Zed_master.json")
+        """
+        self.master_file_path = master_file_path
+        self.backend = backend
+        self.embedder = embedder or HashingEmbedder()
+        base_path = master_file_path.replace("_master.json", "") + "_memory"
+        self.store = MEMORY_BACKENDS[backend](base_path, self.embedder)
+        self.stats = {"syncs": 0, "added": 0, "deleted": 0, "queries": 0, "query_ms": 0.0}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Indexes the profile, episodes and posts of the master file if it changed since the last sync."""
+        signature = file_signature(self.master_file_path)
+        if signature is None or signature == self._signature:
+            return
+
+        with self._lock:
+            if signature == self._signature:
+                return
+            with open(self.master_file_path, 'r', encoding='utf-8') as file:
+                agent = json.load(file)["agent"]
+
+            items = build_agent_items(agent)
+            current = {item["id"] for item in items}
+            stale = set()
+            for kind in self.SYNCED_KINDS:
+                stale |= self.store.ids(kind) - current
+
+            added = self.store.add(items)
+            deleted = self.store.delete(stale)
+            self._signature = signature
+            self.stats["syncs"] += 1
+            self.stats["added"] += added
+            self.stats["deleted"] += deleted
+            if added or deleted:
+                print(f"[AgentMemory] - synced {self.master_file_path}: {added} added, {deleted} deleted")
+
+    def add_chat_turn(self, conversation_id: str, user_message: dict, agent_message: dict):
+        """Adds a chat turn, the user's message and the agent's answer, as one memory.
+
+        Args:
+            conversation_id (str): the chat log conversation id
+            user_message (dict): the user's message
+            agent_message (dict): the agent's answer
+        """
+        text = f"User: {user_message.get('prompt', '')}\n{agent_message.get('role', 'Agent')}: {agent_message.get('response', '')}"
+        self.stats["added"] += self.store.add([{
+            "id": chat_memory_id(conversation_id, user_message.get("message_id", 0)),
+            "kind": "chat",
+            "text": text,
+            "metadata": {"conversation_id": conversation_id, "message_id": user_message.get("message_id", 0)},
+        }])
+
+    def retrieve(self, query: str, k: int = MEMORY_TOP_K, kinds=None, exclude_ids=None, min_score: float = MEMORY_MIN_SCORE) -> list:
+        """Returns the memories most relevant to a query.
+
+        Args:
+            query (str): the query, e.g. the user's message
+            k (int): the maximum number of memories
+            kinds (list, optional): only memories of these kinds, e.g. ["post", "episode"]
+            exclude_ids (set, optional): memories left out, e.g. the chat turns already in the prompt
+            min_score (float): the lowest cosine similarity kept
+
+        Returns:
+            list: {"id", "kind", "text", "metadata", "score"} dicts, best first
+
+        Example:
+            >>> memory.retrieve("what happened on mars?", k=3)
+        """
+        self.sync()
+        started = time.perf_counter()
+        memories = self.store.query(self.embedder.embed([query])[0], k, kinds, exclude_ids)
+        self.stats["queries"] += 1
+        self.stats["query_ms"] += (time.perf_counter() - started) * 1000
+        return [memory for memory in memories if memory["score"] >= min_score]
+
+    def get_stats(self) -> dict:
+        """Returns the backend, the number of memories and the counters."""
+        return {"backend": self.backend, "memories": self.store.count(),
+                **{name: round(value, 1) if isinstance(value, float) else value for name, value in self.stats.items()}}
+
+def build_agent_items(agent: dict) -> list:
+    """Builds the profile, episode and post memories of an agent.
+
+    The id of a memory includes a hash of its text, so an edited episode or
+    post is indexed again and the old version is deleted by the next sync.
+
+    Args:
+        agent (dict): the "agent" object of a master file
+
+    Returns:
+        list: {"id", "kind", "text", "metadata"} dicts
+    """
+    def item(kind, key, text, metadata):
+        return {"id": f"{kind}:{key}:{zlib.crc32(text.encode('utf-8')):08x}", "kind": kind, "text": text, "metadata": metadata}
+
+    items = []
+    details = agent.get("agent_details", {})
+    for field in ("backstory", "universe"):
+        # long texts are split into paragraphs so each memory stays focused
+        for number, paragraph in enumerate(p for p in re.split(r"\n\s*\n", details.get(field) or "") if p.strip()):
+            items.append(item("profile", f"{field}:{number}", paragraph.strip(), {"field": field}))
+    for field in ("personality", "communication_style", "topic_expertise"):
+        if details.get(field):
+            items.append(item("profile", field, f"{field.replace('_', ' ')}: {', '.join(map(str, details[field]))}", {"field": field}))
+
+    for season in agent.get("seasons", []):
+        for episode in season.get("episodes", []):
+            where = {"season_number": season.get("season_number"), "episode_number": episode.get("episode_number")}
+            key = f"{where['season_number']}:{where['episode_number']}"
+            summary = " ".join(filter(None, [episode.get("episode_name"), episode.get("episode_summary") or episode.get("episode_description")]))
+            if summary:
+                items.append(item("episode", key, summary, where))
+            for post in episode.get("posts", []):
+                if post.get("post_content"):
+                    items.append(item("post", f"{key}:{post.get('post_number')}", post["post_content"],
+                                      {**where, "post_number": post.get("post_number")}))
+    return items
+
+def format_memories(memories: list) -> str:
+    """Formats memories for a prompt, one per line.
+
+    Args:
+        memories (list): the memories, see AgentMemory.retrieve
+
+    Returns:
+        str: the formatted memories, empty if there are none
+    """
+    return "\n".join(f"- ({memory['kind']}) {memory['text']}" for memory in memories)
+
+# -------------------------------------------------------------------
+# Process-wide agent memories
+# -------------------------------------------------------------------
+_memories = {}
+_settings = {}
+_memories_lock = threading.Lock()
+
+def get_memory_backend(master_file_path: str) -> str:
+    """Returns the memory backend of an agent, from ai_model.memory_store or DEFAULT_MEMORY_STORE.
+
+    Returns:
+        str: the backend name, or None if the agent has no memory store
+    """
+    key = os.path.abspath(master_file_path)
+    signature = file_signature(master_file_path)
+    cached = _settings.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(master_file_path, 'r', encoding='utf-8') as file:
+            memory_store = (json.load(file)["agent"].get("ai_model") or {}).get("memory_store") or ""
+    except (OSError, ValueError, KeyError):
+        memory_store = ""
+    backend = (memory_store.strip().lower() or DEFAULT_MEMORY_STORE)
+    backend = backend if backend in MEMORY_BACKENDS else None
+
+    _settings[key] = (signature, backend)
+    return backend
+
+def get_agent_memory(master_file_path: str):
+    """Returns the shared memory of an agent, None if the agent has no memory store.
+
+    An agent whose backend can not be created (e.g. chroma without chromadb
+    installed) falls back to the local backend.
+
+    Args:
+        master_file_path (str): the path to the agent master file
+
+    Returns:
+        AgentMemory: the agent memory, or None
+
+    Example:
+        >>> memory = get_agent_memory("configs/Zed/Zed_master.json")
+        >>> memories = memory.retrieve("what is your favorite planet?") if memory else []
+    """
+    with _memories_lock:
+        backend = get_memory_backend(master_file_path)
+        if backend is None:
+            return None
+
+        key = (os.path.abspath(master_file_path), backend)
+        if key not in _memories:
+            try:
+                _memories[key] = AgentMemory(master_file_path, backend)
+            except ImportError as e:
+                print(f"[get_agent_memory] - {backend} memory store unavailable ({str(e)}), using local")
+                local_key = (key[0], "local")
+                if local_key not in _memories:
+                    _memories[local_key] = AgentMemory(master_file_path, "local")
+                _memories[key] = _memories[local_key]
+        return _memories[key]
+
+def get_memory_stats() -> dict:
+    """Returns the stats of every agent memory in use."""
+    with _memories_lock:
+        return {f"{os.path.basename(path)} ({backend})": memory.get_stats() for (path, backend), memory in _memories.items()}
+
+# -------------------------------------------------------------------
+# Benchmark
+# -------------------------------------------------------------------
+def benchmark(sizes=(1000, 10000, 100000), queries=200, backend="local", k=MEMORY_TOP_K):
+    """Measures indexing throughput and retrieval latency against corpus size.
+
+    Args:
+        sizes (tuple): the corpus sizes
+        queries (int): the number of queries per size
+        backend (str): the backend name, see MEMORY_BACKENDS
+        k (int): the number of memories per query
+
+    Returns:
+        list: per size, the indexing time, items per second and query p50 / p95 in ms
+    """
+    import random
+    import tempfile
+
+    words = ("mars moon rocket drone pilot alien city night storm signal ocean forest music coffee "
+             "market crypto token launch friend secret map engine crystal desert river tower").split()
+    rng = random.Random(7)
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 30)))
+
+    results = []
+    embedder = HashingEmbedder()
+    for size in sizes:
+        store = MEMORY_BACKENDS[backend](os.path.join(tempfile.mkdtemp(), "bench_memory"), embedder)
+        items = [{"id": f"post:{i}", "kind": "post", "text": sentence(), "metadata": {}} for i in range(size)]
+
+        started = time.perf_counter()
+        store.add(items)
+        index_seconds = time.perf_counter() - started
+
+        latencies = []
+        for _ in range(queries):
+            started = time.perf_counter()
+            store.query(embedder.embed([sentence()])[0], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+
+        results.append({
+            "size": size,
+            "index_seconds": round(index_seconds, 2),
+            "items_per_second": round(size / index_seconds),
+            "query_ms_p50": round(latencies[len(latencies) // 2], 3),
+            "query_ms_p95": round(latencies[int(len(latencies) * 0.95)], 3),
+        })
+        print(results[-1])
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the agent memory store")
+    parser.add_argument("--backend", default="local", choices=sorted(MEMORY_BACKENDS))
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated corpus sizes")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    benchmark([int(size) for size in args.sizes.split(",")], args.queries, args.backend)
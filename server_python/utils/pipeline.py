@@ -0,0 +1,241 @@
+#
+# Module: pipeline
+#
+# This module implements the Pipeline class for running prompt-chain steps as a dependency graph.
+#
+# Title: Pipeline
+# Summary: Dependency graph runner implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class NodeStatus:
+    """This class is used to define the status of a pipeline node.
+
+    Attributes:
+        COMPLETED (str): the node returned a result
+        FAILED (str): the node returned None or raised an exception
+        SKIPPED (str): a node it depends on did not complete
+    """
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+class Pipeline:
+    """
+    Description:
+        Runs steps declared as a dependency graph. A node starts as soon as
+        every node it depends on has completed, so independent nodes run at
+        the same time and the whole run takes about the latency of the
+        longest dependency chain (the critical path) instead of the sum of
+        every step.
+
+        Each node is a function called with the results of the nodes that
+        already completed. A node fails if it raises or returns None, and
+        the nodes that depend on it are skipped.
+
+    Attributes:
+        name (str): the name of the pipeline, used in the logs
+        nodes (dict): node name -> (function, dependencies)
+    """
+
+    def __init__(self, name: str = "pipeline"):
+        """Initialize the Pipeline class.
+
+        Args:
+            name (str): the name of the pipeline, used in the logs
+
+        Example:
+            >>> pipeline = Pipeline("create agent")
+        """
+        self.name = name
+        self.nodes = {}
+
+    def add_node(self, name: str, func, depends_on: list = None):
+        """Adds a step to the graph.
+
+        Args:
+            name (str): the node name, its result is stored under this name
+            func (callable): called as func(results), results maps node names to their results
+            depends_on (list, optional): the nodes that must complete first
+
+        Returns:
+            Pipeline: the pipeline, so calls can be chained
+
+        Raises:
+            ValueError: If the node name is already used
+
+        Example:
+            >>> pipeline.add_node("agent", lambda results: create_agent(ai_model, concept))
+            >>> pipeline.add_node("season", lambda results: ..., depends_on=["agent"])
+        """
+        if name in self.nodes:
+            raise ValueError(f"Node {name} is already in the pipeline")
+        self.nodes[name] = (func, list(depends_on or []))
+        return self
+
+    def validate(self):
+        """Checks that every dependency exists and that the graph has no cycles.
+
+        Raises:
+            ValueError: If a dependency is unknown or the graph has a cycle
+        """
+        for name, (_, depends_on) in self.nodes.items():
+            for dependency in depends_on:
+                if dependency not in self.nodes:
+                    raise ValueError(f"Node {name} depends on unknown node {dependency}")
+
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline {self.name} has a cycle through node {name}")
+            visiting.add(name)
+            for dependency in self.nodes[name][1]:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    # -------------------------------------------------------------------
+    # Helpers to run the graph
+    # -------------------------------------------------------------------
+    def run(self, max_workers: int = None) -> dict:
+        """Runs every node, starting each one as soon as its dependencies complete.
+
+        Args:
+            max_workers (int, optional): the number of nodes run at the same time, every node if None
+
+        Returns:
+            dict: the run report
+                results (dict): node name -> result of the completed nodes
+                nodes (dict): node name -> status, start_ms, end_ms, duration_ms and error
+                total_ms (float): the wall time of the run
+                sum_ms (float): the time the run would take with the nodes one after another
+                critical_path (list): the longest dependency chain
+                critical_path_ms (float): the summed duration of the critical path
+
+        Example:
+            >>> report = pipeline.run()
+            >>> print(report["total_ms"], report["critical_path"])
+        """
+        self.validate()
+
+        results = {}
+        nodes = {name: {"status": None, "start_ms": None, "end_ms": None, "duration_ms": 0.0, "error": None} for name in self.nodes}
+        pending = set(self.nodes)
+        running = {}
+        run_start = time.perf_counter()
+
+        def elapsed_ms():
+            return round((time.perf_counter() - run_start) * 1000, 1)
+
+        def run_node(name):
+            nodes[name]["start_ms"] = elapsed_ms()
+            try:
+                # each node gets a snapshot, nodes finishing at the same time do not change it
+                return self.nodes[name][0](dict(results))
+            finally:
+                nodes[name]["end_ms"] = elapsed_ms()
+                nodes[name]["duration_ms"] = round(nodes[name]["end_ms"] - nodes[name]["start_ms"], 1)
+
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.nodes)), thread_name_prefix="pipeline") as executor:
+            while pending or running:
+                # skip the nodes whose dependencies failed, start the ready ones
+                for name in sorted(pending):
+                    statuses = [nodes[dependency]["status"] for dependency in self.nodes[name][1]]
+                    if any(status in (NodeStatus.FAILED, NodeStatus.SKIPPED) for status in statuses):
+                        nodes[name]["status"] = NodeStatus.SKIPPED
+                        pending.discard(name)
+                        print(f"[{self.name}] - Skipping {name}, a dependency did not complete")
+                    elif all(status == NodeStatus.COMPLETED for status in statuses):
+                        pending.discard(name)
+                        print(f"[{self.name}] - Starting {name}")
+                        running[executor.submit(run_node, name)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = None
+                        nodes[name]["error"] = str(e)
+
+                    if result is None:
+                        nodes[name]["status"] = NodeStatus.FAILED
+                        print(f"[{self.name}] - {name} failed after {nodes[name]['duration_ms']} ms {nodes[name]['error'] or ''}")
+                    else:
+                        nodes[name]["status"] = NodeStatus.COMPLETED
+                        results[name] = result
+                        print(f"[{self.name}] - {name} completed in {nodes[name]['duration_ms']} ms")
+
+        critical_path, critical_path_ms = self._critical_path(nodes)
+        return {
+            "results": results,
+            "nodes": nodes,
+            "total_ms": elapsed_ms(),
+            "sum_ms": round(sum(node["duration_ms"] for node in nodes.values()), 1),
+            "critical_path": critical_path,
+            "critical_path_ms": critical_path_ms,
+        }
+
+    def _critical_path(self, nodes: dict):
+        """Returns the dependency chain with the longest summed duration."""
+        longest = {}
+
+        def visit(name):
+            if name not in longest:
+                chains = [visit(dependency) for dependency in self.nodes[name][1]]
+                path, duration = max(chains, key=lambda chain: chain[1], default=([], 0.0))
+                longest[name] = (path + [name], duration + nodes[name]["duration_ms"])
+            return longest[name]
+
+        path, duration = max((visit(name) for name in self.nodes), key=lambda chain: chain[1], default=([], 0.0))
+        return path, round(duration, 1)
+
+def print_pipeline_report(report: dict):
+    """Prints the per-node timings of a pipeline run.
+
+    Args:
+        report (dict): the report returned by Pipeline.run
+
+    Example:
+        >>> print_pipeline_report(pipeline.run())
+    """
+    print(f"{'node':<16} {'status':<10} {'start ms':>10} {'end ms':>10} {'duration ms':>12}")
+    for name, node in sorted(report["nodes"].items(), key=lambda item: item[1]["start_ms"] or 0):
+        print(f"{name:<16} {node['status']:<10} {node['start_ms'] or 0:>10} {node['end_ms'] or 0:>10} {node['duration_ms']:>12}")
+    print(f"Total: {report['total_ms']} ms, one after another: {report['sum_ms']} ms, "
+          f"critical path: {' -> '.join(report['critical_path'])} ({report['critical_path_ms']} ms)")
+
+if __name__ == "__main__":
+    def step(name, seconds):
+        def run(results):
+            time.sleep(seconds)
+            return name
+        return run
+
+    pipeline = Pipeline("demo")
+    pipeline.add_node("agent", step("agent", 0.2))
+    pipeline.add_node("season", step("season", 0.3), depends_on=["agent"])
+    pipeline.add_node("posts", step("posts", 0.3), depends_on=["season"])
+    pipeline.add_node("images", step("images", 0.5), depends_on=["agent"])
+    print_pipeline_report(pipeline.run())
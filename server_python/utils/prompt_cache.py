@@ -0,0 +1,191 @@
+#
+# Module: prompt_cache
+#
+# This module implements the PromptCache class for caching compiled prompt templates.
+#
+# Title: Prompt Cache
+# Summary: Compiled prompt template cache implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import time
+import threading
+import yaml
+from jinja2 import Template
+
+# custom ARAI code imports
+from utils.agent_catalog import file_signature
+
+class PromptCache:
+    """
+    Description:
+        Parses the chain prompts file once and compiles each prompt into a
+        Jinja template the first time it is used. The file is parsed again
+        only when its mtime or size changes, so prompts can still be edited
+        while the server is running.
+
+        The cache also keeps per-prompt timings, so the time spent rendering
+        a prompt can be compared with the time spent waiting for the LLM.
+
+    Attributes:
+        prompts_path (str): the path to the chain prompts file
+        stats (dict): counters for template hits, compiles and file reloads
+    """
+
+    def __init__(self, prompts_path: str):
+        """Initialize the PromptCache class.
+
+        Args:
+            prompts_path (str): the path to the chain prompts file
+
+        Example:
+            >>> prompt_cache = PromptCache("prompts/prompt_chaining.yaml")
+        """
+        self.prompts_path = prompts_path
+        self.stats = {"hits": 0, "compiles": 0, "reloads": 0}
+        self._prompts = {}
+        self._templates = {}
+        self._signature = None
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------
+    # Helpers to load and render prompts
+    # -------------------------------------------------------------------
+    def _reload_if_changed(self):
+        """Parses the prompts file again if it changed since the last load."""
+        signature = file_signature(self.prompts_path)
+        if signature == self._signature and self._prompts:
+            return
+
+        with open(self.prompts_path, "r", encoding="utf-8") as f:
+            self._prompts = yaml.safe_load(f) or {}
+        self._templates = {}
+        self._signature = signature
+        self.stats["reloads"] += 1
+
+    def get_template(self, prompt_key: str) -> Template:
+        """Returns the compiled template of a prompt.
+
+        Args:
+            prompt_key (str): The key for the prompt template (e.g., "prompt_1", "prompt_2")
+
+        Returns:
+            Template: the compiled Jinja template
+
+        Raises:
+            KeyError: If the prompt key is not in the prompts file
+
+        Example:
+            >>> template = prompt_cache.get_template("prompt_5 (Chat with the agent)")
+        """
+        with self._lock:
+            self._reload_if_changed()
+
+            template = self._templates.get(prompt_key)
+            if template is not None:
+                self.stats["hits"] += 1
+                return template
+
+            template = Template(self._prompts[prompt_key])
+            self._templates[prompt_key] = template
+            self.stats["compiles"] += 1
+            return template
+
+    def render(self, prompt_key: str, template_vars: dict) -> str:
+        """Renders a prompt and records how long it took.
+
+        Args:
+            prompt_key (str): The key for the prompt template (e.g., "prompt_1", "prompt_2")
+            template_vars (dict): dict of variables to pass to the template
+
+        Returns:
+            str: the rendered prompt text
+
+        Example:
+            >>> prompt_text = prompt_cache.render("prompt_5 (Chat with the agent)", prompt_5_vars)
+        """
+        started = time.perf_counter()
+        prompt_text = self.get_template(prompt_key).render(**template_vars)
+        self.record_timing(prompt_key, render_ms=(time.perf_counter() - started) * 1000)
+        return prompt_text
+
+    # -------------------------------------------------------------------
+    # Helpers to record and report timings
+    # -------------------------------------------------------------------
+    def record_timing(self, prompt_key: str, **timings):
+        """Adds timings, in milliseconds, to the totals of a prompt.
+
+        Args:
+            prompt_key (str): The key for the prompt template
+            **timings: the timings to add, e.g. render_ms=1.2 or llm_ms=3400
+
+        Example:
+            >>> prompt_cache.record_timing("prompt_2 (Season Creation)", llm_ms=5230.4)
+        """
+        with self._lock:
+            totals = self._timings.setdefault(prompt_key, {})
+            for name, value in timings.items():
+                totals[name] = totals.get(name, 0.0) + value
+                totals[f"{name}_count"] = totals.get(f"{name}_count", 0) + 1
+
+    def get_stats(self) -> dict:
+        """Returns the cache counters and the average timings of each prompt.
+
+        Returns:
+            dict: hit, compile and reload counters, and per-prompt
+                {"render_ms", "llm_ms", "parse_ms", "calls"} averages
+
+        Example:
+            >>> print(prompt_cache.get_stats()["prompts"]["prompt_2 (Season Creation)"])
+        """
+        with self._lock:
+            prompts = {}
+            for prompt_key, totals in self._timings.items():
+                averages = {"calls": totals.get("render_ms_count", 0)}
+                for name in ("render_ms", "llm_ms", "parse_ms"):
+                    if totals.get(f"{name}_count"):
+                        averages[name] = round(totals[name] / totals[f"{name}_count"], 3)
+                prompts[prompt_key] = averages
+
+            stats = dict(self.stats)
+            stats["templates"] = len(self._templates)
+            stats["prompts"] = prompts
+            return stats
+
+# -------------------------------------------------------------------
+# Process-wide caches, one per prompts file
+# -------------------------------------------------------------------
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_prompt_cache(prompts_path: str) -> PromptCache:
+    """Returns the process-wide cache of a prompts file, creating it on first use.
+
+    Args:
+        prompts_path (str): the path to the chain prompts file
+
+    Returns:
+        PromptCache: the shared cache
+    """
+    prompts_path = os.path.abspath(prompts_path)
+    with _caches_lock:
+        if prompts_path not in _caches:
+            _caches[prompts_path] = PromptCache(prompts_path)
+        return _caches[prompts_path]
+
+if __name__ == "__main__":
+    prompts_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts", "prompt_chaining.yaml")
+    prompt_cache = get_prompt_cache(prompts_path)
+    for _ in range(3):
+        prompt_cache.render("prompt_5 (Chat with the agent)", {"agent_name": "Zorp", "agent_json": "{}", "chat_history": "[]", "user_prompt": "Hi"})
+    print(prompt_cache.get_stats())
@@ -0,0 +1,402 @@
+#
+# Module: retry_policy
+#
+# This module implements the RetryPolicy class for retrying failed LLM prompts.
+#
+# Title: Retry Policy
+# Summary: Shared LLM retry policy implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import re
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+LLM_RETRY_MAX_RETRY_AFTER = float(os.getenv("LLM_RETRY_MAX_RETRY_AFTER", "60"))
+
+class ErrorClass:
+    """This class is used to define the kinds of failed prompt attempts.
+
+    Attributes:
+        RATE_LIMITED (str): the provider asked us to slow down (429), retried after a longer backoff or Retry-After
+        TRANSIENT (str): timeouts, connection errors, 5xx and overloaded providers, retried with backoff
+        PERMANENT (str): bad credentials, bad requests, exhausted quota, never retried
+        INVALID_RESPONSE (str): the model answered but the JSON could not be used, retried with backoff
+    """
+    RATE_LIMITED = "rate_limited"
+    TRANSIENT = "transient"
+    PERMANENT = "permanent"
+    INVALID_RESPONSE = "invalid_response"
+
+RETRYABLE_ERROR_CLASSES = (ErrorClass.RATE_LIMITED, ErrorClass.TRANSIENT, ErrorClass.INVALID_RESPONSE)
+
+# HTTP status codes of each class, for the SDK exceptions that carry one
+PERMANENT_STATUS_CODES = (400, 401, 402, 403, 404, 405, 413, 422)
+TRANSIENT_STATUS_CODES = (408, 409, 425, 500, 502, 503, 504, 529)
+
+# message patterns, for errors that only reach us as text
+PERMANENT_PATTERNS = re.compile(
+    r"api[ _-]?key|authenticat|unauthori[sz]ed|permission|forbidden|"
+    r"invalid_request|not[ _]found|billing",
+    re.IGNORECASE
+)
+RATE_LIMIT_PATTERNS = re.compile(r"\b429\b|rate[ _-]?limit|too many requests|resource[ _]?exhausted|quota", re.IGNORECASE)
+TRANSIENT_PATTERNS = re.compile(
+    r"\b5\d\d\b|\b529\b|timed? ?out|timeout|connection|overloaded|unavailable|temporar|try again",
+    re.IGNORECASE
+)
+
+# "Error code: 401 - ..." (OpenAI, DeepSeek, Anthropic) or "429 Resource has been exhausted" (Google)
+STATUS_CODE_PATTERN = re.compile(r"(?:error code|status(?: code)?)\W+(\d{3})\b|^\W*(\d{3})\s", re.IGNORECASE)
+
+# "Please retry in 13.5s" or "retry_delay { seconds: 13 }" in provider messages
+RETRY_AFTER_PATTERNS = (
+    re.compile(r"retry (?:in|after) (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+)
+
+class AttemptError(Exception):
+    """Raised by a prompt attempt that failed.
+
+    Attributes:
+        message (str): what went wrong
+        error (Exception): the provider exception, if there was one
+        error_class (str): the ErrorClass, classified by the retry policy if None
+        retry_after (float): the seconds the provider asked us to wait, if any
+        attempts (int): the number of attempts made, set when the policy gives up
+    """
+
+    def __init__(self, message: str, error: Exception = None, error_class: str = None, retry_after: float = None):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+        self.error_class = error_class
+        self.retry_after = retry_after
+        self.attempts = 0
+
+class RetryPolicy:
+    """
+    Description:
+        Retries failed prompt attempts by the kind of failure. Permanent
+        errors fail at once, rate limits wait for the provider's Retry-After
+        (or a longer backoff), other errors back off exponentially with full
+        jitter so concurrent workers do not retry in lockstep. Every attempt
+        is counted per prompt key.
+
+    Attributes:
+        max_attempts (int): the maximum number of attempts of a prompt
+        base_delay (float): the backoff of the first retry, in seconds
+        max_delay (float): the maximum backoff, in seconds
+        max_retry_after (float): give up instead of waiting longer than this for a Retry-After
+    """
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0, max_retry_after=60.0, sleep=time.sleep):
+        """Initialize the RetryPolicy class.
+
+        Args:
+            max_attempts (int): the maximum number of attempts of a prompt
+            base_delay (float): the backoff of the first retry, in seconds
+            max_delay (float): the maximum backoff, in seconds
+            max_retry_after (float): give up instead of waiting longer than this for a Retry-After
+            sleep (callable): the function used to wait, time.sleep by default
+
+        Example:
+            >>> policy = RetryPolicy(max_attempts=4, base_delay=0.5)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self._sleep = sleep
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------
+    # Helpers to classify errors
+    # -------------------------------------------------------------------
+    def classify(self, error: Exception = None, message: str = None) -> str:
+        """Returns the ErrorClass of a failed attempt.
+
+        The HTTP status code of the SDK exception is used when there is one,
+        the error message otherwise.
+
+        Args:
+            error (Exception, optional): the provider exception
+            message (str, optional): the error message
+
+        Returns:
+            str: the ErrorClass
+
+        Example:
+            >>> policy.classify(message="Error code: 401 - Incorrect API key provided")
+            'permanent'
+        """
+        text = f"{message or ''} {error or ''}"
+        status_code = get_status_code(error) or parse_status_code(text)
+
+        # an exhausted quota comes back as 429 but will not recover by waiting
+        if "insufficient_quota" in text:
+            return ErrorClass.PERMANENT
+
+        if status_code == 429:
+            return ErrorClass.RATE_LIMITED
+        if status_code in PERMANENT_STATUS_CODES:
+            return ErrorClass.PERMANENT
+        if status_code in TRANSIENT_STATUS_CODES:
+            return ErrorClass.TRANSIENT
+
+        if RATE_LIMIT_PATTERNS.search(text):
+            return ErrorClass.RATE_LIMITED
+        if PERMANENT_PATTERNS.search(text):
+            return ErrorClass.PERMANENT
+        if TRANSIENT_PATTERNS.search(text):
+            return ErrorClass.TRANSIENT
+
+        # unknown failures (e.g. an empty response) are worth another try
+        return ErrorClass.TRANSIENT
+
+    def get_delay(self, attempt: int, error_class: str, retry_after: float = None) -> float:
+        """Returns the seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): the number of the attempt that failed, starting at 1
+            error_class (str): the ErrorClass of the failure
+            retry_after (float, optional): the seconds the provider asked us to wait
+
+        Returns:
+            float: the backoff, in seconds
+
+        Example:
+            >>> policy.get_delay(2, ErrorClass.TRANSIENT)  # between 0 and 2 * base_delay
+        """
+        if retry_after is not None:
+            # honor the provider, with a little jitter so workers do not return together
+            return retry_after + random.uniform(0, self.base_delay)
+
+        base_delay = self.base_delay
+        if error_class == ErrorClass.RATE_LIMITED:
+            # without a Retry-After, a rate limit needs a longer wait than a blip
+            base_delay *= 4
+
+        cap = min(self.max_delay, base_delay * (2 ** (attempt - 1)))
+        return random.uniform(cap / 2, cap) if error_class == ErrorClass.RATE_LIMITED else random.uniform(0, cap)
+
+    # -------------------------------------------------------------------
+    # Helpers to run attempts
+    # -------------------------------------------------------------------
+    def run(self, prompt_key: str, attempt_func):
+        """Calls attempt_func until it succeeds, fails permanently or runs out of attempts.
+
+        Args:
+            prompt_key (str): the prompt template key, used for the counters
+            attempt_func (callable): called as attempt_func(attempt), raises AttemptError on failure
+
+        Returns:
+            the result of the first successful attempt
+
+        Raises:
+            AttemptError: the last failure, with attempts set
+
+        Example:
+            >>> result = policy.run("prompt_2 (Season Creation)", lambda attempt: run_once())
+        """
+        self._record(prompt_key, "calls")
+        for attempt in range(1, self.max_attempts + 1):
+            self._record(prompt_key, "attempts")
+            try:
+                result = attempt_func(attempt)
+            except AttemptError as e:
+                error_class = e.error_class or self.classify(e.error, e.message)
+                retry_after = e.retry_after if e.retry_after is not None else get_retry_after(e.error, e.message)
+                e.error_class = error_class
+                e.attempts = attempt
+                self._record(prompt_key, error_class)
+
+                if error_class not in RETRYABLE_ERROR_CLASSES:
+                    print(f"[RetryPolicy] - {prompt_key}: {error_class} error, not retrying: {e.message}")
+                    self._record(prompt_key, "failures")
+                    raise
+                if attempt == self.max_attempts:
+                    print(f"[RetryPolicy] - {prompt_key}: giving up after {attempt} attempts: {e.message}")
+                    self._record(prompt_key, "failures")
+                    raise
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    print(f"[RetryPolicy] - {prompt_key}: provider asked to wait {retry_after:.0f}s, giving up")
+                    self._record(prompt_key, "failures")
+                    raise
+
+                delay = self.get_delay(attempt, error_class, retry_after)
+                print(f"[RetryPolicy] - {prompt_key}: {error_class} error on attempt {attempt}/{self.max_attempts}, retrying in {delay:.1f}s")
+                self._record(prompt_key, "retries")
+                self._record(prompt_key, "backoff_ms", delay * 1000)
+                self._sleep(delay)
+                continue
+
+            self._record(prompt_key, "successes")
+            if attempt > 1:
+                self._record(prompt_key, "recovered")
+            return result
+
+    def get_stats(self) -> dict:
+        """Returns the retry counters of each prompt key.
+
+        Returns:
+            dict: prompt key -> calls, attempts, retries, successes, recovered,
+                failures, backoff_ms and the number of failures of each ErrorClass
+        """
+        with self._lock:
+            return {
+                prompt_key: {name: round(value, 1) if isinstance(value, float) else value for name, value in counters.items()}
+                for prompt_key, counters in self._stats.items()
+            }
+
+    def _record(self, prompt_key: str, name: str, amount=1):
+        with self._lock:
+            counters = self._stats.setdefault(prompt_key or "unknown", {
+                "calls": 0, "attempts": 0, "retries": 0, "successes": 0,
+                "recovered": 0, "failures": 0, "backoff_ms": 0.0,
+            })
+            counters[name] = counters.get(name, 0) + amount
+
+# -------------------------------------------------------------------
+# Helpers to read provider exceptions
+# -------------------------------------------------------------------
+def get_status_code(error: Exception):
+    """Returns the HTTP status code of a provider exception.
+
+    OpenAI, DeepSeek and Anthropic errors have status_code, Google API errors have code.
+
+    Args:
+        error (Exception): the provider exception
+
+    Returns:
+        int: the status code, or None
+    """
+    if error is None:
+        return None
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+def parse_status_code(text: str):
+    """Returns the HTTP status code written in an error message.
+
+    Args:
+        text (str): the error message
+
+    Returns:
+        int: the status code, or None
+
+    Example:
+        >>> parse_status_code("Error code: 401 - Incorrect API key provided")
+        401
+    """
+    match = STATUS_CODE_PATTERN.search((text or "").strip())
+    if not match:
+        return None
+    return int(match.group(1) or match.group(2))
+
+def get_retry_after(error: Exception = None, message: str = None):
+    """Returns the seconds a provider asked us to wait before retrying.
+
+    Reads the Retry-After (or retry-after-ms) header of the error response,
+    or the retry delay some providers put in the error message.
+
+    Args:
+        error (Exception, optional): the provider exception
+        message (str, optional): the error message
+
+    Returns:
+        float: the seconds to wait, or None if the provider did not say
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None:
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms:
+                return float(retry_after_ms) / 1000
+            retry_after = headers.get("retry-after")
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    # an HTTP date
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except Exception:
+            pass
+
+    text = f"{message or ''} {error or ''}"
+    for pattern in RETRY_AFTER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+# -------------------------------------------------------------------
+# Process-wide policy
+# -------------------------------------------------------------------
+_retry_policy = None
+_retry_policy_lock = threading.Lock()
+
+def get_retry_policy() -> RetryPolicy:
+    """Returns the process-wide retry policy, configured by the LLM_RETRY_* environment variables.
+
+    Returns:
+        RetryPolicy: the shared policy
+
+    Example:
+        >>> print(get_retry_policy().get_stats())
+    """
+    global _retry_policy
+    with _retry_policy_lock:
+        if _retry_policy is None:
+            _retry_policy = RetryPolicy(
+                max_attempts=LLM_RETRY_MAX_ATTEMPTS,
+                base_delay=LLM_RETRY_BASE_DELAY,
+                max_delay=LLM_RETRY_MAX_DELAY,
+                max_retry_after=LLM_RETRY_MAX_RETRY_AFTER
+            )
+        return _retry_policy
+
+if __name__ == "__main__":
+    policy = RetryPolicy(base_delay=0.1)
+    for message in [
+        "Error code: 401 - Incorrect API key provided",
+        "Error code: 429 - Rate limit reached for gpt-4o. Please retry in 2.5s",
+        "Error code: 429 - You exceeded your current quota (insufficient_quota)",
+        "529 Overloaded",
+        "Request timed out.",
+        "Error code: 400 - {'error': {'message': 'max_tokens is too large'}}",
+        "503 The model is overloaded. Please try again later.",
+    ]:
+        print(f"{policy.classify(message=message):<16} retry_after={get_retry_after(message=message)}  {message}")
+
+    calls = []
+    def flaky(attempt):
+        calls.append(attempt)
+        if attempt < 3:
+            raise AttemptError("503 Service Unavailable")
+        return {"ok": True}
+
+    print(policy.run("demo", flaky), policy.get_stats())
@@ -0,0 +1,213 @@
+#
+# Module: run_ledger
+#
+# This module implements the RunLedger class for recording prompt-chain runs.
+#
+# Title: Run Ledger
+# Summary: Prompt-chain run ledger implementation.
+# Authors:
+#     - @TheBlockRhino
+# Created: 2025-01-25
+# Last edited by: @TheBlockRhino
+# Last edited date: 2025-01-25
+# URLs:
+#     - https://arai-ai.io
+#     - https://github.com/ARAI-DevHub/arai-ai-agents
+#     - https://x.com/TheBlockRhino
+
+# standard imports
+import os
+import json
+import uuid
+import datetime
+import threading
+
+class RunStatus:
+    """This class is used to define the status of a run and of its units.
+
+    Attributes:
+        PENDING (str): the unit has not started
+        RUNNING (str): the run or unit is in progress
+        GENERATED (str): the LLM output of the unit is recorded but not yet merged into the master file
+        COMPLETED (str): the run or unit is done
+        FAILED (str): the run stopped with an error, it can be resumed
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    GENERATED = "generated"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class RunLedger:
+    """
+    Description:
+        Records every prompt-chain run as a JSON file at
+        <ledger_dir>/<agent>/<run_id>.json. A run is made of units (e.g. the
+        season and the posts) and each unit records its status and the data
+        needed to continue without repeating completed LLM calls. Files are
+        written atomically, so a crash always leaves the last saved state.
+
+    Attributes:
+        ledger_dir (str): the directory the runs are saved to
+    """
+
+    def __init__(self, ledger_dir="runs"):
+        """Initialize the RunLedger class.
+
+        Args:
+            ledger_dir (str): the directory the runs are saved to
+
+        Example:
+            >>> ledger = RunLedger("runs")
+        """
+        self.ledger_dir = ledger_dir
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------------
+    # Helpers to create and update runs
+    # -------------------------------------------------------------------
+    def start_run(self, agent_name: str, master_file_path: str, params: dict, units: list) -> dict:
+        """Creates a new run with all of its units pending.
+
+        Args:
+            agent_name (str): the agent the run belongs to
+            master_file_path (str): the path to the agent master file
+            params (dict): the run parameters, e.g. the number of episodes
+            units (list): the names of the units, in the order they run
+
+        Returns:
+            dict: the new run
+
+        Example:
+            >>> run = ledger.start_run("Zorp", path, {"number_of_episodes": 3}, ["season", "posts"])
+        """
+        now = self._now()
+        run = {
+            "run_id": uuid.uuid4().hex,
+            "agent_name": agent_name,
+            "master_file_path": master_file_path,
+            "params": params,
+            "status": RunStatus.RUNNING,
+            "units": {name: {"status": RunStatus.PENDING} for name in units},
+            "unit_order": list(units),
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.save(run)
+        return run
+
+    def update_unit(self, run: dict, unit: str, status: str, **data):
+        """Sets the status of a unit, merges data into it and saves the run.
+
+        Args:
+            run (dict): the run
+            unit (str): the unit name
+            status (str): the new unit status, see RunStatus
+            **data: values to store with the unit
+
+        Example:
+            >>> ledger.update_unit(run, "season", RunStatus.GENERATED, season_data=season_data)
+        """
+        run["units"][unit]["status"] = status
+        run["units"][unit].update(data)
+        self.save(run)
+
+    def finish_run(self, run: dict, status: str, error: str = None):
+        """Sets the final status of a run and saves it.
+
+        Args:
+            run (dict): the run
+            status (str): RunStatus.COMPLETED or RunStatus.FAILED
+            error (str, optional): why the run failed
+        """
+        run["status"] = status
+        run["error"] = error
+        self.save(run)
+
+    def next_unit(self, run: dict) -> str:
+        """Returns the first unit that is not completed.
+
+        Args:
+            run (dict): the run
+
+        Returns:
+            str: the unit name, or None if every unit is completed
+        """
+        for unit in run["unit_order"]:
+            if run["units"][unit]["status"] != RunStatus.COMPLETED:
+                return unit
+        return None
+
+    # -------------------------------------------------------------------
+    # Helpers to read runs
+    # -------------------------------------------------------------------
+    def get_run(self, agent_name: str, run_id: str) -> dict:
+        """Returns a run.
+
+        Args:
+            agent_name (str): the agent the run belongs to
+            run_id (str): the run id
+
+        Returns:
+            dict: the run, or None if it does not exist
+        """
+        path = self._path(agent_name, run_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_runs(self, agent_name: str = None, incomplete_only: bool = False) -> list:
+        """Returns the recorded runs, oldest first.
+
+        Args:
+            agent_name (str, optional): only the runs of this agent
+            incomplete_only (bool, optional): only the runs that are not completed
+
+        Returns:
+            list: the runs
+        """
+        if not os.path.isdir(self.ledger_dir):
+            return []
+
+        agent_names = [agent_name] if agent_name else sorted(os.listdir(self.ledger_dir))
+        runs = []
+        for name in agent_names:
+            agent_dir = os.path.join(self.ledger_dir, name)
+            if not os.path.isdir(agent_dir):
+                continue
+            for filename in os.listdir(agent_dir):
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(agent_dir, filename), "r", encoding="utf-8") as f:
+                        run = json.load(f)
+                except Exception as e:
+                    print(f"[RunLedger] - Error loading run file {filename}: {str(e)}")
+                    continue
+                if incomplete_only and run["status"] == RunStatus.COMPLETED:
+                    continue
+                runs.append(run)
+
+        return sorted(runs, key=lambda run: run["created_at"])
+
+    # -------------------------------------------------------------------
+    # Helpers to persist runs
+    # -------------------------------------------------------------------
+    def save(self, run: dict):
+        """Atomically writes a run to its JSON file."""
+        run["updated_at"] = self._now()
+        path = self._path(run["agent_name"], run["run_id"])
+        temp_path = path + ".tmp"
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(run, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+
+    def _path(self, agent_name: str, run_id: str) -> str:
+        return os.path.join(self.ledger_dir, agent_name, f"{run_id}.json")
+
+    def _now(self) -> str:
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()